@@ -32,7 +32,7 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     "resources",
-    "search",
+    "search.apps.SearchConfig",
     "seeya",
     "rest_framework",
     "django.contrib.admin",
@@ -120,3 +120,171 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.1/howto/static-files/
 
 STATIC_URL = "/static/"
+
+
+# Search
+# Engine used to fan out the provider calls, one of "asyncio" or "rx"
+
+SEARCH_ENGINE = "asyncio"
+
+# Where the search enriches carriers and locations from, "orm" queries the
+# resources models in process and "http" the resources api at the endpoint,
+# see search.backends
+
+SEARCH_RESOURCES_BACKEND = "orm"
+
+SEARCH_RESOURCES_ENDPOINT = "http://127.0.0.1:8000/resources"
+
+# Keep every carrier and location in memory instead of caching lookups, the
+# orm backend loads them all at startup and reloads them in the background
+# every `SEARCH_RESOURCES_REFRESH` seconds or when they are saved
+
+SEARCH_RESOURCES_PRELOAD = False
+
+SEARCH_RESOURCES_REFRESH = 3600
+
+# Seconds to remember the codes the backend doesn't know, shorter than the
+# resources ttl so fixed data shows up soon, see search.managers
+
+SEARCH_RESOURCES_UNKNOWN_TTL = 300
+
+# Seconds to wait for the whole search and for each provider, the provider
+# deadlines default to the search deadline and can never exceed it
+
+SEARCH_DEADLINE = 20
+
+SEARCH_PROVIDER_DEADLINES = {}
+
+# Share one provider fan-out between identical searches that are in flight
+
+SEARCH_COALESCING = True
+
+# Provider response cache, responses are fresh for the provider ttl and then
+# served stale for another SEARCH_CACHE_STALE_TTL seconds while refreshing
+
+SEARCH_CACHE_SIZE = 1000
+
+SEARCH_CACHE_TTL = 300
+
+SEARCH_CACHE_TTLS = {}
+
+SEARCH_CACHE_STALE_TTL = 600
+
+# Circuit breaker options for every provider, a call fails when it raises or
+# takes longer than `latency` seconds, see search.breakers.CircuitBreaker
+
+SEARCH_BREAKER = {
+    "failure_rate": 0.5,
+    "latency": 10,
+    "window": 20,
+    "minimum": 5,
+    "cooldown": 30,
+    "probes": 1,
+}
+
+# Adaptive concurrency limit options for every provider, calls over the limit
+# wait up to `timeout` seconds in a queue of `queue` calls or get shed, see
+# search.limiters.AdaptiveLimiter
+
+SEARCH_LIMITER = {
+    "initial": 20,
+    "minimum": 1,
+    "maximum": 200,
+    "backoff": 0.9,
+    "tolerance": 2.0,
+    "queue": 50,
+    "timeout": 5,
+}
+
+# Hedged provider calls, a second identical job is sent when a provider with
+# a heavy latency tail has not answered within its `percentile` latency, at
+# most for `budget` of all the calls, see search.hedging.Hedger
+
+SEARCH_HEDGING = False
+
+SEARCH_HEDGE = {
+    "percentile": 90,
+    "ratio": 2.0,
+    "budget": 0.05,
+    "minimum": 20,
+    "window": 200,
+    "workers": 10,
+}
+
+# Merge the copies of the same itinerary across providers, `cheapest` sends
+# only the cheapest offer per group and `collapse` also sends the other
+# provider offers, None sends every copy. The `merge` query parameter of the
+# search stream overrides it.
+
+SEARCH_MERGE = None
+
+# Send a ranking of the best SEARCH_RANK_SIZE offers by `total`, `duration`
+# or `stops` instead of every provider response, None sends every response.
+# The `rank` and `size` query parameters of the search stream override them.
+
+SEARCH_RANK = None
+
+SEARCH_RANK_SIZE = 20
+
+# Flexible dates searches cover every route date within SEARCH_FLEXIBLE_DAYS
+# of the requested one, at most SEARCH_FLEXIBLE_CONCURRENCY date combinations
+# run at the same time across all the searches
+
+SEARCH_FLEXIBLE_DAYS = 3
+
+SEARCH_FLEXIBLE_CONCURRENCY = 10
+
+
+# Seeya
+# Gearman job servers, jobs are routed per provider with `hash` or
+# `least_loaded` routing and fail over to the next server, a failed server is
+# skipped for `cooldown` seconds, see seeya.routers.ServerRouter
+
+SEEYA_SERVERS = ["localhost:4730"]
+
+SEEYA_ROUTING = {"strategy": "hash", "replicas": 100, "cooldown": 10}
+
+# Pool of connected gearman clients per server, see seeya.pools.GearmanPool
+
+SEEYA_POOL = {
+    "size": 20,
+    "idle": 60,
+    "timeout": 5,
+    "backoff": 0.5,
+    "max_backoff": 30,
+}
+
+# Send the blocking provider calls through a single reactor thread that
+# multiplexes all the jobs over one connection instead of the client pool,
+# the calling threads still wait for their jobs, see
+# seeya.reactors.GearmanReactor
+
+SEEYA_REACTOR = False
+
+SEEYA_REACTOR_INTERVAL = 0.005
+
+# Low priority jobs, cache refreshes and flexible dates searches, wait up to
+# `timeout` seconds while `threshold` or more jobs are queued, the queue depth
+# is read every `interval` seconds, see seeya.monitors.QueueMonitor
+
+SEEYA_THROTTLE = {"threshold": 100, "interval": 1, "timeout": 5}
+
+# Compress job payloads of `threshold` characters or more, the workers answer
+# compressed requests in kind, set `compression` to None for workers that
+# don't understand compressed payloads, see seeya.payloads.PayloadCodec
+
+SEEYA_PAYLOAD = {"compression": None, "threshold": 1024}
+
+# Provider conversations are archived by a background thread, only a `rate`
+# share of them is kept and the rest are dropped when `size` are already
+# waiting, see seeya.writers.ConversationWriter
+
+SEEYA_LOG = {"rate": 1.0, "size": 1000, "batch": 100}
+
+# Compressed append-only archive of the provider conversations, segments are
+# rotated every `segment_size` bytes, see seeya.archives.ConversationArchive
+
+SEEYA_ARCHIVE = {
+    "path": os.path.join(BASE_DIR, "seeya", "data", "archive"),
+    "segment_size": 64 * 1024 * 1024,
+}
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SearchConfig(AppConfig):
     name = "search"
+
+    def ready(self):
+        if settings.SEARCH_RESOURCES_PRELOAD:
+            from search.services import resources
+
+            resources.warm()
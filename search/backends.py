@@ -0,0 +1,95 @@
+from abc import ABCMeta, abstractmethod
+from typing import Callable, Dict, List
+
+import requests
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from resources.models import Airline, Airport
+from search.models import ResourceCarrier, ResourceLocation
+
+
+class ResourceBackend(metaclass=ABCMeta):
+    """Looks up resources by code and returns them as plain dicts."""
+
+    CLASSES = (ResourceCarrier, ResourceLocation)
+
+    def supports(self, clazz) -> bool:
+        return clazz in self.CLASSES
+
+    @abstractmethod
+    def fetch(self, clazz, codes: List[str]) -> List[Dict]:
+        pass
+
+
+class PreloadableResourceBackend(ResourceBackend):
+    """A backend that can also list every resource and report changes, so
+    they can all be kept in memory."""
+
+    @abstractmethod
+    def fetch_all(self, clazz) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def watch(self, callback: Callable):
+        """Call `callback` whenever the resources change."""
+
+
+class OrmResourceBackend(PreloadableResourceBackend):
+    """Queries the resources models in process."""
+
+    MODELS = (Airline, Airport)
+
+    def fetch(self, clazz, codes: List[str]) -> List[Dict]:
+        return self.query(clazz, code__in=[code.upper() for code in codes])
+
+    def fetch_all(self, clazz) -> List[Dict]:
+        return self.query(clazz)
+
+    def watch(self, callback: Callable):
+        for model in self.MODELS:
+            for signal in (post_save, post_delete):
+                signal.connect(callback, sender=model, weak=False)
+
+    @staticmethod
+    def query(clazz, **filters) -> List[Dict]:
+        if clazz is ResourceCarrier:
+            return list(
+                Airline.objects.filter(**filters).values(
+                    "code", "logo", "name"
+                )
+            )
+
+        return [
+            dict(
+                code=airport.code,
+                name=airport.name,
+                city=airport.city,
+                country=airport.country.name if airport.country else None,
+            )
+            for airport in Airport.objects.filter(**filters).select_related(
+                "country"
+            )
+        ]
+
+
+class HttpResourceBackend(ResourceBackend):
+    """Queries the resources api of a remote deployment."""
+
+    ROUTES = {ResourceCarrier: "airlines", ResourceLocation: "airports"}
+
+    def __init__(self, endpoint: str = None):
+        self.endpoint = endpoint or settings.SEARCH_RESOURCES_ENDPOINT
+
+    def fetch(self, clazz, codes: List[str]) -> List[Dict]:
+        url = "{}/{}/".format(self.endpoint, self.ROUTES.get(clazz))
+        resp = requests.get(url=url, params=dict(code=codes))
+        resp.raise_for_status()
+        return resp.json()
+
+
+BACKENDS = {"orm": OrmResourceBackend, "http": HttpResourceBackend}
+
+
+def get_backend(name: str = None) -> ResourceBackend:
+    return BACKENDS[name or settings.SEARCH_RESOURCES_BACKEND]()
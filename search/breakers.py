@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import deque
+from enum import Enum, unique
+from typing import Deque, Dict
+
+from search.metrics import Window
+
+
+@unique
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling a provider that keeps failing or answering too slow.
+
+    The breaker opens when the share of failed calls in the rolling window
+    reaches `failure_rate`, a call counts as failed when it raised or took
+    longer than `latency` seconds. After `cooldown` seconds it lets up to
+    `probes` calls through and closes again once one of them succeeds. A
+    probe that never reports back is given up after another `cooldown`.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        latency: float = 10,
+        window: int = 20,
+        minimum: int = 5,
+        cooldown: float = 30,
+        probes: int = 1,
+    ):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.minimum = minimum
+        self.cooldown = cooldown
+        self.probes = probes
+        self.outcomes = Window(window)
+        self.latencies = Window(window)
+        self.state = BreakerState.CLOSED
+        self.opened = 0.0
+        self.probing: Deque[float] = deque()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.time()
+            if self.state == BreakerState.OPEN:
+                if now - self.opened < self.cooldown:
+                    return False
+                self.state = BreakerState.HALF_OPEN
+                self.probing.clear()
+
+            if self.state == BreakerState.HALF_OPEN:
+                while self.probing and now - self.probing[0] >= self.cooldown:
+                    self.probing.popleft()
+                if len(self.probing) >= self.probes:
+                    return False
+                self.probing.append(now)
+
+            return True
+
+    def release(self):
+        """Give back the probe of a call that ended without an outcome, like
+        one served from the cache or shed by the limiter, so the next call
+        can probe instead."""
+        with self.lock:
+            if self.state == BreakerState.HALF_OPEN and self.probing:
+                self.probing.popleft()
+
+    def record(self, latency: float, error: bool = False):
+        failed = error or latency >= self.latency
+        self.outcomes.add(0.0 if failed else 1.0)
+        self.latencies.add(latency)
+
+        with self.lock:
+            if self.state == BreakerState.HALF_OPEN:
+                if failed:
+                    self.open()
+                else:
+                    self.state = BreakerState.CLOSED
+                    self.outcomes.clear()
+            elif self.state == BreakerState.CLOSED:
+                if len(self.outcomes) >= self.minimum:
+                    if 1 - self.outcomes.mean() >= self.failure_rate:
+                        self.open()
+
+    def open(self):
+        self.state = BreakerState.OPEN
+        self.opened = time.time()
+
+    @property
+    def health(self) -> float:
+        """Share of successful calls in the rolling window, from 0 to 1."""
+        if self.state == BreakerState.OPEN:
+            return 0.0
+
+        score = self.outcomes.mean()
+        return 1.0 if score is None else score
+
+    def stats(self) -> Dict:
+        return dict(
+            state=self.state.value,
+            health=round(self.health, 3),
+            latency=self.latencies.percentile(50),
+        )
+
+
+class BreakerRegistry:
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.breakers: Dict[str, CircuitBreaker] = dict()
+        self.lock = threading.Lock()
+
+    def get(self, provider: str) -> CircuitBreaker:
+        with self.lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(**self.options)
+            return self.breakers[provider]
+
+    def allow(self, provider: str) -> bool:
+        return self.get(provider).allow()
+
+    def record(self, provider: str, latency: float, error: bool = False):
+        self.get(provider).record(latency, error=error)
+
+    def release(self, provider: str):
+        breaker = self.breakers.get(provider)
+        if breaker is not None:
+            breaker.release()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {k: v.stats() for k, v in sorted(self.breakers.items())}
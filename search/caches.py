@@ -0,0 +1,208 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from attr import attrs
+from cachetools import TTLCache
+
+from search.models import SearchResponse
+from seeya.models import SeeyaSearchRequest
+
+Key = Tuple[str, str]
+ResourceKey = Tuple[type, str, str]
+
+
+@attrs(auto_attribs=True)
+class CacheEntry:
+    response: SearchResponse
+    payload: str
+    expires: float
+    stale: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires
+
+    def is_stale(self, now: float) -> bool:
+        return self.expires <= now < self.stale
+
+
+class ResponseCache:
+    """Bounded lru cache of the mapped provider responses.
+
+    Entries are fresh for the provider ttl and after that they can still
+    be served as stale for another `stale_ttl` seconds while the caller
+    refreshes them in the background.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        ttl: float = 300,
+        ttls: Dict[str, float] = None,
+        stale_ttl: float = 600,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls or dict()
+        self.stale_ttl = stale_ttl
+        self.entries: Dict[Key, CacheEntry] = OrderedDict()
+        self.payloads: Dict[int, CacheEntry] = dict()
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(request: SeeyaSearchRequest) -> Key:
+        data = request.copy(transactionId=None).to_json(
+            indent=None, sort_keys=True
+        )
+        digest = hashlib.md5(data.encode(encoding="utf-8")).hexdigest()
+        return request.provider, digest
+
+    def get_ttl(self, provider: str) -> float:
+        return self.ttls.get(provider, self.ttl)
+
+    def get(self, key: Key) -> Optional[CacheEntry]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.is_fresh(now):
+                self.hits += 1
+            elif entry is not None and entry.is_stale(now):
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+                self.remove(key)
+                return None
+
+            self.entries.move_to_end(key)
+            return entry
+
+    def create(
+        self, key: Key, response: SearchResponse
+    ) -> Optional[CacheEntry]:
+        """Return the entry to `put` for the response, None if it should not
+        be cached. Serializing the payload is the costly part and happens
+        here, outside the lock, on the caller's thread."""
+        ttl = self.get_ttl(key[0])
+        if not ttl or not self.maxsize or response.error is not None:
+            return None
+
+        now = time.time()
+        return CacheEntry(
+            response=response,
+            payload=response.to_json(indent=None),
+            expires=now + ttl,
+            stale=now + ttl + self.stale_ttl,
+        )
+
+    def put(self, key: Key, entry: Optional[CacheEntry]):
+        if entry is None:
+            return
+
+        response = entry.response
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = entry
+            self.payloads[id(response)] = entry
+            while len(self.entries) > self.maxsize:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key: Key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.payloads.pop(id(entry.response), None)
+
+    def payload(self, response: SearchResponse) -> Optional[str]:
+        """Return the serialized json of a response served from the cache."""
+        entry = self.payloads.get(id(response))
+        if entry is not None and entry.response is response:
+            return entry.payload
+        return None
+
+    def start_refresh(self, key: Key) -> bool:
+        with self.lock:
+            if key in self.refreshing:
+                return False
+            self.refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key: Key):
+        with self.lock:
+            self.refreshing.discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            size=len(self.entries),
+            hits=self.hits,
+            stale_hits=self.stale_hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            refreshing=len(self.refreshing),
+        )
+
+
+class ResourceCache:
+    """Thread safe ttl cache of the resources by (class, locale, code).
+
+    Keys are split over `stripes` ttl caches with a lock each, so threads
+    enriching different responses rarely wait on each other, and the bulk
+    operations take every lock once per call instead of once per key.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        maxsize: int = 10000,
+        stripes: int = 16,
+        timer=time.monotonic,
+    ):
+        size = max(1, -(-maxsize // stripes))
+        self.stripes = [
+            (threading.Lock(), TTLCache(ttl=ttl, maxsize=size, timer=timer))
+            for _ in range(stripes)
+        ]
+
+    def get_stripe(self, key: ResourceKey):
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    def group(self, keys: Iterable[ResourceKey]):
+        groups = defaultdict(list)
+        for key in keys:
+            groups[hash(key) % len(self.stripes)].append(key)
+        return ((self.stripes[i], keys) for i, keys in groups.items())
+
+    def get_many(self, keys: Iterable[ResourceKey]) -> Dict[ResourceKey, Any]:
+        """Return the cached values of the keys, missing keys are left out,
+        cached values can be None."""
+        result = dict()
+        for (lock, cache), group in self.group(keys):
+            with lock:
+                for key in group:
+                    if key in cache:
+                        result[key] = cache[key]
+        return result
+
+    def put_many(self, items: Dict[ResourceKey, Any]):
+        for (lock, cache), group in self.group(items):
+            with lock:
+                for key in group:
+                    cache[key] = items[key]
+
+    def put(self, key: ResourceKey, value: Any):
+        self.put_many({key: value})
+
+    def __contains__(self, key: ResourceKey) -> bool:
+        lock, cache = self.get_stripe(key)
+        with lock:
+            return key in cache
+
+    def __len__(self) -> int:
+        return sum(len(cache) for _, cache in self.stripes)
@@ -0,0 +1,133 @@
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from concurrent import futures
+from datetime import date, datetime, timedelta
+from queue import Queue
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+
+from search.models import (
+    CalendarCell,
+    SearchCalendar,
+    SearchRequest,
+    SearchResponse,
+    SearchSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class CalendarSearch:
+    """Searches every combination of route dates within `days` of the
+    requested ones and streams the lowest price per combination.
+
+    Every combination is a regular search, so identical ones in flight are
+    coalesced and provider responses are reused from the response cache. The
+    combinations of all the calendar searches share one thread pool, which
+    caps how many of them run at the same time.
+    """
+
+    executor = None
+    lock = threading.Lock()
+
+    def __init__(self, service, days: int = None):
+        self.service = service
+        self.days = settings.SEARCH_FLEXIBLE_DAYS if days is None else days
+
+    @classmethod
+    def get_executor(cls) -> futures.Executor:
+        with cls.lock:
+            if cls.executor is None:
+                cls.executor = futures.ThreadPoolExecutor(
+                    settings.SEARCH_FLEXIBLE_CONCURRENCY,
+                    thread_name_prefix="calendar",
+                )
+            return cls.executor
+
+    def expand(self, request: SearchRequest) -> List[SearchRequest]:
+        today = date.today()
+        offsets = range(-self.days, self.days + 1)
+        dates = [
+            [
+                datetime.strptime(route.datetime, DATETIME_FORMAT)
+                + timedelta(days=offset)
+                for offset in offsets
+            ]
+            for route in request.routes
+        ]
+
+        requests = []
+        for combination in itertools.product(*dates):
+            if combination[0].date() < today or list(combination) != sorted(
+                combination
+            ):
+                continue
+
+            routes = [
+                route.copy(datetime=date.strftime(DATETIME_FORMAT))
+                for route, date in zip(request.routes, combination)
+            ]
+            requests.append(request.copy(routes=routes, flexibleDates=False))
+        return requests
+
+    @staticmethod
+    def key(request: SearchRequest) -> Tuple[str, ...]:
+        return tuple(route.datetime[:10] for route in request.routes)
+
+    def execute(self, request: SearchRequest) -> Iterable:
+        requests = self.expand(request)
+        cells = OrderedDict(
+            (self.key(r), CalendarCell(dates=list(self.key(r))))
+            for r in requests
+        )
+        yield SearchCalendar(cells=[c.copy() for c in cells.values()])
+
+        queue = Queue()
+        cancelled = threading.Event()
+        executor = self.get_executor()
+        for r in requests:
+            executor.submit(self.run, r, queue, cancelled)
+
+        timeouts = set()
+        skipped = set()
+        remaining = len(requests)
+        try:
+            while remaining:
+                r, message = queue.get()
+                if message is None:
+                    remaining -= 1
+                elif isinstance(message, SearchSummary):
+                    timeouts.update(message.timeouts)
+                    skipped.update(message.skipped)
+                elif isinstance(message, SearchResponse) and message.data:
+                    cell = cells[self.key(r)]
+                    total = min(x.get_total() for x in message.data)
+                    if cell.total is None or total < cell.total:
+                        cell.total = total
+                        cell.provider = message.provider
+                        yield SearchCalendar(cells=[cell.copy()])
+        finally:
+            cancelled.set()
+
+        providers = self.service.providers
+        yield SearchSummary(
+            timeouts=[p for p in providers if p in timeouts],
+            skipped=[p for p in providers if p in skipped],
+        )
+
+    def run(self, request: SearchRequest, queue: Queue, cancelled):
+        try:
+            if not cancelled.is_set():
+                for message in self.service.perform(request):
+                    queue.put((request, message))
+                    if cancelled.is_set():
+                        break
+        except Exception as e:
+            logger.exception(repr(e))
+        finally:
+            queue.put((request, None))
@@ -0,0 +1,101 @@
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcast:
+    """Shares one message stream with any number of subscribers.
+
+    Every subscriber replays the messages received so far and then follows
+    the live stream. There is no pump thread, whichever subscriber runs out
+    of buffered messages first pulls the next one from the source while the
+    others wait, so the stream survives any subscriber going away.
+    """
+
+    def __init__(self, source: Iterable):
+        self.source = iter(source)
+        self.messages = []
+        self.done = False
+        self.pulling = False
+        self.subscribers = 0
+        self.condition = threading.Condition()
+
+    def subscribe(self) -> Iterator:
+        with self.condition:
+            self.subscribers += 1
+
+        try:
+            index = 0
+            while True:
+                message = self.next(index)
+                if message is StopIteration:
+                    return
+
+                index += 1
+                yield message
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+
+    def next(self, index: int):
+        with self.condition:
+            while True:
+                if index < len(self.messages):
+                    return self.messages[index]
+                if self.done:
+                    return StopIteration
+                if not self.pulling:
+                    self.pulling = True
+                    break
+                self.condition.wait()
+
+        try:
+            message = next(self.source)
+        except StopIteration:
+            message = StopIteration
+        except Exception as e:
+            logger.exception(repr(e))
+            message = StopIteration
+
+        with self.condition:
+            if message is StopIteration:
+                self.done = True
+            else:
+                self.messages.append(message)
+            self.pulling = False
+            self.condition.notify_all()
+
+        return message
+
+
+class SearchCoalescer:
+    """Lets identical in flight searches share a single provider fan-out."""
+
+    def __init__(self):
+        self.flights: Dict[Hashable, Broadcast] = dict()
+        self.lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+
+    def perform(self, key: Hashable, factory: Callable[[], Iterable]):
+        with self.lock:
+            broadcast = self.flights.get(key)
+            if broadcast is None or broadcast.done:
+                broadcast = Broadcast(factory())
+                self.flights[key] = broadcast
+                self.started += 1
+            else:
+                self.coalesced += 1
+
+        return self.follow(key, broadcast)
+
+    def follow(self, key: Hashable, broadcast: Broadcast):
+        try:
+            yield from broadcast.subscribe()
+        finally:
+            with self.lock, broadcast.condition:
+                finished = broadcast.done or not broadcast.subscribers
+                if finished and self.flights.get(key) is broadcast:
+                    del self.flights[key]
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+from abc import ABCMeta, abstractmethod
+from datetime import timedelta
+from queue import Queue
+from typing import Iterable, List
+
+from django.conf import settings
+from rx.core import Observable
+
+from search.models import SearchResponse, SearchSummary
+from seeya.models import SeeyaSearchRequest
+
+logger = logging.getLogger(__name__)
+
+
+class Engine(metaclass=ABCMeta):
+    @abstractmethod
+    def execute(
+        self, service, request: SeeyaSearchRequest
+    ) -> Iterable[SearchResponse]:
+        pass
+
+
+class RxEngine(Engine):
+    """Fans out through the rx thread pool, one thread per provider call."""
+
+    def execute(self, service, request):
+        failed = []
+
+        def fail(provider, error):
+            logger.exception(repr(error))
+            failed.append(provider)
+            return Observable.empty()
+
+        def prepare(provider):
+            deadline = timedelta(seconds=service.get_deadline(provider))
+            return (
+                service.prepare(provider, request)
+                .timeout(deadline, Observable.empty())
+                .catch_exception(lambda e: fail(provider, e))
+            )
+
+        providers = service.get_available_providers()
+        skipped = [p for p in service.providers if p not in providers]
+        deadline = Observable.timer(timedelta(seconds=service.deadline))
+        responded = []
+        for response in (
+            Observable.from_iterable(providers)
+            .flat_map(prepare)
+            .take_until(deadline)
+            .to_blocking()
+            .to_iterable()
+        ):
+            responded.append(response.provider)
+            yield response
+
+        timeouts = [
+            p for p in providers if p not in responded and p not in failed
+        ]
+        yield SearchSummary(timeouts=timeouts, skipped=skipped)
+
+
+class AsyncioEngine(Engine):
+    """Runs the provider calls as coroutines on a single shared event loop
+    and yields every response as soon as it completes."""
+
+    DONE = object()
+    loop = None
+    lock = threading.Lock()
+
+    @classmethod
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        with cls.lock:
+            if cls.loop is None:
+                cls.loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=cls.loop.run_forever,
+                    name="search-engine",
+                    daemon=True,
+                ).start()
+        return cls.loop
+
+    def execute(self, service, request):
+        queue = Queue()
+        coroutine = self.gather(service, request, queue)
+        asyncio.run_coroutine_threadsafe(coroutine, self.get_loop())
+
+        while True:
+            response = queue.get()
+            if response is self.DONE:
+                break
+            yield response
+
+    async def gather(self, service, request, queue: Queue):
+        timeouts = []
+        providers = service.get_available_providers()
+        skipped = [p for p in service.providers if p not in providers]
+        futures = [
+            asyncio.ensure_future(self.call(service, p, request, timeouts))
+            for p in providers
+        ]
+        try:
+            for future in asyncio.as_completed(
+                futures, timeout=service.deadline
+            ):
+                response = await future
+                if response is not None:
+                    queue.put(response)
+        except asyncio.TimeoutError:
+            pending = [f for f in futures if not f.done()]
+            for provider, future in zip(providers, futures):
+                if future in pending:
+                    future.cancel()
+                    timeouts.append(provider)
+            await asyncio.wait(pending)
+        finally:
+            timeouts.sort(key=providers.index)
+            queue.put(SearchSummary(timeouts=timeouts, skipped=skipped))
+            queue.put(self.DONE)
+
+    @staticmethod
+    async def call(service, provider: str, request, timeouts: List[str]):
+        try:
+            return await asyncio.wait_for(
+                service.prepare_async(provider, request),
+                timeout=service.get_deadline(provider),
+            )
+        except asyncio.TimeoutError:
+            timeouts.append(provider)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(repr(e))
+
+
+ENGINES = {"rx": RxEngine, "asyncio": AsyncioEngine}
+
+
+def get_engine(name: str = None) -> Engine:
+    return ENGINES[name or settings.SEARCH_ENGINE]()
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from concurrent import futures
+from typing import Awaitable, Callable, Dict, Optional
+
+from search.metrics import Window
+
+
+class Hedger:
+    """Sends a second identical call when the first one is slow.
+
+    Only providers with a heavy tail are hedged, that is when their p95
+    latency is at least `ratio` times their median. The hedge goes out once
+    the first call has been running for the provider's `percentile` latency
+    and whichever call answers first wins. Hedges are capped to `budget`
+    of all the calls and run on a pool of `workers` threads.
+
+    On the sync path the primary call runs on a second pool of `workers`
+    threads, so the caller is free to take the hedge's answer. A slot is
+    claimed before submitting, so primaries never queue behind each other,
+    when every slot is busy the call runs on the caller's thread without a
+    hedge.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 90,
+        ratio: float = 2.0,
+        budget: float = 0.05,
+        minimum: int = 20,
+        window: int = 200,
+        workers: int = 10,
+    ):
+        self.percentile = percentile
+        self.ratio = ratio
+        self.budget = budget
+        self.minimum = minimum
+        self.window = window
+        self.workers = workers
+        self.latencies: Dict[str, Window] = dict()
+        self.executor = None
+        self.primaries = None
+        self.slots = threading.BoundedSemaphore(workers)
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.lock = threading.Lock()
+
+    def record(self, provider: str, latency: float):
+        with self.lock:
+            if provider not in self.latencies:
+                self.latencies[provider] = Window(self.window)
+        self.latencies[provider].add(latency)
+
+    def get_delay(self, provider: str) -> Optional[float]:
+        window = self.latencies.get(provider)
+        if window is None or len(window) < self.minimum:
+            return None
+
+        if window.percentile(95) < window.percentile(50) * self.ratio:
+            return None
+
+        return window.percentile(self.percentile)
+
+    def start(self, provider: str) -> Optional[float]:
+        with self.lock:
+            self.requests += 1
+        return self.get_delay(provider)
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def won(self):
+        with self.lock:
+            self.wins += 1
+
+    def get_executor(self) -> futures.Executor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = futures.ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="hedge"
+                )
+            return self.executor
+
+    def get_primaries(self) -> futures.Executor:
+        with self.lock:
+            if self.primaries is None:
+                self.primaries = futures.ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="hedge-primary"
+                )
+            return self.primaries
+
+    def send(self, provider: str, func: Callable):
+        delay = self.start(provider)
+        if delay is None:
+            return func()
+
+        if not self.slots.acquire(blocking=False):
+            return func()
+
+        primary = self.get_primaries().submit(func)
+        primary.add_done_callback(lambda x: self.slots.release())
+        try:
+            return primary.result(timeout=delay)
+        except futures.TimeoutError:
+            pass
+
+        if not self.allow():
+            return primary.result()
+
+        hedge = self.get_executor().submit(func)
+        pending = {primary, hedge}
+        while True:
+            done, pending = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None or not pending:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        self.won()
+                    return future.result()
+
+    async def send_async(
+        self, provider: str, factory: Callable[[], Awaitable]
+    ):
+        delay = self.start(provider)
+        primary = asyncio.ensure_future(factory())
+        if delay is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            if not self.allow():
+                return await primary
+
+            hedge = asyncio.ensure_future(factory())
+            pending.add(hedge)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.exception() is None or not pending:
+                        if future is hedge:
+                            self.won()
+                        return future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        return dict(
+            requests=self.requests,
+            hedges=self.hedges,
+            wins=self.wins,
+            delays={k: self.get_delay(k) for k in sorted(self.latencies)},
+        )
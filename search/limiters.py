@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+from search.metrics import Window
+
+
+class LimitExceeded(Exception):
+    pass
+
+
+class AdaptiveLimiter:
+    """Concurrency limit for one provider that adapts to its latency.
+
+    The limit grows by one for every `limit` calls that complete close to
+    the best latency seen in the window (additive increase) and shrinks by
+    `backoff` when a call fails or takes `tolerance` times longer than that
+    (multiplicative decrease). Calls over the limit wait in a bounded queue
+    for at most `timeout` seconds, calls that find the queue full are shed.
+
+    Waiting threads and coroutines share the same queue, a released slot is
+    handed over directly to the oldest waiter.
+    """
+
+    def __init__(
+        self,
+        initial: int = 20,
+        minimum: int = 1,
+        maximum: int = 200,
+        backoff: float = 0.9,
+        tolerance: float = 2.0,
+        queue: int = 50,
+        timeout: float = 5,
+        window: int = 100,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.queue = queue
+        self.timeout = timeout
+        self.latencies = Window(window)
+        self.inflight = 0
+        self.shed = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, waiter: Callable) -> bool:
+        with self.lock:
+            if self.inflight < int(self.limit) and not self.waiters:
+                self.inflight += 1
+                return True
+
+            if len(self.waiters) >= self.queue:
+                self.shed += 1
+                raise LimitExceeded()
+
+            self.waiters.append(waiter)
+            return False
+
+    def cancel(self, waiter: Callable) -> bool:
+        """Remove a waiter, false if a slot has already been handed to it."""
+        with self.lock:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                self.shed += 1
+                return True
+            return False
+
+    def acquire(self):
+        event = threading.Event()
+        if self.try_acquire(event.set):
+            return
+
+        if not event.wait(self.timeout) and self.cancel(event.set):
+            raise LimitExceeded()
+
+    async def acquire_async(self):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(
+                lambda: future.done() or future.set_result(None)
+            )
+
+        if self.try_acquire(wake):
+            return
+
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            if self.cancel(wake):
+                raise LimitExceeded()
+        except asyncio.CancelledError:
+            if not self.cancel(wake):
+                self.release()
+            raise
+
+    def release(self, latency: float = None, error: bool = False):
+        if latency is not None:
+            self.latencies.add(latency)
+            self.adapt(latency, error)
+
+        with self.lock:
+            self.inflight -= 1
+            while self.waiters and self.inflight < int(self.limit):
+                self.inflight += 1
+                self.waiters.popleft()()
+
+    def adapt(self, latency: float, error: bool):
+        baseline = self.latencies.percentile(0)
+        with self.lock:
+            if error or latency > baseline * self.tolerance:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict:
+        return dict(
+            limit=int(self.limit),
+            inflight=self.inflight,
+            queued=len(self.waiters),
+            shed=self.shed,
+        )
+
+
+class LimiterRegistry:
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.limiters: Dict[str, AdaptiveLimiter] = dict()
+        self.lock = threading.Lock()
+
+    def get(self, provider: str) -> AdaptiveLimiter:
+        with self.lock:
+            if provider not in self.limiters:
+                self.limiters[provider] = AdaptiveLimiter(**self.options)
+            return self.limiters[provider]
+
+    def stats(self) -> Dict[str, Dict]:
+        return {k: v.stats() for k, v in sorted(self.limiters.items())}
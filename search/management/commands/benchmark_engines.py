@@ -0,0 +1,141 @@
+import asyncio
+import random
+import threading
+import time
+
+from django.core.management import BaseCommand
+
+from search.engines import ENGINES
+from search.models import (
+    SearchRequest,
+    RouteRequest,
+    PassengerRequest,
+    PassengerType,
+    CabinClassType,
+)
+from search.services import SearchService
+from seeya.models import SeeyaSearchResponse
+
+
+class SimulatedClient:
+    latency = 0.1
+
+    @classmethod
+    def send(cls, request, clazz, priority=None):
+        time.sleep(cls.delay())
+        return cls.response(request, clazz)
+
+    @classmethod
+    async def send_async(cls, request, clazz, priority=None):
+        await asyncio.sleep(cls.delay())
+        return cls.response(request, clazz)
+
+    @classmethod
+    def delay(cls):
+        return random.uniform(cls.latency / 2, cls.latency * 3 / 2)
+
+    @staticmethod
+    def response(request, clazz):
+        return clazz(
+            transactionId=request.transactionId, result=None, error="none"
+        )
+
+
+class BenchmarkSearchService(SearchService):
+    """Measures the engines alone, without provider limits and breakers."""
+
+    client = SimulatedClient
+
+    @classmethod
+    def call(cls, request, priority=None):
+        return cls.client.send(request, SeeyaSearchResponse)
+
+    @classmethod
+    async def call_async(cls, request, priority=None):
+        return await cls.client.send_async(request, SeeyaSearchResponse)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the search engines on threads used and time to first result"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--searches", type=int, default=50)
+        parser.add_argument("--latency", type=float, default=0.1)
+        parser.add_argument(
+            "--engines", nargs="+", default=sorted(ENGINES.keys())
+        )
+
+    def handle(self, *args, **options):
+        SimulatedClient.latency = options["latency"]
+        self.stdout.write(
+            "{:<10} {:>8} {:>12} {:>12} {:>12}".format(
+                "engine", "threads", "first min", "first p50", "total (ms)"
+            )
+        )
+        for name in options["engines"]:
+            stats = self.run(ENGINES[name](), options["searches"])
+            self.stdout.write(
+                "{:<10} {threads:>8} {first:>12.1f} {median:>12.1f} "
+                "{total:>12.1f}".format(name, **stats)
+            )
+
+    def run(self, engine, searches: int) -> dict:
+        service = BenchmarkSearchService(engine)
+        request = self.create_request()
+        firsts = []
+        finished = threading.Event()
+        baseline = threading.active_count()
+        peak = [baseline]
+
+        def sample():
+            while not finished.wait(0.001):
+                peak.append(threading.active_count())
+
+        def consume():
+            started = time.perf_counter()
+            for index, _ in enumerate(service.execute(request)):
+                if index == 0:
+                    firsts.append(time.perf_counter() - started)
+
+        sampler = threading.Thread(target=sample)
+        consumers = [threading.Thread(target=consume) for _ in range(searches)]
+
+        started = time.perf_counter()
+        sampler.start()
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+        total = time.perf_counter() - started
+
+        finished.set()
+        sampler.join()
+        firsts.sort()
+
+        return dict(
+            threads=max(peak) - baseline - searches - 1,
+            first=min(firsts) * 1000,
+            median=firsts[len(firsts) // 2] * 1000,
+            total=total * 1000,
+        )
+
+    @staticmethod
+    def create_request() -> SearchRequest:
+        return SearchRequest(
+            routes=[
+                RouteRequest(
+                    departure="ATH",
+                    arrival="LON",
+                    datetime="2018-12-31T00:00:00",
+                )
+            ],
+            passengers=[PassengerRequest(count=1, type=PassengerType.ADT)],
+            cabinClass=CabinClassType.ECONOMY,
+            carrier="",
+            flexibleDates=False,
+            locale="en_US",
+            currency="EUR",
+            market="gr",
+        )
@@ -1,45 +1,195 @@
 import logging
-import operator
-
-import requests
-from cachetools import TTLCache, cachedmethod
-from cachetools.keys import hashkey
-
-from search.models import (
-    ResourceCarrier,
-    ResourceCabinClass,
-    ResourceLocation,
-    ResourceEquipment,
-    SearchResponse,
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from search.backends import (
+    PreloadableResourceBackend,
+    ResourceBackend,
+    get_backend,
 )
+from search.caches import ResourceCache, ResourceKey
+from search.models import SearchResponse
 
 logger = logging.getLogger(__name__)
 
 
-class ResourceManager:
-    ENDPOINT = "http://127.0.0.1:8000/resources"
-    ROUTES = {ResourceCarrier: "airlines", ResourceLocation: "airports"}
+class ResourceIndex:
+    """Every resource of the backend in memory.
+
+    The index loads in one shot on first use and is then reloaded from a
+    background thread every `interval` seconds, or right after the backend
+    reports a change, and swapped in whole, so lookups never expire. When
+    a load fails the data stays as it was, None until the first success,
+    and the thread tries again after `retry` seconds.
+    """
+
+    def __init__(
+        self,
+        backend: PreloadableResourceBackend,
+        interval: float = 3600,
+        retry: float = 30,
+    ):
+        self.backend = backend
+        self.interval = interval
+        self.retry = retry
+        self.data: Dict = None
+        self.thread = None
+        self.started = False
+        self.loads = 0
+        self.changed = threading.Event()
+        self.lock = threading.Lock()
+        backend.watch(self.invalidate)
+
+    def get(self, clazz, code: str) -> Optional:
+        data = self.get_data()
+        return None if data is None else data[clazz].get(code)
+
+    def get_data(self) -> Optional[Dict]:
+        """Return the index, loading it on the first call only, it is None
+        until a load succeeds."""
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    self.reload()
+                    self.start()
+                    self.started = True
+        return self.data
+
+    def reload(self) -> bool:
+        try:
+            self.data = self.load()
+            return True
+        except Exception as e:
+            logger.exception(repr(e))
+            return False
+
+    def load(self) -> Dict:
+        self.loads += 1
+        return {
+            clazz: {
+                r["code"]: clazz.deserialize(r)
+                for r in self.backend.fetch_all(clazz)
+            }
+            for clazz in self.backend.CLASSES
+        }
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="resource-refresh", daemon=True
+            )
+            self.thread.start()
+
+    def run(self):
+        failed = self.data is None
+        while True:
+            self.changed.wait(self.retry if failed else self.interval)
+            self.changed.clear()
+            failed = not self.reload()
+
+    def invalidate(self, *args, **kwargs):
+        self.changed.set()
+
+    def warm(self):
+        """Load the index in the background instead of on first use."""
+        threading.Thread(target=self.get_data, daemon=True).start()
 
-    def __init__(self, ttl=3600, cachesize=10000):
-        self.cache = TTLCache(ttl=ttl, maxsize=cachesize)
 
-    def enrich(self, response: SearchResponse):
-        locale = response.locale
+class ResourceManager:
+    def __init__(
+        self,
+        ttl=3600,
+        cachesize=10000,
+        backend: ResourceBackend = None,
+        preload: bool = False,
+        refresh: float = 3600,
+        unknown_ttl: float = 300,
+    ):
+        self.cache = ResourceCache(ttl=ttl, maxsize=cachesize)
+        self.unknown = ResourceCache(ttl=unknown_ttl, maxsize=cachesize)
+        self.unknowns = Counter()
+        self.lock = threading.Lock()
+        self.backend = backend or get_backend()
+        self.index = None
+        if preload and isinstance(self.backend, PreloadableResourceBackend):
+            self.index = ResourceIndex(self.backend, refresh)
+
+    def warm(self):
+        if self.index is not None:
+            self.index.warm()
+
+    def enrich(self, *responses: SearchResponse):
+        """Fetch the missing codes of every resource class used in all the
+        responses with one lookup per class and fill them in."""
+        data = None if self.index is None else self.index.get_data()
+        if data is not None:
+            for response in responses:
+                for clazz, resources in self.resources(response):
+                    for code in resources:
+                        resources[code] = data[clazz].get(code)
+                        if resources[code] is None:
+                            self.count([self.key(clazz, None, code)])
+            return
+
+        codes = defaultdict(set)
+        for response in responses:
+            for clazz, resources in self.resources(response):
+                codes[(clazz, response.locale)].update(resources.keys())
+
+        failed = set()
+        for (clazz, locale), values in codes.items():
+            fetch_codes = self.filter_codes(clazz, locale, sorted(values))
+            if fetch_codes and self.load(clazz, locale, fetch_codes) is None:
+                failed.add((clazz, locale))
+
+        for response in responses:
+            for clazz, resources in self.resources(response):
+                keys = [self.key(clazz, response.locale, x) for x in resources]
+                found = self.lookup(keys, count=True)
+                for key in keys:
+                    if key in found:
+                        resources[key[2]] = found[key]
+                    elif (clazz, response.locale) in failed:
+                        resources[key[2]] = None
+                    else:
+                        resources[key[2]] = self.get(*key)
+
+    def resources(self, response: SearchResponse):
         for data in response.data:
             for clazz, resources in data.resources.all():
-                if not self.ROUTES.get(clazz):
-                    continue
+                if self.backend.supports(clazz):
+                    yield clazz, resources
 
-                codes = resources.keys()
-                fetch_codes = self.filter_codes(clazz, locale, codes)
-                self.fetch(clazz, locale, fetch_codes)
+    @staticmethod
+    def key(clazzz, locale, code) -> ResourceKey:
+        return clazzz, locale, code
 
-                for code in codes:
-                    resources[code] = self.get(clazz, locale, code)
-
-    @cachedmethod(operator.attrgetter("cache"))
     def get(self, clazzz, locale, code):
-        return self.fetch(clazzz, locale, code)
+        key = self.key(clazzz, locale, code)
+        found = self.lookup([key], count=True)
+        if key in found:
+            return found[key]
+
+        value = self.fetch(clazzz, locale, code)
+        if value is None and key in self.unknown:
+            self.count([key])
+        return value
+
+    def lookup(self, keys: List[ResourceKey], count=False) -> Dict:
+        """Return the cached resources of the keys, codes the backend didn't
+        know are cached for a shorter ttl and returned as None."""
+        found = self.cache.get_many(keys)
+        unknown = self.unknown.get_many(k for k in keys if k not in found)
+        if count:
+            self.count(unknown)
+        found.update(unknown)
+        return found
+
+    def count(self, keys):
+        if keys:
+            with self.lock:
+                self.unknowns.update((k[0].__name__, k[2]) for k in keys)
 
     def filter_codes(self, clazzz, locale, codes):
         if not codes:
@@ -48,30 +198,54 @@ class ResourceManager:
         if isinstance(codes, str):
             codes = [codes]
 
-        that = self
-
-        def exists(code):
-            key = hashkey(that, clazzz, locale, code)
-            return key not in that.cache
-
-        return list(filter(exists, list(codes)))
+        keys = [self.key(clazzz, locale, code) for code in codes]
+        found = self.lookup(keys)
+        return [key[2] for key in keys if key not in found]
 
     def fetch(self, clazzz, locale, code):
         if not code:
             return
 
-        try:
-            url = "{}/{}/".format(self.ENDPOINT, self.ROUTES.get(clazzz))
-            resp = requests.get(url=url, params=dict(code=code))
-            resp.raise_for_status()
-            result = resp.json()
+        codes = [code] if isinstance(code, str) else list(code)
+        items = self.load(clazzz, locale, codes)
+        if items is not None and len(items) == 1:
+            return next(iter(items.values()))
 
+    def load(self, clazzz, locale, codes: List[str]) -> Optional[Dict]:
+        """Fetch and cache the codes, the ones the backend doesn't know as
+        unknown, return the fetched resources or None if the backend
+        failed."""
+        try:
+            result = self.backend.fetch(clazzz, codes)
+            items = dict()
             for r in result:
                 obj = clazzz.deserialize(r)
-                key = hashkey(self, clazzz, locale, obj.code)
-                self.cache[key] = obj
-
-            if len(result) == 1:
-                return self.cache[key]
+                items[self.key(clazzz, locale, obj.code)] = obj
         except Exception as e:
             logger.exception(repr(e))
+            return None
+
+        self.cache.put_many(items)
+        self.unknown.put_many(
+            {
+                key: None
+                for key in (self.key(clazzz, locale, x) for x in codes)
+                if key not in items
+            }
+        )
+        return items
+
+    def stats(self, limit: int = 20) -> Dict:
+        """Cache sizes and the most frequent codes the backend didn't know,
+        by resource class."""
+        with self.lock:
+            common = self.unknowns.most_common(limit)
+
+        unknown = defaultdict(dict)
+        for (name, code), times in common:
+            unknown[name][code] = times
+        return dict(
+            size=len(self.cache),
+            unknown_size=len(self.unknown),
+            unknown=dict(unknown),
+        )
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 
 from attr import attrs, attrib
 
@@ -37,6 +37,7 @@ from seeya.models import (
     SeeyaSegmentReferences,
     SeeyaPaxFareData,
 )
+from seeya.decoders import SeeyaSearchResponseReader
 
 
 class SeeyaSearchRequestMapper:
@@ -94,16 +95,39 @@ class SearchResponseMapper:
     SeeyaTechnicalStops = List[SeeyaTechnicalStop]
     TechnicalStops = List[TechnicalStop]
     SegRefs = SeeyaSegmentReferences
+    Response = Union[SeeyaSearchResponse, SeeyaSearchResponseReader]
+
+    def map(self, value: Response) -> SearchResponse:
+        if isinstance(value, SeeyaSearchResponseReader):
+            return self.map_reader(value)
 
-    def map(self, value: SeeyaSearchResponse) -> SearchResponse:
         data = []
         error = value.error
         locale = self.request.metadata.locale
+        provider = self.request.provider
         if error is None:
             self.segments = self.map_segments(value.result.groupOfSegments)
             data = self.map_recommendations(value.result.recommendations)
 
-        return SearchResponse(data=data, error=error, locale=locale)
+        return SearchResponse(
+            data=data, error=error, locale=locale, provider=provider
+        )
+
+    def map_reader(self, value: SeeyaSearchResponseReader) -> SearchResponse:
+        data = []
+        groups = None
+        for recommendation in value.read():
+            if groups is not value.groupOfSegments:
+                groups = value.groupOfSegments
+                self.segments = self.map_segments(groups)
+            data.append(self.map_recommendation(recommendation))
+
+        return SearchResponse(
+            data=data if value.error is None else [],
+            error=value.error,
+            locale=self.request.metadata.locale,
+            provider=self.request.provider,
+        )
 
     def map_recommendations(self, value: Recommendations) -> ResponseData:
         return list(map(lambda x: self.map_recommendation(x), value))
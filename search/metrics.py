@@ -0,0 +1,36 @@
+import threading
+from collections import deque
+from typing import Optional
+
+
+class Window:
+    """Rolling window over the latest observations of a measurement."""
+
+    def __init__(self, size: int = 100):
+        self.values = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value: float):
+        with self.lock:
+            self.values.append(value)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def mean(self) -> Optional[float]:
+        with self.lock:
+            values = list(self.values)
+        return sum(values) / len(values) if values else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self.lock:
+            values = sorted(self.values)
+        if not values:
+            return None
+
+        index = int(round(percent / 100 * (len(values) - 1)))
+        return values[index]
@@ -1,4 +1,6 @@
 import hashlib
+import json
+from datetime import datetime
 from enum import Enum, unique
 from typing import List, Dict, Optional
 
@@ -7,6 +9,8 @@ from attr import attrib, attrs
 from mule.models import Serializable
 from search.validators import Regex, Datetime
 
+POINT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 @attrs(auto_attribs=True)
 class RouteRequest(Serializable):
@@ -49,6 +53,10 @@ class SearchRequest(Serializable):
     market: str
     directRoutes: bool = attrib(default=False)
 
+    def generate_id(self) -> str:
+        data = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.md5(data.encode(encoding="utf-8")).hexdigest()
+
     def get_passengers_by_type(self, type: PassengerType):
         for pax in self.passengers:
             if pax.type == type:
@@ -135,6 +143,10 @@ class Point(Serializable):
     location: str
     datetime: str
 
+    def get_datetime(self) -> datetime:
+        value = self.datetime[:19].replace("T", " ")
+        return datetime.strptime(value, POINT_DATETIME_FORMAT)
+
 
 @attrs(auto_attribs=True)
 class TechnicalStop(Serializable):
@@ -190,6 +202,25 @@ class Leg(Serializable):
     segments: List[Segment]
     duration: int = attrib(init=False, default=None)
 
+    def get_duration(self) -> int:
+        """Minutes from the first departure to the last arrival.
+
+        Point datetimes are local to their airport, so instead of
+        subtracting the two ends the flying time and technical stops of
+        every segment are added to the layovers between them, each of
+        which starts and ends at the same airport."""
+        total = sum(
+            s.duration + sum(t.duration for t in s.route.technicalStop)
+            for s in self.segments
+        )
+        for previous, segment in zip(self.segments, self.segments[1:]):
+            layover = (
+                segment.route.departure.get_datetime()
+                - previous.route.arrival.get_datetime()
+            )
+            total += max(0, int(layover.total_seconds() // 60))
+        return total
+
 
 @attrs(auto_attribs=True)
 class Provider(Serializable):
@@ -217,6 +248,17 @@ class SearchResponseData(Serializable):
     def get_total(self) -> float:
         return sum([p.get_total() for p in self.passengers.values()])
 
+    def get_duration(self) -> int:
+        return sum(l.get_duration() for l in self.legs)
+
+    def get_stops(self) -> int:
+        return sum(
+            len(l.segments)
+            - 1
+            + sum(len(s.route.technicalStop) for s in l.segments)
+            for l in self.legs
+        )
+
     def generate_group_id(self) -> str:
         parts = [s.generate_id() for l in self.legs for s in l.segments]
         return hashlib.md5("".join(parts).encode(encoding="utf-8")).hexdigest()
@@ -250,6 +292,60 @@ class SearchResponseData(Serializable):
 
 @attrs(auto_attribs=True)
 class SearchResponse(Serializable):
+    EVENT = "message"
     data: List[SearchResponseData]
     locale: str
     error: Optional[str]
+    provider: Optional[str] = attrib(default=None)
+
+
+@attrs(auto_attribs=True)
+class SearchSummary(Serializable):
+    EVENT = "stop"
+    timeouts: List[str] = attrib(factory=list)
+    skipped: List[str] = attrib(factory=list)
+
+
+@attrs(auto_attribs=True)
+class SearchOffer(Serializable):
+    id: str
+    groupId: str
+    provider: Provider
+    total: float
+
+    @classmethod
+    def create(cls, data: SearchResponseData):
+        return cls(
+            id=data.id,
+            groupId=data.groupId,
+            provider=data.provider,
+            total=data.get_total(),
+        )
+
+
+@attrs(auto_attribs=True)
+class SearchUpdate(Serializable):
+    EVENT = "update"
+    data: List[SearchResponseData] = attrib(factory=list)
+    offers: List[SearchOffer] = attrib(factory=list)
+    provider: Optional[str] = attrib(default=None)
+
+
+@attrs(auto_attribs=True)
+class SearchRanking(Serializable):
+    EVENT = "ranking"
+    key: str
+    data: List[SearchResponseData] = attrib(factory=list)
+
+
+@attrs(auto_attribs=True)
+class CalendarCell(Serializable):
+    dates: List[str]
+    total: Optional[float] = attrib(default=None)
+    provider: Optional[str] = attrib(default=None)
+
+
+@attrs(auto_attribs=True)
+class SearchCalendar(Serializable):
+    EVENT = "calendar"
+    cells: List[CalendarCell]
@@ -1,42 +1,297 @@
+import asyncio
 import logging
+import time
 import uuid
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple
 
+from django.conf import settings
 from rx.concurrency import thread_pool_scheduler as scheduler
 from rx.core import Observable
 
+from search.breakers import BreakerRegistry
+from search.caches import CacheEntry, Key, ResponseCache
+from search.calendars import CalendarSearch
+from search.coalescers import SearchCoalescer
+from search.engines import Engine, get_engine
+from search.hedging import Hedger
+from search.limiters import LimiterRegistry
 from search.managers import ResourceManager
 from search.mappers import SearchResponseMapper, SeeyaSearchRequestMapper
 from search.models import SearchRequest, SearchResponse
-from seeya.models import SeeyaSearchRequest, SeeyaSearchResponse
+from search.stages import Stage
+from seeya.decoders import SeeyaSearchResponseReader
+from seeya.models import JobPriority, SeeyaSearchRequest
+from seeya.prepared import SeeyaRequestTemplate
 from seeya.services import SeeyaClient
 
 logger = logging.getLogger(__name__)
-resources = ResourceManager()
+resources = ResourceManager(
+    preload=settings.SEARCH_RESOURCES_PRELOAD,
+    refresh=settings.SEARCH_RESOURCES_REFRESH,
+    unknown_ttl=settings.SEARCH_RESOURCES_UNKNOWN_TTL,
+)
+flights = SearchCoalescer()
+responses = ResponseCache(
+    maxsize=settings.SEARCH_CACHE_SIZE,
+    ttl=settings.SEARCH_CACHE_TTL,
+    ttls=settings.SEARCH_CACHE_TTLS,
+    stale_ttl=settings.SEARCH_CACHE_STALE_TTL,
+)
+breakers = BreakerRegistry(**settings.SEARCH_BREAKER)
+limiters = LimiterRegistry(**settings.SEARCH_LIMITER)
+hedges = Hedger(**settings.SEARCH_HEDGE)
 
 
 class SearchService:
+    client = SeeyaClient
+
+    def __init__(
+        self,
+        engine: Engine = None,
+        deadline: float = None,
+        deadlines: Dict[str, float] = None,
+        priority: JobPriority = JobPriority.HIGH,
+    ):
+        self.engine = engine or get_engine()
+        self.priority = priority
+        self.deadline = deadline or settings.SEARCH_DEADLINE
+        self.deadlines = (
+            settings.SEARCH_PROVIDER_DEADLINES
+            if deadlines is None
+            else deadlines
+        )
+
     @property
     def providers(self):
         return ["petas", "figame", "kiwi", "travel2be", "travelgenio"]
 
-    def perform(self, request: SearchRequest):
+    def get_available_providers(self) -> List[str]:
+        return [p for p in self.providers if breakers.allow(p)]
+
+    def get_deadline(self, provider: str) -> float:
+        return min(self.deadlines.get(provider, self.deadline), self.deadline)
+
+    def perform(self, request: SearchRequest, stages: List[Stage] = None):
+        if request.flexibleDates:
+            messages = CalendarSearch(self.background()).execute(request)
+        elif not settings.SEARCH_COALESCING:
+            messages = self.execute(request)
+        else:
+            key = request.generate_id()
+            messages = flights.perform(key, lambda: self.execute(request))
+
+        for stage in stages or []:
+            messages = stage.process(messages)
+        return messages
+
+    def background(self) -> "SearchService":
+        """Copy of the service whose jobs yield to interactive searches."""
+        return self.__class__(
+            self.engine, self.deadline, self.deadlines, JobPriority.LOW
+        )
+
+    def execute(self, request: SearchRequest):
         seeya_request = SeeyaSearchRequestMapper().map(request)
+        return self.engine.execute(self, SeeyaRequestTemplate(seeya_request))
+
+    def prepare(self, provider: str, request: SeeyaRequestTemplate) -> Any:
+        request = self.create(provider, request)
         return (
-            Observable.from_iterable(self.providers)
-            .flat_map(lambda x: self.prepare(x, seeya_request))
-            .to_blocking()
-            .to_iterable()
+            Observable.just(request)
+            .subscribe_on(scheduler)
+            .map(lambda x: self.send(x, self.priority))
+        )
+
+    async def prepare_async(
+        self, provider: str, request: SeeyaRequestTemplate
+    ):
+        request = self.create(provider, request)
+        return await self.send_async(request, self.priority)
+
+    @staticmethod
+    def create(provider: str, request: SeeyaRequestTemplate):
+        if not isinstance(request, SeeyaRequestTemplate):
+            request = SeeyaRequestTemplate(request)
+        return request.prepare(provider, uuid.uuid4())
+
+    @classmethod
+    def send(
+        cls,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SearchResponse:
+        try:
+            key = responses.key(request)
+            entry = responses.get(key)
+            if entry is None:
+                return cls.fetch(key, request, priority)
+
+            if entry.is_stale(time.time()) and responses.start_refresh(key):
+                Observable.just(request).subscribe_on(scheduler).subscribe(
+                    lambda x: cls.refresh(key, x)
+                )
+            return entry.response
+        finally:
+            breakers.release(request.provider)
+
+    @classmethod
+    async def send_async(
+        cls,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SearchResponse:
+        try:
+            key = responses.key(request)
+            entry = responses.get(key)
+            if entry is None:
+                return await cls.fetch_async(key, request, priority)
+
+            if entry.is_stale(time.time()) and responses.start_refresh(key):
+                asyncio.ensure_future(cls.refresh_async(key, request))
+            return entry.response
+        finally:
+            breakers.release(request.provider)
+
+    @classmethod
+    def fetch(
+        cls,
+        key: Key,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SearchResponse:
+        result = cls.call(request, priority)
+        response, entry = cls.complete(key, request, result)
+        responses.put(key, entry)
+        return response
+
+    @classmethod
+    async def fetch_async(
+        cls,
+        key: Key,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SearchResponse:
+        result = await cls.call_async(request, priority)
+        loop = asyncio.get_event_loop()
+        response, entry = await loop.run_in_executor(
+            None, cls.complete, key, request, result
         )
+        responses.put(key, entry)
+        return response
+
+    @classmethod
+    def call(
+        cls,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SeeyaSearchResponseReader:
+        cls.client.throttle(priority)
+        limiter = limiters.get(request.provider)
+        limiter.acquire()
+        started = time.time()
+        error = True
+        try:
+            if settings.SEARCH_HEDGING:
+                result = hedges.send(
+                    request.provider,
+                    lambda: cls.client.send(
+                        request, SeeyaSearchResponseReader, priority
+                    ),
+                )
+            else:
+                result = cls.client.send(
+                    request, SeeyaSearchResponseReader, priority
+                )
+            error = False
+            return result
+        finally:
+            cls.record(request.provider, time.time() - started, error)
+
+    @classmethod
+    async def call_async(
+        cls,
+        request: SeeyaSearchRequest,
+        priority: JobPriority = JobPriority.HIGH,
+    ) -> SeeyaSearchResponseReader:
+        await cls.client.throttle_async(priority)
+        limiter = limiters.get(request.provider)
+        await limiter.acquire_async()
+        started = time.time()
+        error = True
+        try:
+            if settings.SEARCH_HEDGING:
+                result = await hedges.send_async(
+                    request.provider,
+                    lambda: cls.client.send_async(
+                        request, SeeyaSearchResponseReader, priority
+                    ),
+                )
+            else:
+                result = await cls.client.send_async(
+                    request, SeeyaSearchResponseReader, priority
+                )
+            error = False
+            return result
+        finally:
+            cls.record(request.provider, time.time() - started, error)
+
+    @staticmethod
+    def record(provider: str, latency: float, error: bool):
+        limiters.get(provider).release(latency, error)
+        breakers.record(provider, latency, error)
+        if not error:
+            hedges.record(provider, latency)
 
-    def prepare(self, provider: str, request: SeeyaSearchRequest) -> Any:
-        request = request.copy(transactionId=uuid.uuid4())
-        request.provider = provider
-        return Observable.just(request).subscribe_on(scheduler).map(self.send)
+    @classmethod
+    def refresh(cls, key: Key, request: SeeyaSearchRequest):
+        try:
+            cls.fetch(key, request, JobPriority.LOW)
+        except Exception as e:
+            logger.exception(repr(e))
+        finally:
+            responses.finish_refresh(key)
+
+    @classmethod
+    async def refresh_async(cls, key: Key, request: SeeyaSearchRequest):
+        try:
+            await cls.fetch_async(key, request, JobPriority.LOW)
+        except Exception as e:
+            logger.exception(repr(e))
+        finally:
+            responses.finish_refresh(key)
+
+    @classmethod
+    def complete(
+        cls,
+        key: Key,
+        request: SeeyaSearchRequest,
+        result: SearchResponseMapper.Response,
+    ) -> Tuple[SearchResponse, Optional[CacheEntry]]:
+        """Map the result and build its cache entry, both are cpu bound and
+        kept off the event loop on the async path."""
+        response = cls.process(request, result)
+        return response, responses.create(key, response)
 
     @classmethod
-    def send(cls, request: SeeyaSearchRequest) -> SearchResponse:
-        result = SeeyaClient.send(request, SeeyaSearchResponse)
+    def process(
+        cls, request: SeeyaSearchRequest, result: SearchResponseMapper.Response
+    ) -> SearchResponse:
         response = SearchResponseMapper(request).map(result)
         resources.enrich(response)
         return response
+
+    @classmethod
+    def encode(cls, message) -> str:
+        return responses.payload(message) or message.to_json(indent=None)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        return dict(
+            cache=responses.stats(),
+            flights=len(flights.flights),
+            gearman=cls.client.stats(),
+            hedges=hedges.stats(),
+            health=breakers.stats(),
+            limits=limiters.stats(),
+            resources=resources.stats(),
+        )
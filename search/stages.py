@@ -0,0 +1,152 @@
+import heapq
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Iterable, List, Tuple
+
+from search.models import (
+    SearchOffer,
+    SearchRanking,
+    SearchResponse,
+    SearchResponseData,
+    SearchUpdate,
+)
+
+
+class Stage(metaclass=ABCMeta):
+    """Transforms the message stream of one search before it is sent."""
+
+    @abstractmethod
+    def process(self, messages: Iterable) -> Iterable:
+        pass
+
+
+class MergeStage(Stage):
+    """Merges the copies of the same itinerary across providers.
+
+    Only the first offer of every group is sent, an update event replaces it
+    when a cheaper offer arrives later. In collapse mode the update events
+    also list every other provider offer for the group.
+
+    Responses may be shared with the response cache, they are copied and
+    never modified.
+    """
+
+    CHEAPEST = "cheapest"
+    COLLAPSE = "collapse"
+    MODES = (CHEAPEST, COLLAPSE)
+
+    def __init__(self, mode: str = CHEAPEST):
+        if mode not in self.MODES:
+            raise ValueError("Unknown merge mode `{}`".format(mode))
+
+        self.mode = mode
+        self.groups: Dict[str, SearchResponseData] = dict()
+
+    def process(self, messages):
+        for message in messages:
+            if isinstance(message, SearchResponse):
+                yield from self.merge(message)
+            else:
+                yield message
+
+    def merge(self, message: SearchResponse):
+        added: Dict[str, SearchResponseData] = OrderedDict()
+        cheaper: Dict[str, SearchResponseData] = OrderedDict()
+        offers: List[SearchOffer] = []
+
+        for data in message.data:
+            best = self.groups.get(data.groupId)
+            if best is None:
+                self.groups[data.groupId] = added[data.groupId] = data
+                continue
+
+            if self.mode == self.COLLAPSE:
+                offers.append(SearchOffer.create(data))
+
+            if data.get_total() < best.get_total():
+                self.groups[data.groupId] = data
+                if data.groupId in added:
+                    added[data.groupId] = data
+                else:
+                    cheaper[data.groupId] = data
+
+        if len(added) == len(message.data):
+            yield message
+        else:
+            yield message.copy(data=list(added.values()))
+
+        if cheaper or offers:
+            yield SearchUpdate(
+                data=list(cheaper.values()),
+                offers=offers,
+                provider=message.provider,
+            )
+
+
+class RankStage(Stage):
+    """Keeps the best `size` offers across providers by one sort key.
+
+    Offers are held in a heap with the worst one on top, so memory is bounded
+    by `size` whatever the number of results. Instead of the provider
+    responses a ranking event with the sorted offers is sent every time they
+    change. Copies of the same itinerary keep only their best offer.
+    """
+
+    KEYS = ("total", "duration", "stops")
+
+    def __init__(self, key: str = "total", size: int = 20):
+        if key not in self.KEYS:
+            raise ValueError("Unknown rank key `{}`".format(key))
+        if size < 1:
+            raise ValueError("Invalid rank size `{}`".format(size))
+
+        self.key = key
+        self.size = size
+        self.heap: List[Tuple] = []
+        self.groups: Dict[str, Tuple] = dict()
+        self.counter = count()
+
+    def process(self, messages):
+        for message in messages:
+            if isinstance(message, (SearchResponse, SearchUpdate)):
+                changed = [self.push(data) for data in message.data]
+                if any(changed):
+                    yield SearchRanking(key=self.key, data=self.ranking())
+            else:
+                yield message
+
+    def push(self, data: SearchResponseData) -> bool:
+        rank = getattr(data, "get_{}".format(self.key))()
+        entry = (-rank, -next(self.counter), data)
+        previous = self.groups.get(data.groupId)
+        if previous is not None:
+            if previous[0] >= entry[0]:
+                return False
+
+            self.heap.remove(previous)
+            heapq.heapify(self.heap)
+        elif len(self.heap) >= self.size:
+            if self.heap[0][0] >= entry[0]:
+                return False
+
+            evicted = heapq.heappop(self.heap)
+            del self.groups[evicted[2].groupId]
+
+        heapq.heappush(self.heap, entry)
+        self.groups[data.groupId] = entry
+        return True
+
+    def ranking(self) -> List[SearchResponseData]:
+        return [entry[2] for entry in sorted(self.heap, reverse=True)]
+
+
+def get_stages(
+    merge: str = None, rank: str = None, size: int = 20
+) -> List[Stage]:
+    stages = []
+    if merge:
+        stages.append(MergeStage(merge))
+    if rank:
+        stages.append(RankStage(rank, size))
+    return stages
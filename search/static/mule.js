@@ -20,7 +20,7 @@ if (!String.prototype.format) {
   };
 }
 
-function parse_response(obj) {
+function parse_response(obj, update) {
   resourceId = obj.resourceId
   provider = ''
   for (var i = 0; i < obj.data.length; i++) {
@@ -58,7 +58,8 @@ function parse_response(obj) {
         + "&provider=" + provider
 
     $("#trips").append(
-        "<div class=\"col-4\"<h3>" + message
+        "<div class=\"col-4\" data-group=\"" + obj.data[i].groupId
+        + "\"><h3>" + message
         + "<small class=\"text-muted\">"
         + "<a href=" + redirectUri + ">" + formattedPrice + "</a>"
         + " | " + presentationName
@@ -66,7 +67,7 @@ function parse_response(obj) {
     );
   }
 
-  if (obj.data.length > 0) {
+  if (obj.data.length > 0 && !update) {
     var classes = [
       'primary', 'secondary', 'success', 'danger',
       'warning', 'info', 'dark'
@@ -90,9 +91,52 @@ function search(id) {
         parse_response(obj)
     });
 
+    source.addEventListener('update', function (event) {
+        console.log(event);
+        var obj = jQuery.parseJSON(event.data);
+        for (var i = 0; i < obj.data.length; i++) {
+          $('#trips [data-group="' + obj.data[i].groupId + '"]').remove();
+        }
+        parse_response(obj, true)
+    });
+
+    source.addEventListener('ranking', function (event) {
+        console.log(event);
+        var obj = jQuery.parseJSON(event.data);
+        $("#trips").html('');
+        parse_response(obj, true)
+    });
+
+    source.addEventListener('calendar', function (event) {
+        console.log(event);
+        var obj = jQuery.parseJSON(event.data);
+        for (var i = 0; i < obj.cells.length; i++) {
+          var cell = obj.cells[i];
+          var dates = cell.dates.join(' / ');
+          var price = cell.total != null
+              ? cell.total + " | " + cell.provider : '-';
+          var html = "<div class=\"col-3\" data-dates=\"" + dates + "\">"
+              + "<h5>" + dates + " <small class=\"text-muted\">" + price
+              + "</small></h5></div>";
+          var existing = $('#trips [data-dates="' + dates + '"]');
+          if (existing.length > 0) {
+            existing.replaceWith(html);
+          } else {
+            $("#trips").append(html);
+          }
+        }
+    });
+
     source.addEventListener('stop', function (event) {
         source.close();
         console.log(event);
+        var obj = jQuery.parseJSON(event.data);
+        if (obj.timeouts.length > 0) {
+          $('#errors').html('Timed out: ' + obj.timeouts.join(', ')).show()
+        }
+        if (obj.skipped.length > 0) {
+          $('#errors').append(' Skipped: ' + obj.skipped.join(', ')).show()
+        }
     });
 
     source.addEventListener('error', function (event) {
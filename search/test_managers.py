@@ -3,10 +3,14 @@ from unittest import TestCase
 from unittest.mock import patch, call, Mock
 
 from attr import attrs
-from cachetools.keys import hashkey
 from requests import Response
 
-from search.managers import ResourceManager
+from search.backends import (
+    HttpResourceBackend,
+    PreloadableResourceBackend,
+    ResourceBackend,
+)
+from search.managers import ResourceIndex, ResourceManager
 from search.models import (
     Resources,
     ResourceCarrier,
@@ -30,14 +34,27 @@ class SearchResponse:
 locale = "en_US"
 
 
+def preloaded_backend():
+    backend = Mock(PreloadableResourceBackend)
+    backend.CLASSES = (ResourceCarrier, ResourceLocation)
+    backend.supports.side_effect = lambda x: x in backend.CLASSES
+    backend.fetch_all.side_effect = lambda clazz: {
+        ResourceCarrier: [dict(code="A3", logo=None, name="Aegean")],
+        ResourceLocation: [
+            dict(code="ATH", name="Athens", country="GR", city="Athens")
+        ],
+    }[clazz]
+    return backend
+
+
 class ResourceManagerTestCase(TestCase):
     def setUp(self):
-        self.manager = ResourceManager()
+        self.manager = ResourceManager(backend=HttpResourceBackend())
 
     @patch.object(ResourceManager, "filter_codes")
     @patch.object(ResourceManager, "get")
-    @patch.object(ResourceManager, "fetch")
-    def test_enrich(self, fetch, get, filter):
+    @patch.object(ResourceManager, "load")
+    def test_enrich(self, load, get, filter):
         filter.side_effect = lambda _, __, x: x
 
         data = dict(
@@ -51,10 +68,10 @@ class ResourceManagerTestCase(TestCase):
 
         self.manager.enrich(response)
 
-        fetch.assert_has_calls(
+        load.assert_has_calls(
             [
-                call(ResourceCarrier, locale, data.get("carriers").keys()),
-                call(ResourceLocation, locale, data.get("locations").keys()),
+                call(ResourceCarrier, locale, ["A3", "LH"]),
+                call(ResourceLocation, locale, ["ATH", "SKG"]),
             ]
         )
 
@@ -67,6 +84,59 @@ class ResourceManagerTestCase(TestCase):
             ]
         )
 
+    @patch.object(ResourceManager, "get", side_effect=lambda *args: args)
+    @patch.object(ResourceManager, "load")
+    def test_enrich_with_many_responses(self, load, get):
+        def create(carriers, locations):
+            return SearchResponseData(
+                Resources(
+                    carriers=dict.fromkeys(carriers),
+                    cabinClasses=dict.fromkeys(["Y"]),
+                    equipments=dict(),
+                    locations=dict.fromkeys(locations),
+                )
+            )
+
+        first = SearchResponse(
+            [create(["A3"], ["ATH"]), create(["A3", "LH"], ["SKG"])], locale
+        )
+        second = SearchResponse([create(["FR"], ["ATH", "STN"])], locale)
+        self.manager.enrich(first, second)
+
+        self.assertEqual(
+            [
+                call(ResourceCarrier, locale, ["A3", "FR", "LH"]),
+                call(ResourceLocation, locale, ["ATH", "SKG", "STN"]),
+            ],
+            load.call_args_list,
+        )
+        self.assertEqual(8, get.call_count)
+        resources = second.data[0].resources
+        self.assertEqual(
+            (ResourceCarrier, locale, "FR"), resources.carriers["FR"]
+        )
+        self.assertIsNone(resources.cabinClasses["Y"])
+
+    @patch("search.managers.logger.exception")
+    def test_enrich_with_backend_failure(self, logger):
+        backend = Mock(ResourceBackend)
+        backend.supports.side_effect = lambda x: x is ResourceCarrier
+        backend.fetch.side_effect = ConnectionError("down")
+        manager = ResourceManager(backend=backend)
+
+        codes = ["C{:02}".format(x) for x in range(100)]
+        resources = Resources(
+            carriers=dict.fromkeys(codes),
+            cabinClasses=dict(),
+            equipments=dict(),
+            locations=dict(),
+        )
+        manager.enrich(SearchResponse([SearchResponseData(resources)], locale))
+
+        self.assertEqual(dict.fromkeys(codes), resources.carriers)
+        backend.fetch.assert_called_once_with(ResourceCarrier, codes)
+        self.assertEqual(0, len(manager.unknown))
+
     def test_filter_codes(self):
         def run(codes):
             return self.manager.filter_codes(ResourceCarrier, locale, codes)
@@ -76,23 +146,22 @@ class ResourceManagerTestCase(TestCase):
         self.assertEqual(["A3"], run("A3"))
 
         for x in ["A3", "LH"]:
-            key = hashkey(self.manager, ResourceCarrier, locale, x)
-            self.manager.cache[key] = x
+            self.manager.cache.put((ResourceCarrier, locale, x), x)
 
         codes = ["A3", "CY", "LH", "FR"]
         self.assertEqual(["CY", "FR"], run(codes))
         self.assertEqual(["CY", "FR"], run(dict.fromkeys(codes).keys()))
 
     @patch.object(ResourceManager, "fetch", return_value="bar")
-    def test_get(self, *args):
+    def test_get(self, fetch):
         def run(code):
             return self.manager.get(ResourceCarrier, locale, code)
 
-        key = hashkey(self.manager, ResourceCarrier, locale, "A3")
-        self.manager.cache[key] = "foo"
+        self.manager.cache.put((ResourceCarrier, locale, "A3"), "foo")
 
         self.assertEqual("foo", run("A3"))
         self.assertEqual("bar", run("SKG"))
+        fetch.assert_called_once_with(ResourceCarrier, locale, "SKG")
 
     def test_fetch_with_no_code(self):
         manager = ResourceManager()
@@ -129,8 +198,8 @@ class ResourceManagerTestCase(TestCase):
         actual = self.manager.fetch(ResourceCarrier, locale, "A3")
         expected = ResourceCarrier(code="A3", logo=None, name="Aegean")
         self.assertEqual(expected, actual)
-        self.assertEqual(1, self.manager.cache.currsize)
-        key = hashkey(self.manager, ResourceCarrier, locale, "A3")
+        self.assertEqual(1, len(self.manager.cache))
+        key = (ResourceCarrier, locale, "A3")
         self.assertTrue(key in self.manager.cache)
 
     @patch("requests.get", return_value=Response())
@@ -146,8 +215,192 @@ class ResourceManagerTestCase(TestCase):
 
         actual = self.manager.fetch(ResourceCarrier, locale, "A3")
         self.assertIsNone(actual)
-        self.assertEqual(2, self.manager.cache.currsize)
+        self.assertEqual(2, len(self.manager.cache))
 
         for x in ["A3", "LH"]:
-            key = hashkey(self.manager, ResourceCarrier, locale, x)
+            key = (ResourceCarrier, locale, x)
             self.assertTrue(key in self.manager.cache)
+
+    def test_fetch_with_backend(self):
+        backend = Mock(ResourceBackend)
+        backend.fetch.return_value = [dict(code="A3", logo=None, name="A")]
+        manager = ResourceManager(backend=backend)
+
+        actual = manager.fetch(ResourceCarrier, locale, "A3")
+        self.assertEqual(
+            ResourceCarrier(code="A3", logo=None, name="A"), actual
+        )
+        backend.fetch.assert_called_once_with(ResourceCarrier, ["A3"])
+
+        backend.fetch.return_value = [
+            dict(code="ATH", name="Athens", country="Greece", city="Athens")
+        ]
+        actual = manager.fetch(ResourceLocation, locale, dict(ATH=None).keys())
+        self.assertEqual(
+            ResourceLocation(
+                code="ATH", name="Athens", country="Greece", city="Athens"
+            ),
+            actual,
+        )
+        backend.fetch.assert_called_with(ResourceLocation, ["ATH"])
+
+    def test_fetch_with_unknown_codes(self):
+        backend = Mock(ResourceBackend)
+        backend.fetch.return_value = [dict(code="A3", logo=None, name="A")]
+        manager = ResourceManager(backend=backend, unknown_ttl=60)
+
+        manager.fetch(ResourceCarrier, locale, ["A3", "XX"])
+        self.assertEqual(1, len(manager.cache))
+        self.assertIn((ResourceCarrier, locale, "XX"), manager.unknown)
+        self.assertEqual(60, manager.unknown.stripes[0][1].ttl)
+        codes = ["A3", "XX", "YY"]
+        actual = manager.filter_codes(ResourceCarrier, locale, codes)
+        self.assertEqual(["YY"], actual)
+
+        self.assertIsNone(manager.get(ResourceCarrier, locale, "XX"))
+        self.assertIsNone(manager.get(ResourceCarrier, locale, "XX"))
+        backend.fetch.assert_called_once_with(ResourceCarrier, ["A3", "XX"])
+
+    @patch("search.managers.logger.exception")
+    def test_get_with_unknown_code(self, *args):
+        backend = Mock(ResourceBackend)
+        backend.fetch.return_value = []
+        manager = ResourceManager(backend=backend)
+
+        self.assertIsNone(manager.get(ResourceCarrier, locale, "XX"))
+        self.assertIsNone(manager.get(ResourceCarrier, locale, "XX"))
+        self.assertEqual(1, backend.fetch.call_count)
+
+        backend.fetch.side_effect = TimeoutError()
+        self.assertIsNone(manager.get(ResourceLocation, locale, "XXX"))
+        self.assertNotIn((ResourceLocation, locale, "XXX"), manager.unknown)
+
+        expected = dict(
+            size=0, unknown_size=1, unknown={"ResourceCarrier": {"XX": 2}}
+        )
+        self.assertEqual(expected, manager.stats())
+
+    def test_enrich_with_unknown_codes(self):
+        backend = Mock(ResourceBackend)
+        backend.supports.side_effect = lambda x: x is ResourceCarrier
+        backend.fetch.return_value = [dict(code="A3", logo=None, name="A")]
+        manager = ResourceManager(backend=backend)
+
+        for _ in range(3):
+            resources = Resources(
+                carriers=dict.fromkeys(["A3", "XX"]),
+                cabinClasses=dict(),
+                equipments=dict(),
+                locations=dict(),
+            )
+            response = SearchResponse([SearchResponseData(resources)], locale)
+            manager.enrich(response)
+            self.assertEqual("A", resources.carriers["A3"].name)
+            self.assertIsNone(resources.carriers["XX"])
+
+        backend.fetch.assert_called_once_with(ResourceCarrier, ["A3", "XX"])
+        self.assertEqual(
+            {"ResourceCarrier": {"XX": 3}}, manager.stats()["unknown"]
+        )
+
+    @patch.object(ResourceIndex, "start")
+    def test_enrich_with_preload(self, *args):
+        backend = preloaded_backend()
+        manager = ResourceManager(backend=backend, preload=True)
+        resources = Resources(
+            carriers=dict.fromkeys(["A3", "LH"]),
+            cabinClasses=dict.fromkeys(["Y"]),
+            equipments=dict(),
+            locations=dict.fromkeys(["ATH"]),
+        )
+        manager.enrich(SearchResponse([SearchResponseData(resources)], locale))
+
+        self.assertEqual("Aegean", resources.carriers["A3"].name)
+        self.assertIsNone(resources.carriers["LH"])
+        self.assertEqual("Athens", resources.locations["ATH"].name)
+        self.assertFalse(backend.fetch.called)
+        self.assertEqual(2, backend.fetch_all.call_count)
+
+    @patch("search.managers.logger.exception")
+    @patch.object(ResourceIndex, "start")
+    def test_enrich_with_preload_failure(self, start, logger):
+        backend = preloaded_backend()
+        backend.fetch_all.side_effect = ConnectionError("db is down")
+        backend.fetch.return_value = [dict(code="A3", logo=None, name="A")]
+        manager = ResourceManager(backend=backend, preload=True)
+
+        for _ in range(2):
+            resources = Resources(
+                carriers=dict.fromkeys(["A3"]),
+                cabinClasses=dict(),
+                equipments=dict(),
+                locations=dict(),
+            )
+            manager.enrich(
+                SearchResponse([SearchResponseData(resources)], locale)
+            )
+            self.assertEqual("A", resources.carriers["A3"].name)
+
+        self.assertEqual(1, backend.fetch_all.call_count)
+        backend.fetch.assert_called_once_with(ResourceCarrier, ["A3"])
+        start.assert_called_once_with()
+        logger.assert_called_once_with("ConnectionError('db is down',)")
+
+    def test_preload_without_backend_support(self):
+        backend = Mock(ResourceBackend)
+        manager = ResourceManager(backend=backend, preload=True)
+        self.assertIsNone(manager.index)
+
+
+class ResourceIndexTestCase(TestCase):
+    def setUp(self):
+        self.backend = preloaded_backend()
+        self.index = ResourceIndex(self.backend, interval=0.01)
+
+    def test_get(self):
+        with patch.object(ResourceIndex, "start") as start:
+            expected = ResourceCarrier(code="A3", logo=None, name="Aegean")
+            self.assertEqual(expected, self.index.get(ResourceCarrier, "A3"))
+            self.assertIsNone(self.index.get(ResourceLocation, "SKG"))
+
+        start.assert_called_once_with()
+        self.assertEqual(1, self.index.loads)
+        self.backend.watch.assert_called_once_with(self.index.invalidate)
+
+    @patch("search.managers.logger.exception")
+    def test_run_retries_failed_loads(self, logger):
+        fetch_all = self.backend.fetch_all.side_effect
+        self.backend.fetch_all.side_effect = ConnectionError("db is down")
+        self.index.retry = 0.01
+        self.index.interval = 60
+
+        self.assertIsNone(self.index.get(ResourceCarrier, "A3"))
+        self.backend.fetch_all.side_effect = fetch_all
+        for _ in range(100):
+            if self.index.data is not None:
+                break
+            self.index.thread.join(0.01)
+
+        self.assertEqual("Aegean", self.index.get(ResourceCarrier, "A3").name)
+        self.assertTrue(logger.called)
+
+    @patch("search.managers.logger.exception")
+    def test_run(self, logger):
+        self.index.get_data()
+        self.assertEqual("resource-refresh", self.index.thread.name)
+
+        self.backend.fetch_all.side_effect = lambda clazz: {
+            ResourceCarrier: [dict(code="LH", logo=None, name="Lufthansa")],
+            ResourceLocation: [],
+        }[clazz]
+        self.index.invalidate()
+        for _ in range(100):
+            if self.index.get(ResourceCarrier, "LH"):
+                break
+            self.index.thread.join(0.01)
+
+        self.assertEqual(
+            "Lufthansa", self.index.get(ResourceCarrier, "LH").name
+        )
+        self.assertIsNone(self.index.get(ResourceCarrier, "A3"))
+        self.assertFalse(logger.called)
@@ -0,0 +1,17 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.apps import apps
+from django.test import override_settings
+
+
+class SearchConfigTestCase(TestCase):
+    @patch("search.services.resources.warm")
+    def test_ready(self, warm):
+        config = apps.get_app_config("search")
+        config.ready()
+        warm.assert_not_called()
+
+        with override_settings(SEARCH_RESOURCES_PRELOAD=True):
+            config.ready()
+        warm.assert_called_once_with()
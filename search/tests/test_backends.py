@@ -0,0 +1,97 @@
+from unittest.mock import Mock, patch
+
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase, override_settings
+from requests import Response
+
+from resources.models import Airline, Airport, Country
+from search.backends import (
+    HttpResourceBackend,
+    OrmResourceBackend,
+    PreloadableResourceBackend,
+    get_backend,
+)
+from search.models import ResourceCabinClass, ResourceCarrier, ResourceLocation
+
+
+class OrmResourceBackendTestCase(TestCase):
+    def setUp(self):
+        self.backend = OrmResourceBackend()
+        greece = Country.objects.create(
+            code="GR", iso_code="GRC", name="Greece", dialingCode="30"
+        )
+        Airline.objects.create(code="A3", name="Aegean", logo="a3.gif")
+        Airline.objects.create(code="LH", name="Lufthansa", logo="lh.gif")
+        Airport.objects.create(
+            code="ATH", name="Athens", city="Athens", country=greece
+        )
+        Airport.objects.create(code="SKG", name="Makedonia", city="Thess")
+
+    def test_supports(self):
+        self.assertTrue(self.backend.supports(ResourceCarrier))
+        self.assertTrue(self.backend.supports(ResourceLocation))
+        self.assertFalse(self.backend.supports(ResourceCabinClass))
+
+    def test_fetch_carriers(self):
+        actual = self.backend.fetch(ResourceCarrier, ["a3", "FR"])
+        expected = [dict(code="A3", logo="a3.gif", name="Aegean")]
+        self.assertEqual(expected, actual)
+
+    def test_fetch_all(self):
+        actual = self.backend.fetch_all(ResourceCarrier)
+        self.assertEqual(["A3", "LH"], sorted(x["code"] for x in actual))
+        self.assertEqual(2, len(self.backend.fetch_all(ResourceLocation)))
+
+    def test_watch(self):
+        callback = Mock()
+        self.backend.watch(callback)
+        try:
+            Airline.objects.filter(code="LH").first().save()
+            Airport.objects.filter(code="SKG").delete()
+            self.assertEqual(2, callback.call_count)
+        finally:
+            for model in OrmResourceBackend.MODELS:
+                post_save.disconnect(callback, sender=model)
+                post_delete.disconnect(callback, sender=model)
+
+    def test_fetch_locations(self):
+        actual = self.backend.fetch(ResourceLocation, ["ATH", "SKG"])
+        expected = [
+            dict(code="ATH", name="Athens", city="Athens", country="Greece"),
+            dict(code="SKG", name="Makedonia", city="Thess", country=None),
+        ]
+        self.assertEqual(expected, sorted(actual, key=lambda x: x["code"]))
+
+
+class HttpResourceBackendTestCase(TestCase):
+    @patch("requests.get", return_value=Response())
+    def test_fetch(self, get):
+        self.assertFalse(
+            issubclass(HttpResourceBackend, PreloadableResourceBackend)
+        )
+
+        response = get.return_value
+        response.status_code = 200
+        response.json = lambda: ["a3"]
+
+        backend = HttpResourceBackend("http://remote/resources")
+        actual = backend.fetch(ResourceCarrier, ["A3", "LH"])
+
+        self.assertEqual(["a3"], actual)
+        get.assert_called_once_with(
+            url="http://remote/resources/airlines/",
+            params=dict(code=["A3", "LH"]),
+        )
+
+    @override_settings(SEARCH_RESOURCES_ENDPOINT="http://remote/resources")
+    def test_default_endpoint(self):
+        backend = HttpResourceBackend()
+        self.assertEqual("http://remote/resources", backend.endpoint)
+
+
+class GetBackendTestCase(TestCase):
+    def test_get_backend(self):
+        self.assertIsInstance(get_backend("http"), HttpResourceBackend)
+
+        with override_settings(SEARCH_RESOURCES_BACKEND="orm"):
+            self.assertIsInstance(get_backend(), OrmResourceBackend)
@@ -0,0 +1,123 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from search.breakers import BreakerRegistry, BreakerState, CircuitBreaker
+
+
+class CircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            failure_rate=0.5,
+            latency=2,
+            window=4,
+            minimum=2,
+            cooldown=10,
+            probes=1,
+        )
+
+    def test_record_opens_on_errors(self):
+        self.breaker.record(1)
+        self.assertEqual(BreakerState.CLOSED, self.breaker.state)
+        self.assertEqual(1.0, self.breaker.health)
+
+        self.breaker.record(1, error=True)
+        self.assertEqual(BreakerState.OPEN, self.breaker.state)
+        self.assertEqual(0.0, self.breaker.health)
+        self.assertFalse(self.breaker.allow())
+
+    def test_record_opens_on_latency(self):
+        self.breaker.record(1)
+        self.breaker.record(1)
+        self.breaker.record(3)
+        self.assertEqual(BreakerState.CLOSED, self.breaker.state)
+        self.assertAlmostEqual(2 / 3, self.breaker.health)
+
+        self.breaker.record(2)
+        self.assertEqual(BreakerState.OPEN, self.breaker.state)
+
+    def test_record_waits_for_minimum_calls(self):
+        self.breaker.record(1, error=True)
+        self.assertEqual(BreakerState.CLOSED, self.breaker.state)
+        self.assertEqual(0.0, self.breaker.health)
+
+    @patch("time.time")
+    def test_allow_half_open_probes(self, time):
+        time.return_value = 100
+        self.breaker.open()
+        self.assertFalse(self.breaker.allow())
+
+        time.return_value = 110
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(BreakerState.HALF_OPEN, self.breaker.state)
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record(5)
+        self.assertEqual(BreakerState.OPEN, self.breaker.state)
+        self.assertFalse(self.breaker.allow())
+
+        time.return_value = 120
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(1)
+        self.assertEqual(BreakerState.CLOSED, self.breaker.state)
+        self.assertEqual(0, len(self.breaker.outcomes))
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    @patch("time.time")
+    def test_release(self, time):
+        time.return_value = 100
+        self.breaker.release()
+        self.assertEqual(0, len(self.breaker.probing))
+
+        self.breaker.open()
+        time.return_value = 110
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.release()
+        self.assertEqual(BreakerState.HALF_OPEN, self.breaker.state)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(1)
+        self.breaker.release()
+        self.assertEqual(BreakerState.CLOSED, self.breaker.state)
+
+    @patch("time.time")
+    def test_allow_reclaims_lost_probes(self, time):
+        time.return_value = 100
+        self.breaker.open()
+
+        time.return_value = 110
+        self.assertTrue(self.breaker.allow())
+        time.return_value = 119
+        self.assertFalse(self.breaker.allow())
+
+        time.return_value = 120
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(BreakerState.HALF_OPEN, self.breaker.state)
+        self.assertEqual([120], list(self.breaker.probing))
+
+    def test_stats(self):
+        self.breaker.record(1)
+        self.breaker.record(3)
+        expected = dict(state="open", health=0.0, latency=1)
+        self.assertEqual(expected, self.breaker.stats())
+
+
+class BreakerRegistryTestCase(TestCase):
+    def test_registry(self):
+        registry = BreakerRegistry(minimum=1, failure_rate=1)
+        self.assertIs(registry.get("kiwi"), registry.get("kiwi"))
+        self.assertEqual(1, registry.get("kiwi").minimum)
+
+        registry.record("kiwi", 1, error=True)
+        registry.record("petas", 1)
+        self.assertFalse(registry.allow("kiwi"))
+        self.assertTrue(registry.allow("petas"))
+
+        registry.release("figame")
+        self.assertNotIn("figame", registry.breakers)
+
+        stats = registry.stats()
+        self.assertEqual(["kiwi", "petas"], list(stats.keys()))
+        self.assertEqual("open", stats["kiwi"]["state"])
+        self.assertEqual(1.0, stats["petas"]["health"])
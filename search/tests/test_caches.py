@@ -0,0 +1,176 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from search.caches import CacheEntry, ResourceCache, ResponseCache
+from search.models import ResourceCarrier, SearchResponse
+from seeya.models import SeeyaMetadata, SeeyaSearchRequest
+from seeya.prepared import SeeyaRequestTemplate
+
+
+def response(error=None):
+    return SearchResponse(data=[], locale="en_US", error=error)
+
+
+class CacheEntryTestCase(TestCase):
+    def test_is_fresh_and_stale(self):
+        entry = CacheEntry(response=None, payload="", expires=10, stale=20)
+        self.assertTrue(entry.is_fresh(9))
+        self.assertFalse(entry.is_stale(9))
+        self.assertFalse(entry.is_fresh(10))
+        self.assertTrue(entry.is_stale(10))
+        self.assertFalse(entry.is_fresh(20))
+        self.assertFalse(entry.is_stale(20))
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(
+            maxsize=2, ttl=10, ttls=dict(kiwi=5, petas=0), stale_ttl=10
+        )
+
+    def put(self, key, response):
+        self.cache.put(key, self.cache.create(key, response))
+
+    def test_key(self):
+        request = SeeyaSearchRequest(
+            metadata=SeeyaMetadata(market="gr", locale="en_US"),
+            transactionId="1",
+        )
+        request.provider = "kiwi"
+
+        provider, digest = self.cache.key(request)
+        self.assertEqual("kiwi", provider)
+        self.assertRegex(digest, "^[a-f\\d]{32}$")
+
+        other = request.copy(transactionId="2")
+        self.assertEqual((provider, digest), self.cache.key(other))
+
+        other.provider = "petas"
+        self.assertEqual("petas", self.cache.key(other)[0])
+
+        prepared = SeeyaRequestTemplate(request).prepare("kiwi", "3")
+        self.assertEqual((provider, digest), self.cache.key(prepared))
+
+        other = request.copy(metadata=SeeyaMetadata("us", "en_US"))
+        self.assertNotEqual(digest, self.cache.key(other)[1])
+
+    def test_get_ttl(self):
+        self.assertEqual(5, self.cache.get_ttl("kiwi"))
+        self.assertEqual(0, self.cache.get_ttl("petas"))
+        self.assertEqual(10, self.cache.get_ttl("figame"))
+
+    @patch("time.time")
+    def test_put_and_get(self, time):
+        time.return_value = 100
+        first = response()
+        self.put(("kiwi", "a"), first)
+
+        entry = self.cache.get(("kiwi", "a"))
+        self.assertIs(first, entry.response)
+        self.assertEqual(first.to_json(indent=None), entry.payload)
+        self.assertEqual(105, entry.expires)
+        self.assertEqual(115, entry.stale)
+
+        time.return_value = 110
+        self.assertIs(entry, self.cache.get(("kiwi", "a")))
+
+        time.return_value = 115
+        self.assertIsNone(self.cache.get(("kiwi", "a")))
+        self.assertIsNone(self.cache.get(("kiwi", "b")))
+
+        expected = dict(
+            size=0, hits=1, stale_hits=1, misses=2, evictions=0, refreshing=0
+        )
+        self.assertEqual(expected, self.cache.stats())
+
+    def test_create_skips_errors_and_disabled_providers(self):
+        self.assertIsNone(self.cache.create(("kiwi", "a"), response("oops")))
+        self.assertIsNone(self.cache.create(("petas", "a"), response()))
+        self.cache.put(("kiwi", "a"), None)
+        self.assertEqual(0, len(self.cache.entries))
+
+    def test_put_skips_errors_and_disabled_providers(self):
+        self.put(("kiwi", "a"), response(error="oops"))
+        self.put(("petas", "a"), response())
+        self.assertEqual(0, len(self.cache.entries))
+
+    def test_put_evicts_least_recently_used(self):
+        self.put(("kiwi", "a"), response())
+        self.put(("kiwi", "b"), response())
+        self.cache.get(("kiwi", "a"))
+        self.put(("kiwi", "c"), response())
+
+        self.assertEqual(
+            [("kiwi", "a"), ("kiwi", "c")], list(self.cache.entries)
+        )
+        self.assertEqual(1, self.cache.evictions)
+        self.assertEqual(2, len(self.cache.payloads))
+
+    def test_payload(self):
+        first = response()
+        self.put(("kiwi", "a"), first)
+
+        self.assertEqual(first.to_json(indent=None), self.cache.payload(first))
+        self.assertIsNone(self.cache.payload(response()))
+
+        self.put(("kiwi", "a"), response())
+        self.assertIsNone(self.cache.payload(first))
+
+    def test_refresh(self):
+        self.assertTrue(self.cache.start_refresh("a"))
+        self.assertFalse(self.cache.start_refresh("a"))
+        self.assertEqual(1, self.cache.stats()["refreshing"])
+
+        self.cache.finish_refresh("a")
+        self.assertTrue(self.cache.start_refresh("a"))
+
+
+class ResourceCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = ResourceCache(ttl=10, maxsize=64, stripes=4)
+
+    def key(self, code):
+        return ResourceCarrier, "en_US", code
+
+    def test_get_many_and_put_many(self):
+        self.cache.put_many({self.key("A3"): "a3", self.key("LH"): "lh"})
+        self.cache.put(self.key("XX"), None)
+
+        actual = self.cache.get_many(map(self.key, ["A3", "FR", "XX"]))
+        self.assertEqual({self.key("A3"): "a3", self.key("XX"): None}, actual)
+        self.assertIn(self.key("LH"), self.cache)
+        self.assertNotIn(self.key("FR"), self.cache)
+        self.assertEqual(3, len(self.cache))
+
+    def test_stripes(self):
+        self.assertEqual(4, len(self.cache.stripes))
+        self.assertEqual(16, self.cache.stripes[0][1].maxsize)
+        self.assertEqual(1, ResourceCache(maxsize=1).stripes[0][1].maxsize)
+
+    def test_ttl(self):
+        now = [0]
+        cache = ResourceCache(ttl=10, stripes=4, timer=lambda: now[0])
+        cache.put(self.key("A3"), "a3")
+        self.assertIn(self.key("A3"), cache)
+
+        now[0] = 11
+        self.assertEqual({}, cache.get_many([self.key("A3")]))
+
+    def test_concurrent_access(self):
+        codes = ["{:03}".format(i) for i in range(50)]
+
+        def run():
+            for code in codes:
+                self.cache.put(self.key(code), code)
+                self.cache.get_many(map(self.key, codes))
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        actual = self.cache.get_many(map(self.key, codes))
+        self.assertEqual(len(actual), len(self.cache))
+        self.assertTrue(all(k[2] == v for k, v in actual.items()))
@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from django.test import override_settings
+
+from search.calendars import CalendarSearch
+from search.models import (
+    CabinClassType,
+    CalendarCell,
+    PassengerRequest,
+    PassengerType,
+    RouteRequest,
+    SearchCalendar,
+    SearchRequest,
+    SearchResponse,
+    SearchResponseData,
+    SearchSummary,
+)
+from search.services import SearchService
+
+
+def create(*dates):
+    return SearchRequest(
+        routes=[
+            RouteRequest(departure="ATH", arrival="LON", datetime=date)
+            for date in dates
+        ],
+        passengers=[PassengerRequest(1, PassengerType.ADT)],
+        cabinClass=CabinClassType.ECONOMY,
+        carrier="",
+        flexibleDates=True,
+        locale="en_US",
+        currency="EUR",
+        market="gr",
+    )
+
+
+def response(provider, *totals):
+    data = []
+    for total in totals:
+        item = Mock(SearchResponseData)
+        item.get_total.return_value = total
+        data.append(item)
+    return SearchResponse(data=data, locale="", error=None, provider=provider)
+
+
+class CalendarSearchTestCase(TestCase):
+    def test_init(self):
+        with override_settings(SEARCH_FLEXIBLE_DAYS=2):
+            self.assertEqual(2, CalendarSearch("service").days)
+        self.assertEqual(0, CalendarSearch("service", 0).days)
+
+    def test_get_executor(self):
+        executor = CalendarSearch.get_executor()
+        self.assertIs(executor, CalendarSearch.get_executor())
+
+    def test_expand(self):
+        calendar = CalendarSearch("service", 1)
+        request = create("2099-01-10T00:00:00", "2099-01-11T00:00:00")
+
+        actual = [calendar.key(r) for r in calendar.expand(request)]
+        expected = [
+            ("2099-01-09", "2099-01-10"),
+            ("2099-01-09", "2099-01-11"),
+            ("2099-01-09", "2099-01-12"),
+            ("2099-01-10", "2099-01-10"),
+            ("2099-01-10", "2099-01-11"),
+            ("2099-01-10", "2099-01-12"),
+            ("2099-01-11", "2099-01-11"),
+            ("2099-01-11", "2099-01-12"),
+        ]
+        self.assertEqual(expected, actual)
+        self.assertFalse(
+            any(r.flexibleDates for r in calendar.expand(request))
+        )
+        self.assertEqual("2099-01-10T00:00:00", request.routes[0].datetime)
+
+    def test_expand_skips_past_dates(self):
+        calendar = CalendarSearch("service", 3)
+        request = create("2000-01-10T00:00:00")
+        self.assertEqual([], calendar.expand(request))
+
+    def test_expand_keeps_today(self):
+        calendar = CalendarSearch("service", 1)
+        today = date.today()
+        request = create(today.strftime("%Y-%m-%dT00:00:00"))
+
+        actual = [calendar.key(r) for r in calendar.expand(request)]
+        expected = [
+            (today.isoformat(),),
+            ((today + timedelta(days=1)).isoformat(),),
+        ]
+        self.assertEqual(expected, actual)
+
+    @patch.object(SearchService, "perform")
+    def test_execute(self, perform):
+        responses = {
+            "2099-01-09": [response("kiwi", 100, 90), SearchSummary()],
+            "2099-01-10": [
+                response("kiwi", 80),
+                response("petas", 70),
+                response("figame", 75),
+                SearchSummary(timeouts=["travelgenio"]),
+            ],
+            "2099-01-11": [
+                SearchSummary(timeouts=["kiwi"], skipped=["petas"])
+            ],
+        }
+        perform.side_effect = lambda r: responses[r.routes[0].datetime[:10]]
+
+        service = SearchService()
+        calendar = CalendarSearch(service, 1)
+        actual = list(calendar.execute(create("2099-01-10T00:00:00")))
+
+        self.assertEqual(3, perform.call_count)
+        self.assertEqual(
+            SearchCalendar(
+                cells=[
+                    CalendarCell(dates=["2099-01-09"]),
+                    CalendarCell(dates=["2099-01-10"]),
+                    CalendarCell(dates=["2099-01-11"]),
+                ]
+            ),
+            actual[0],
+        )
+        self.assertEqual(
+            SearchSummary(timeouts=["kiwi", "travelgenio"], skipped=["petas"]),
+            actual[-1],
+        )
+
+        cells = {}
+        for message in actual[1:-1]:
+            for cell in message.cells:
+                cells[cell.dates[0]] = cell
+        expected = {
+            "2099-01-09": CalendarCell(["2099-01-09"], 90, "kiwi"),
+            "2099-01-10": CalendarCell(["2099-01-10"], 70, "petas"),
+        }
+        self.assertEqual(expected, cells)
+
+    @patch("search.calendars.logger.exception")
+    @patch.object(SearchService, "perform", side_effect=ValueError("oops"))
+    def test_execute_with_errors(self, perform, logger):
+        calendar = CalendarSearch(SearchService(), 0)
+        actual = list(calendar.execute(create("2099-01-10T00:00:00")))
+
+        self.assertEqual(2, len(actual))
+        self.assertEqual(SearchSummary(), actual[-1])
+        logger.assert_called_once_with("ValueError('oops',)")
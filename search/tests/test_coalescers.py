@@ -0,0 +1,111 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from search.coalescers import Broadcast, SearchCoalescer
+
+
+class BroadcastTestCase(TestCase):
+    def test_subscribe(self):
+        broadcast = Broadcast(iter("abc"))
+        first = broadcast.subscribe()
+
+        self.assertEqual("a", next(first))
+        self.assertEqual("b", next(first))
+        self.assertEqual(["a", "b"], broadcast.messages)
+
+        second = broadcast.subscribe()
+        self.assertEqual(["a", "b", "c"], list(second))
+        self.assertEqual(["c"], list(first))
+        self.assertTrue(broadcast.done)
+        self.assertEqual(0, broadcast.subscribers)
+
+    def test_subscribe_after_the_puller_leaves(self):
+        broadcast = Broadcast(iter("abc"))
+        first = broadcast.subscribe()
+        second = broadcast.subscribe()
+
+        self.assertEqual("a", next(first))
+        self.assertEqual(1, broadcast.subscribers)
+        first.close()
+
+        self.assertEqual(["a", "b", "c"], list(second))
+
+    def test_subscribe_concurrently(self):
+        release = threading.Event()
+        pulled = []
+
+        def source():
+            for x in "abc":
+                release.wait()
+                pulled.append(x)
+                yield x
+
+        broadcast = Broadcast(source())
+        results = []
+
+        def consume():
+            results.append(list(broadcast.subscribe()))
+
+        threads = [threading.Thread(target=consume) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([list("abc")] * 5, results)
+        self.assertEqual(list("abc"), pulled)
+
+    @patch("search.coalescers.logger.exception")
+    def test_subscribe_with_source_error(self, logger):
+        def source():
+            yield "a"
+            raise ValueError("oops")
+
+        broadcast = Broadcast(source())
+        self.assertEqual(["a"], list(broadcast.subscribe()))
+        self.assertTrue(broadcast.done)
+        logger.assert_called_once_with("ValueError('oops',)")
+
+
+class SearchCoalescerTestCase(TestCase):
+    def setUp(self):
+        self.coalescer = SearchCoalescer()
+        self.calls = 0
+
+    def factory(self):
+        self.calls += 1
+        return iter("abc")
+
+    def test_perform(self):
+        first = self.coalescer.perform("key", self.factory)
+        second = self.coalescer.perform("key", self.factory)
+        other = self.coalescer.perform("other", self.factory)
+
+        self.assertEqual("a", next(first))
+        self.assertEqual(list("abc"), list(second))
+        self.assertEqual(list("bc"), list(first))
+        self.assertEqual(list("abc"), list(other))
+
+        self.assertEqual(2, self.calls)
+        self.assertEqual(2, self.coalescer.started)
+        self.assertEqual(1, self.coalescer.coalesced)
+        self.assertEqual(dict(), self.coalescer.flights)
+
+    def test_perform_after_completion(self):
+        self.assertEqual(
+            list("abc"), list(self.coalescer.perform("key", self.factory))
+        )
+        self.assertEqual(
+            list("abc"), list(self.coalescer.perform("key", self.factory))
+        )
+        self.assertEqual(2, self.calls)
+
+    def test_perform_when_all_subscribers_leave(self):
+        first = self.coalescer.perform("key", self.factory)
+        self.assertEqual("a", next(first))
+        self.assertIn("key", self.coalescer.flights)
+
+        first.close()
+        self.assertEqual(dict(), self.coalescer.flights)
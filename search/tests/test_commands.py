@@ -0,0 +1,16 @@
+from io import StringIO
+from unittest import TestCase
+
+from django.core.management import call_command
+
+
+class BenchmarkEnginesTestCase(TestCase):
+    def test_handle(self):
+        out = StringIO()
+        call_command("benchmark_engines", searches=2, latency=0.01, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].startswith("engine"))
+        self.assertTrue(lines[1].startswith("asyncio"))
+        self.assertTrue(lines[2].startswith("rx"))
@@ -0,0 +1,190 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.test import override_settings
+from rx.core import Observable
+from rx.testing import TestScheduler
+
+from search.engines import AsyncioEngine, RxEngine, get_engine
+from search.models import SearchResponse, SearchSummary
+from search.services import SearchService
+
+delays = {
+    "petas": 40,
+    "figame": 30,
+    "kiwi": 10,
+    "travel2be": 20,
+    "travelgenio": 15,
+}
+slow_delays = dict(delays, figame=200)
+
+
+def response(provider):
+    return SearchResponse(data=[], locale="", error=None, provider=provider)
+
+
+class RxEngineTestCase(TestCase):
+    @patch("search.services.scheduler", TestScheduler())
+    @patch.object(SearchService, "prepare")
+    def test_execute(self, prepare):
+        def prep(p, *args):
+            return Observable.return_value(response(p)).delay(delays.get(p))
+
+        prepare.side_effect = prep
+
+        service = SearchService(RxEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+        providers = [x.provider for x in actual]
+
+        self.assertNotEqual(service.providers, providers)
+        self.assertEqual(sorted(service.providers), sorted(providers))
+        self.assertEqual(SearchSummary(timeouts=[]), summary)
+
+    @patch("search.services.scheduler", TestScheduler())
+    @patch.object(SearchService, "prepare")
+    def test_execute_with_deadlines(self, prepare):
+        def prep(p, *args):
+            return Observable.return_value(response(p)).delay(
+                slow_delays.get(p)
+            )
+
+        prepare.side_effect = prep
+
+        deadlines = dict(petas=0.005)
+        service = SearchService(RxEngine(), 0.1, deadlines)
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+        providers = [x.provider for x in actual]
+
+        self.assertEqual(["kiwi", "travelgenio", "travel2be"], providers)
+        self.assertEqual(["petas", "figame"], summary.timeouts)
+
+    @patch.object(SearchService, "get_available_providers")
+    @patch.object(SearchService, "prepare")
+    def test_execute_with_skipped_providers(self, prepare, available):
+        prepare.side_effect = lambda p, *args: Observable.just(response(p))
+        available.return_value = ["kiwi", "petas"]
+
+        service = SearchService(RxEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+
+        self.assertEqual(["kiwi", "petas"], sorted(x.provider for x in actual))
+        self.assertEqual(
+            ["figame", "travel2be", "travelgenio"], summary.skipped
+        )
+        self.assertEqual([], summary.timeouts)
+
+    @patch("search.engines.logger.exception")
+    @patch.object(SearchService, "prepare")
+    def test_execute_with_errors(self, prepare, logger):
+        def prep(p, *args):
+            if p == "kiwi":
+                return Observable.throw_exception(ValueError("too bad"))
+            return Observable.just(response(p))
+
+        prepare.side_effect = prep
+
+        service = SearchService(RxEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+
+        self.assertEqual(4, len(actual))
+        self.assertEqual([], summary.timeouts)
+        logger.assert_called_once_with("ValueError('too bad',)")
+
+
+class AsyncioEngineTestCase(TestCase):
+    def test_get_loop(self):
+        loop = AsyncioEngine.get_loop()
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        self.assertIs(loop, AsyncioEngine.get_loop())
+        self.assertTrue(loop.is_running())
+
+    @patch.object(SearchService, "prepare_async")
+    def test_execute(self, prepare_async):
+        async def prep(p, *args):
+            await asyncio.sleep(delays.get(p) / 1000)
+            return p
+
+        prepare_async.side_effect = prep
+
+        service = SearchService(AsyncioEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+
+        expected = ["kiwi", "travelgenio", "travel2be", "figame", "petas"]
+        self.assertEqual(expected, actual[:-1])
+        self.assertEqual(SearchSummary(timeouts=[]), actual[-1])
+
+    @patch.object(SearchService, "prepare_async")
+    def test_execute_with_deadlines(self, prepare_async):
+        cancelled = []
+
+        async def prep(p, *args):
+            try:
+                await asyncio.sleep(slow_delays.get(p) / 1000)
+            except asyncio.CancelledError:
+                cancelled.append(p)
+                raise
+            return p
+
+        prepare_async.side_effect = prep
+
+        deadlines = dict(petas=0.005)
+        service = SearchService(AsyncioEngine(), 0.1, deadlines)
+        actual = [x for x in service.engine.execute(service, "foo")]
+
+        expected = ["kiwi", "travelgenio", "travel2be"]
+        self.assertEqual(expected, actual[:-1])
+        self.assertEqual(["petas", "figame"], actual[-1].timeouts)
+        self.assertEqual(["petas", "figame"], cancelled)
+
+    @patch.object(SearchService, "get_available_providers")
+    @patch.object(SearchService, "prepare_async")
+    def test_execute_with_skipped_providers(self, prepare_async, available):
+        prepare_async.side_effect = asyncio.coroutine(lambda p, *args: p)
+        available.return_value = ["kiwi", "petas"]
+
+        service = SearchService(AsyncioEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+
+        self.assertEqual(["kiwi", "petas"], sorted(actual))
+        self.assertEqual(
+            ["figame", "travel2be", "travelgenio"], summary.skipped
+        )
+        self.assertEqual([], summary.timeouts)
+        prepare_async.assert_any_call("kiwi", "foo")
+
+    @patch("search.engines.logger.exception")
+    @patch.object(SearchService, "prepare_async")
+    def test_execute_with_errors(self, prepare_async, logger):
+        async def prep(p, *args):
+            if p == "kiwi":
+                raise ValueError("too bad")
+            return p
+
+        prepare_async.side_effect = prep
+
+        service = SearchService(AsyncioEngine())
+        actual = [x for x in service.engine.execute(service, "foo")]
+        summary = actual.pop()
+
+        self.assertEqual(4, len(actual))
+        self.assertNotIn("kiwi", actual)
+        self.assertEqual([], summary.timeouts)
+        logger.assert_called_once_with("ValueError('too bad',)")
+
+
+class GetEngineTestCase(TestCase):
+    def test_get_engine(self):
+        self.assertIsInstance(get_engine("rx"), RxEngine)
+        self.assertIsInstance(get_engine("asyncio"), AsyncioEngine)
+
+        with override_settings(SEARCH_ENGINE="rx"):
+            self.assertIsInstance(get_engine(), RxEngine)
+
+        with self.assertRaises(KeyError):
+            get_engine("threads")
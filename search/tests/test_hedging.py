@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from search.hedging import Hedger
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def tail_heavy(hedger, provider="kiwi"):
+    for latency in [0.01] * 16 + [0.05] * 4:
+        hedger.record(provider, latency)
+
+
+class HedgerTestCase(TestCase):
+    def test_get_delay(self):
+        hedger = Hedger(minimum=20)
+        self.assertIsNone(hedger.get_delay("kiwi"))
+
+        for _ in range(19):
+            hedger.record("kiwi", 0.01)
+        self.assertIsNone(hedger.get_delay("kiwi"))
+
+        hedger.record("kiwi", 0.05)
+        self.assertIsNone(hedger.get_delay("kiwi"))
+
+        tail_heavy(hedger, "petas")
+        self.assertEqual(0.05, hedger.get_delay("petas"))
+
+        hedger.percentile = 50
+        self.assertEqual(0.01, hedger.get_delay("petas"))
+
+    def test_allow(self):
+        hedger = Hedger(budget=0.1)
+        self.assertFalse(hedger.allow())
+
+        for _ in range(20):
+            hedger.start("kiwi")
+
+        self.assertTrue(hedger.allow())
+        self.assertTrue(hedger.allow())
+        self.assertFalse(hedger.allow())
+        self.assertEqual(2, hedger.hedges)
+
+    def test_send_without_delay(self):
+        hedger = Hedger()
+        self.assertEqual("foo", hedger.send("kiwi", lambda: "foo"))
+        self.assertEqual(1, hedger.requests)
+        self.assertIsNone(hedger.executor)
+
+    def test_send(self):
+        calls = []
+
+        def func():
+            calls.append(None)
+            time.sleep(0.5 if len(calls) == 1 else 0)
+            return len(calls)
+
+        hedger = Hedger(percentile=50, budget=1)
+        tail_heavy(hedger)
+
+        self.assertEqual(2, hedger.send("kiwi", func))
+        self.assertEqual(1, hedger.hedges)
+        self.assertEqual(1, hedger.wins)
+
+    def test_send_over_budget(self):
+        calls = []
+
+        def func():
+            calls.append(None)
+            time.sleep(0.05)
+            return len(calls)
+
+        hedger = Hedger(percentile=50, budget=0)
+        tail_heavy(hedger)
+
+        self.assertEqual(1, hedger.send("kiwi", func))
+        self.assertEqual(0, hedger.hedges)
+
+    def test_send_with_more_calls_than_workers(self):
+        def func():
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        hedger = Hedger(percentile=50, budget=0, workers=2)
+        tail_heavy(hedger)
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(hedger.send("kiwi", func))
+            )
+            for _ in range(6)
+        ]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.time() - started, 0.4)
+        pooled = [x for x in results if x.startswith("hedge-primary")]
+        self.assertEqual(6, len(results))
+        self.assertEqual(2, len(pooled))
+        self.assertIsNone(hedger.executor)
+
+        self.assertEqual("x", hedger.send("kiwi", lambda: "x"))
+        self.assertEqual(2, len(hedger.primaries._threads))
+
+    def test_send_with_errors(self):
+        calls = []
+
+        def func():
+            calls.append(None)
+            number = len(calls)
+            if number == 2:
+                raise ValueError("too bad")
+            time.sleep(0.1)
+            return number
+
+        hedger = Hedger(percentile=50, budget=1)
+        tail_heavy(hedger)
+
+        self.assertEqual(1, hedger.send("kiwi", func))
+        self.assertEqual(0, hedger.wins)
+
+    def test_send_async(self):
+        cancelled = []
+
+        async def factory(latency):
+            try:
+                await asyncio.sleep(latency)
+            except asyncio.CancelledError:
+                cancelled.append(latency)
+                raise
+            return latency
+
+        latencies = iter([0.5, 0])
+        hedger = Hedger(percentile=50, budget=1)
+        self.assertEqual(0, run(hedger.send_async("kiwi", lambda: factory(0))))
+
+        tail_heavy(hedger)
+        actual = run(
+            hedger.send_async("kiwi", lambda: factory(next(latencies)))
+        )
+        self.assertEqual(0, actual)
+        self.assertEqual([0.5], cancelled)
+        self.assertEqual(1, hedger.hedges)
+        self.assertEqual(1, hedger.wins)
+
+    def test_send_async_with_errors(self):
+        async def factory(error):
+            await asyncio.sleep(0.1)
+            raise error
+
+        errors = iter([ValueError("first"), ValueError("second")])
+        hedger = Hedger(percentile=50, budget=1)
+        tail_heavy(hedger)
+
+        with self.assertRaises(ValueError):
+            run(hedger.send_async("kiwi", lambda: factory(next(errors))))
+
+    def test_stats(self):
+        hedger = Hedger()
+        tail_heavy(hedger)
+        hedger.start("kiwi")
+
+        expected = dict(requests=1, hedges=0, wins=0, delays=dict(kiwi=0.05))
+        self.assertEqual(expected, hedger.stats())
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from search.limiters import AdaptiveLimiter, LimitExceeded, LimiterRegistry
+
+
+class AdaptiveLimiterTestCase(TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveLimiter(
+            initial=2,
+            minimum=1,
+            maximum=3,
+            backoff=0.5,
+            tolerance=2,
+            queue=1,
+            timeout=0.01,
+        )
+
+    def test_acquire_and_release(self):
+        self.limiter.acquire()
+        self.limiter.acquire()
+        self.assertEqual(2, self.limiter.inflight)
+
+        with self.assertRaises(LimitExceeded):
+            self.limiter.acquire()
+
+        self.assertEqual(1, self.limiter.shed)
+        self.assertEqual(0, len(self.limiter.waiters))
+
+        self.limiter.release()
+        self.limiter.acquire()
+        self.assertEqual(2, self.limiter.inflight)
+
+    def test_acquire_sheds_when_queue_is_full(self):
+        self.limiter.timeout = 1
+        self.limiter.acquire()
+        self.limiter.acquire()
+
+        thread = threading.Thread(target=self.limiter.acquire)
+        thread.start()
+        while not self.limiter.waiters:
+            pass
+
+        with self.assertRaises(LimitExceeded):
+            self.limiter.acquire()
+
+        self.limiter.release()
+        thread.join()
+        self.assertEqual(2, self.limiter.inflight)
+        self.assertEqual(1, self.limiter.shed)
+
+    def test_acquire_async(self):
+        loop = asyncio.new_event_loop()
+        self.limiter.timeout = 1
+
+        async def run():
+            await self.limiter.acquire_async()
+            await self.limiter.acquire_async()
+            waiter = loop.create_task(self.limiter.acquire_async())
+            await asyncio.sleep(0)
+            self.assertEqual(1, len(self.limiter.waiters))
+
+            self.limiter.release()
+            await waiter
+
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+        self.assertEqual(2, self.limiter.inflight)
+        self.assertEqual(0, self.limiter.shed)
+
+    def test_acquire_async_timeout_and_cancel(self):
+        loop = asyncio.new_event_loop()
+
+        async def run():
+            await self.limiter.acquire_async()
+            await self.limiter.acquire_async()
+            with self.assertRaises(LimitExceeded):
+                await self.limiter.acquire_async()
+
+            waiter = loop.create_task(self.limiter.acquire_async())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+        self.assertEqual(2, self.limiter.inflight)
+        self.assertEqual(0, len(self.limiter.waiters))
+        self.assertEqual(2, self.limiter.shed)
+
+    def test_adapt(self):
+        self.limiter.acquire()
+        self.limiter.release(1.0)
+        self.assertEqual(2.5, self.limiter.limit)
+
+        self.limiter.acquire()
+        self.limiter.release(1.5)
+        self.assertEqual(2.9, self.limiter.limit)
+
+        self.limiter.acquire()
+        self.limiter.release(1.5)
+        self.assertEqual(3, self.limiter.limit)
+
+        self.limiter.acquire()
+        self.limiter.release(2.5)
+        self.assertEqual(1.5, self.limiter.limit)
+
+        self.limiter.acquire()
+        self.limiter.release(1.0, error=True)
+        self.assertEqual(1, self.limiter.limit)
+
+    def test_release_wakes_waiters_when_the_limit_grows(self):
+        woken = []
+        self.limiter.acquire()
+        self.limiter.acquire()
+        self.limiter.queue = 2
+        self.limiter.try_acquire(lambda: woken.append(1))
+        self.limiter.try_acquire(lambda: woken.append(2))
+
+        self.limiter.limit = 3
+        self.limiter.release()
+        self.assertEqual([1, 2], woken)
+        self.assertEqual(3, self.limiter.inflight)
+
+    def test_stats(self):
+        self.limiter.acquire()
+        expected = dict(limit=2, inflight=1, queued=0, shed=0)
+        self.assertEqual(expected, self.limiter.stats())
+
+
+class LimiterRegistryTestCase(TestCase):
+    def test_registry(self):
+        registry = LimiterRegistry(initial=5)
+        self.assertIs(registry.get("kiwi"), registry.get("kiwi"))
+        self.assertEqual(5, registry.get("kiwi").limit)
+
+        registry.get("petas").acquire()
+        stats = registry.stats()
+        self.assertEqual(["kiwi", "petas"], list(stats.keys()))
+        self.assertEqual(1, stats["petas"]["inflight"])
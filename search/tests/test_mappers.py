@@ -5,6 +5,7 @@ from attr import attrs, attrib
 from mule.models import Serializable
 from mule.testcases import TestCase
 from search.mappers import SeeyaSearchRequestMapper, SearchResponseMapper
+from seeya.decoders import SeeyaSearchResponseReader
 from search.models import (
     SearchRequest,
     RouteRequest,
@@ -120,6 +121,7 @@ class SearchResponseMapperTestCase(TestCase):
         self.maxDiff = None
         metadata = SeeyaMetadata(locale="en_US", market="US")
         request = SeeyaSearchRequest(metadata=metadata)
+        request.provider = "kiwi"
         self.mapper = SearchResponseMapper(request)
 
     @patch.object(SearchResponseMapper, "map_recommendations")
@@ -140,7 +142,12 @@ class SearchResponseMapperTestCase(TestCase):
             )
         )
 
-        expected = {"data": "foo", "error": None, "locale": "en_US"}
+        expected = {
+            "data": "foo",
+            "error": None,
+            "locale": "en_US",
+            "provider": "kiwi",
+        }
         self.assertEqual(expected, actual.to_dict())
 
         map_segments.assert_called_once_with("foo")
@@ -155,9 +162,36 @@ class SearchResponseMapperTestCase(TestCase):
             )
         )
 
-        expected = {"data": [], "error": "damn", "locale": "en_US"}
+        expected = {
+            "data": [],
+            "error": "damn",
+            "locale": "en_US",
+            "provider": "kiwi",
+        }
         self.assertEqual(expected, actual.to_dict())
 
+    def test_map_reader(self):
+        text = self.resource("seeya", "tests/fixtures/seeya_rs.json")
+        expected = self.mapper.map(SeeyaSearchResponse.from_json(text))
+        actual = SearchResponseMapper(self.mapper.request).map(
+            SeeyaSearchResponseReader.from_json(text.decode("utf-8"))
+        )
+
+        self.assertTrue(actual.data)
+        self.assertEqual(expected, actual)
+
+    def test_map_reader_with_error(self):
+        reader = SeeyaSearchResponseReader(
+            '{"transactionId": "foo", "result": null, "error": "damn"}'
+        )
+        expected = {
+            "data": [],
+            "error": "damn",
+            "locale": "en_US",
+            "provider": "kiwi",
+        }
+        self.assertEqual(expected, self.mapper.map(reader).to_dict())
+
     @patch.object(SearchResponseMapper, "map_recommendation")
     def test_map_recommendations(self, map_recommendation):
         map_recommendation.side_effect = ["a", "b", "c"]
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from search.metrics import Window
+
+
+class WindowTestCase(TestCase):
+    def test_add(self):
+        window = Window(3)
+        for x in range(5):
+            window.add(x)
+
+        self.assertEqual(3, len(window))
+        self.assertEqual([2, 3, 4], list(window.values))
+
+        window.clear()
+        self.assertEqual(0, len(window))
+
+    def test_mean(self):
+        window = Window()
+        self.assertIsNone(window.mean())
+
+        window.add(1)
+        window.add(2)
+        self.assertEqual(1.5, window.mean())
+
+    def test_percentile(self):
+        window = Window()
+        self.assertIsNone(window.percentile(50))
+
+        for x in range(100, 0, -1):
+            window.add(x)
+
+        self.assertEqual(1, window.percentile(0))
+        self.assertEqual(51, window.percentile(50))
+        self.assertEqual(90, window.percentile(90))
+        self.assertEqual(100, window.percentile(100))
@@ -6,7 +6,20 @@ from attr import attrs
 
 from mule.converters import obj
 from mule.models import Serializable
-from search.models import Segment, SearchResponseData, Leg, Price, Passenger
+from search.models import (
+    Point,
+    Route,
+    Segment,
+    SearchResponseData,
+    Leg,
+    Price,
+    Passenger,
+    SearchRequest,
+    RouteRequest,
+    PassengerRequest,
+    PassengerType,
+    CabinClassType,
+)
 
 
 class SegmentTestCase(TestCase):
@@ -80,6 +93,62 @@ class SearchResponseDataTestCase(TestCase):
         )
         self.assertEqual(6.6, data.get_total())
 
+    @patch.object(SearchResponseData, "generate_group_id")
+    @patch.object(SearchResponseData, "generate_resources")
+    def test_get_duration_and_stops(self, *args):
+        def seg(duration, departure, arrival, *stops):
+            route = Route(
+                departure=Point(location="", datetime=departure),
+                arrival=Point(location="", datetime=arrival),
+                technicalStop=[obj(dict(duration=x)) for x in stops],
+            )
+            return Segment(transport=None, route=route, duration=duration)
+
+        data = SearchResponseData(
+            id=None,
+            provider=None,
+            passengers=None,
+            legs=[
+                Leg(
+                    segments=[
+                        seg(
+                            60,
+                            "2018-09-08 10:00:00",
+                            "2018-09-08 11:20:00",
+                            20,
+                        ),
+                        seg(90, "2018-09-08 21:20:00", "2018-09-08 23:50:00"),
+                    ]
+                ),
+                Leg(
+                    segments=[
+                        seg(120, "2018-09-10T10:00:00", "2018-09-10T12:00:00")
+                    ]
+                ),
+            ],
+        )
+        self.assertEqual(290 + 600, data.get_duration())
+        self.assertEqual(2, data.get_stops())
+
+        nonstop = SearchResponseData(
+            id=None,
+            provider=None,
+            passengers=None,
+            legs=[
+                Leg(
+                    segments=[
+                        seg(300, "2018-09-08 10:00:00", "2018-09-08 15:00:00")
+                    ]
+                ),
+                Leg(
+                    segments=[
+                        seg(120, "2018-09-10T10:00:00", "2018-09-10T12:00:00")
+                    ]
+                ),
+            ],
+        )
+        self.assertLess(nonstop.get_duration(), data.get_duration())
+
     @patch.object(SearchResponseData, "generate_resources")
     def test_generate_group_id(self, *args):
         @attrs(auto_attribs=True)
@@ -148,3 +217,31 @@ class PassengerTestCase(TestCase):
         )
 
         self.assertEqual(6, passenger.get_total())
+
+
+class SearchRequestTestCase(TestCase):
+    def test_generate_id(self):
+        def create(**kwargs):
+            data = dict(
+                routes=[
+                    RouteRequest(
+                        departure="ATH",
+                        arrival="LON",
+                        datetime="2018-12-31T00:00:00",
+                    )
+                ],
+                passengers=[PassengerRequest(1, PassengerType.ADT)],
+                cabinClass=CabinClassType.ECONOMY,
+                carrier="",
+                flexibleDates=False,
+                locale="en_US",
+                currency="EUR",
+                market="gr",
+            )
+            data.update(kwargs)
+            return SearchRequest(**data)
+
+        actual = create().generate_id()
+        self.assertRegex(actual, "^[a-fA-F\d]{32}$")
+        self.assertEqual(actual, create().generate_id())
+        self.assertNotEqual(actual, create(currency="USD").generate_id())
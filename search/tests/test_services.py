@@ -1,13 +1,20 @@
+import asyncio
+import threading
 from unittest import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
-from rx.core import Observable
+from django.test import override_settings
 from rx.testing import TestScheduler, ReactiveTest
 
+from search.breakers import BreakerRegistry, BreakerState
+from search.engines import Engine
+from search.limiters import LimitExceeded
 from search.mappers import SearchResponseMapper, SeeyaSearchRequestMapper
-from search.models import SearchRequest
+from search.models import SearchRequest, SearchResponse
 from search.services import SearchService
-from seeya.models import SeeyaSearchRequest
+from search.stages import Stage
+from seeya.models import JobPriority, SeeyaSearchRequest
+from seeya.prepared import SeeyaRequestTemplate
 from seeya.services import SeeyaClient
 
 on_next = ReactiveTest.on_next
@@ -15,34 +22,92 @@ on_completed = ReactiveTest.on_completed
 scheduler = TestScheduler()
 
 
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
 class SearchServiceTestCase(TestCase):
     def test_providers(self):
         expected = ["petas", "figame", "kiwi", "travel2be", "travelgenio"]
         self.assertEqual(expected, SearchService().providers)
 
-    @patch("search.services.scheduler", scheduler)
-    @patch.object(SeeyaSearchRequestMapper, "map", return_value="foo")
-    @patch.object(SearchService, "prepare")
-    def test_perform(self, prepare, map):
-        delays = {
-            "petas": 40,
-            "figame": 30,
-            "kiwi": 10,
-            "travel2be": 20,
-            "travelgenio": 15,
-        }
+    @override_settings(
+        SEARCH_DEADLINE=10, SEARCH_PROVIDER_DEADLINES=dict(kiwi=5, petas=15)
+    )
+    def test_get_deadline(self):
+        service = SearchService()
+        self.assertEqual(10, service.get_deadline("figame"))
+        self.assertEqual(5, service.get_deadline("kiwi"))
+        self.assertEqual(10, service.get_deadline("petas"))
 
-        def prep(p, *args):
-            return Observable.return_value(p).delay(delays.get(p))
+        service = SearchService(deadline=2, deadlines=dict())
+        self.assertEqual(2, service.get_deadline("kiwi"))
 
-        prepare.side_effect = prep
-        request = Mock(SearchRequest)
+    @patch("search.services.flights.perform")
+    @patch.object(SearchService, "execute", return_value="messages")
+    def test_perform(self, execute, perform):
+        perform.side_effect = lambda key, factory: factory()
+        request = Mock(SearchRequest, flexibleDates=False)
+        request.generate_id.return_value = "$id"
 
         service = SearchService()
-        actual = [x for x in service.perform(request)]
+        self.assertEqual("messages", service.perform(request))
+        perform.assert_called_once_with("$id", ANY)
+        execute.assert_called_once_with(request)
 
-        self.assertNotEqual(service.providers, actual)
-        self.assertEqual(sorted(service.providers), sorted(actual))
+        with override_settings(SEARCH_COALESCING=False):
+            self.assertEqual("messages", service.perform(request))
+            self.assertEqual(1, perform.call_count)
+            self.assertEqual(2, execute.call_count)
+
+    @patch("search.services.CalendarSearch")
+    def test_perform_with_flexible_dates(self, calendar):
+        calendar.return_value.execute.return_value = "calendar"
+        request = Mock(SearchRequest, flexibleDates=True)
+
+        service = SearchService()
+        self.assertEqual("calendar", service.perform(request))
+        background = calendar.call_args[0][0]
+        self.assertIsNot(service, background)
+        self.assertIs(service.engine, background.engine)
+        self.assertEqual(JobPriority.LOW, background.priority)
+        calendar.return_value.execute.assert_called_once_with(request)
+
+    @patch.object(SearchService, "execute", return_value=[1, 2])
+    def test_perform_with_stages(self, execute):
+        first = Mock(Stage)
+        first.process.side_effect = lambda messages: [x * 2 for x in messages]
+        second = Mock(Stage)
+        second.process.side_effect = lambda messages: [x + 1 for x in messages]
+
+        service = SearchService()
+        with override_settings(SEARCH_COALESCING=False):
+            actual = service.perform(
+                Mock(SearchRequest, flexibleDates=False), [first, second]
+            )
+
+        self.assertEqual([3, 5], actual)
+
+    @patch("search.services.breakers")
+    def test_get_available_providers(self, breakers):
+        breakers.allow.side_effect = lambda x: x != "kiwi"
+        expected = ["petas", "figame", "travel2be", "travelgenio"]
+        self.assertEqual(expected, SearchService().get_available_providers())
+
+    @patch.object(SeeyaSearchRequestMapper, "map")
+    def test_execute(self, map):
+        map.return_value = SeeyaSearchRequest()
+        engine = Mock(Engine)
+        engine.execute.return_value = iter(["a", "b"])
+        request = Mock(SearchRequest)
+
+        service = SearchService(engine)
+        self.assertEqual(["a", "b"], list(service.execute(request)))
+        engine.execute.assert_called_once_with(service, ANY)
+        template = engine.execute.call_args[0][1]
+        self.assertIsInstance(template, SeeyaRequestTemplate)
+        self.assertIs(map.return_value, template.request)
+        map.assert_called_once_with(request)
 
     @patch("uuid.uuid4", Mock(return_value="12-34-56"))
     @patch("search.services.scheduler", scheduler)
@@ -55,14 +120,309 @@ class SearchServiceTestCase(TestCase):
 
         request.transactionId = "12-34-56"
         request.provider = "out"
-        send.assert_called_once_with(request)
+        send.assert_called_once_with(request, JobPriority.HIGH)
+
+    @patch("uuid.uuid4", Mock(return_value="12-34-56"))
+    @patch.object(SearchService, "send_async")
+    def test_prepare_async(self, send_async):
+        send_async.side_effect = asyncio.coroutine(lambda *args: "response")
+        request = SeeyaSearchRequest()
+        actual = run(SearchService().prepare_async("out", request))
+        self.assertEqual("response", actual)
+
+        request.transactionId = "12-34-56"
+        request.provider = "out"
+        send_async.assert_called_once_with(request, JobPriority.HIGH)
+
+    @patch("search.services.responses")
+    @patch.object(SearchService, "fetch", return_value="fetched")
+    def test_send(self, fetch, responses):
+        request = Mock(SeeyaSearchRequest)
+        responses.key.return_value = "key"
+        responses.get.return_value = None
+
+        self.assertEqual("fetched", SearchService.send(request))
+        fetch.assert_called_once_with("key", request, JobPriority.HIGH)
+        responses.get.assert_called_once_with("key")
+
+    @patch("search.services.scheduler", scheduler)
+    @patch("search.services.responses")
+    @patch.object(SearchService, "refresh")
+    @patch.object(SearchService, "fetch")
+    def test_send_from_cache(self, fetch, refresh, responses):
+        request = Mock(SeeyaSearchRequest)
+        entry = responses.get.return_value
+        entry.is_stale.return_value = False
+
+        self.assertEqual(entry.response, SearchService.send(request))
+        responses.start_refresh.assert_not_called()
+
+        entry.is_stale.return_value = True
+        responses.start_refresh.return_value = True
+        self.assertEqual(entry.response, SearchService.send(request))
+        scheduler.start()
+
+        refresh.assert_called_once_with(responses.key.return_value, request)
+        fetch.assert_not_called()
+
+    @patch("search.breakers.time.time")
+    @patch("search.services.breakers", new_callable=BreakerRegistry)
+    @patch("search.services.responses")
+    def test_send_releases_probe(self, responses, breakers, time):
+        breakers.options.update(minimum=1, cooldown=10)
+        service = SearchService()
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+        entry = responses.get.return_value
+        entry.is_stale.return_value = False
+
+        time.return_value = 100
+        breakers.record("kiwi", 1, error=True)
+        time.return_value = 110
+        self.assertIn("kiwi", service.get_available_providers())
+        self.assertNotIn("kiwi", service.get_available_providers())
+
+        self.assertEqual(entry.response, run(service.send_async(request)))
+        self.assertIn("kiwi", service.get_available_providers())
+
+        responses.get.return_value = None
+        with patch.object(SearchService, "call", side_effect=LimitExceeded):
+            with self.assertRaises(LimitExceeded):
+                service.send(request)
+        self.assertIn("kiwi", service.get_available_providers())
+
+        responses.get.return_value = entry
+        service.send(request)
+        self.assertIn("kiwi", service.get_available_providers())
+        self.assertEqual(BreakerState.HALF_OPEN, breakers.get("kiwi").state)
+
+    @patch("search.services.responses")
+    @patch.object(SearchService, "fetch_async")
+    def test_send_async(self, fetch_async, responses):
+        fetch_async.side_effect = asyncio.coroutine(lambda *x: "fetched")
+        request = Mock(SeeyaSearchRequest)
+        responses.key.return_value = "key"
+        responses.get.return_value = None
+
+        self.assertEqual("fetched", run(SearchService.send_async(request)))
+        fetch_async.assert_called_once_with("key", request, JobPriority.HIGH)
 
+    @patch("search.services.responses")
+    @patch.object(SearchService, "refresh_async")
+    def test_send_async_from_cache(self, refresh_async, responses):
+        refresh_async.side_effect = asyncio.coroutine(lambda *x: None)
+        request = Mock(SeeyaSearchRequest)
+        entry = responses.get.return_value
+        entry.is_stale.return_value = True
+        responses.start_refresh.return_value = False
+
+        actual = run(SearchService.send_async(request))
+        self.assertEqual(entry.response, actual)
+        refresh_async.assert_not_called()
+
+        responses.start_refresh.return_value = True
+        actual = run(SearchService.send_async(request))
+        self.assertEqual(entry.response, actual)
+        refresh_async.assert_called_once_with(
+            responses.key.return_value, request
+        )
+
+    @patch("search.services.responses")
     @patch("search.services.resources.enrich")
     @patch.object(SearchResponseMapper, "map", return_value="mapped_data")
-    @patch.object(SeeyaClient, "send", return_value="communication")
-    def test_send(self, client_send, mapper, enrich):
+    @patch.object(SearchService, "call", return_value="communication")
+    def test_fetch(self, call, mapper, enrich, responses):
         request = Mock(SeeyaSearchRequest)
         enrich.side_effect = lambda x: x
 
-        self.assertEqual(mapper.return_value, SearchService.send(request))
-        mapper.assert_called_once_with(client_send.return_value)
+        actual = SearchService.fetch("key", request)
+        self.assertEqual(mapper.return_value, actual)
+        mapper.assert_called_once_with(call.return_value)
+        responses.create.assert_called_once_with("key", "mapped_data")
+        responses.put.assert_called_once_with(
+            "key", responses.create.return_value
+        )
+
+    @patch("search.services.responses")
+    @patch("search.services.resources.enrich")
+    @patch.object(SearchResponseMapper, "map", return_value="mapped_data")
+    @patch.object(SearchService, "call_async")
+    def test_fetch_async(self, call_async, mapper, enrich, responses):
+        call_async.side_effect = asyncio.coroutine(lambda *x: "communication")
+        request = Mock(SeeyaSearchRequest)
+
+        actual = run(SearchService.fetch_async("key", request))
+        self.assertEqual(mapper.return_value, actual)
+        mapper.assert_called_once_with("communication")
+        enrich.assert_called_once_with("mapped_data")
+        responses.put.assert_called_once_with(
+            "key", responses.create.return_value
+        )
+
+    @patch("search.services.responses")
+    @patch.object(SearchService, "process", return_value="mapped_data")
+    @patch.object(SearchService, "call_async")
+    def test_fetch_async_builds_entry_off_loop(
+        self, call_async, process, responses
+    ):
+        call_async.side_effect = asyncio.coroutine(lambda *x: "communication")
+        threads = []
+
+        def create(*args):
+            threads.append(threading.get_ident())
+            return "entry"
+
+        responses.create.side_effect = create
+        run(SearchService.fetch_async("key", Mock(SeeyaSearchRequest)))
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(threading.get_ident(), threads[0])
+        responses.put.assert_called_once_with("key", "entry")
+
+    @patch("search.services.limiters")
+    @patch.object(SearchService, "record")
+    @patch.object(SeeyaClient, "send", return_value="communication")
+    def test_call(self, client_send, record, limiters):
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+
+        self.assertEqual("communication", SearchService.call(request))
+        limiters.get.assert_called_once_with("kiwi")
+        limiters.get.return_value.acquire.assert_called_once_with()
+        record.assert_called_once_with("kiwi", ANY, False)
+
+    @patch("search.services.limiters")
+    @patch.object(SearchService, "record")
+    @patch.object(SeeyaClient, "send", side_effect=TimeoutError)
+    def test_call_with_errors(self, client_send, record, limiters):
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+        with self.assertRaises(TimeoutError):
+            SearchService.call(request)
+
+        record.assert_called_once_with("kiwi", ANY, True)
+
+    @patch("search.services.limiters")
+    @patch.object(SearchService, "record")
+    @patch.object(SeeyaClient, "send")
+    def test_call_when_shed(self, client_send, record, limiters):
+        limiter = limiters.get.return_value
+        limiter.acquire.side_effect = LimitExceeded
+        with self.assertRaises(LimitExceeded):
+            SearchService.call(Mock(SeeyaSearchRequest, provider="kiwi"))
+
+        client_send.assert_not_called()
+        record.assert_not_called()
+
+    @patch("search.services.limiters")
+    @patch.object(SearchService, "record")
+    @patch.object(SeeyaClient, "send_async")
+    def test_call_async(self, client_send, record, limiters):
+        limiter = limiters.get.return_value
+        limiter.acquire_async.side_effect = asyncio.coroutine(lambda: None)
+        client_send.side_effect = asyncio.coroutine(lambda *x: "communication")
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+
+        self.assertEqual(
+            "communication", run(SearchService.call_async(request))
+        )
+        limiter.acquire_async.assert_called_once_with()
+        record.assert_called_once_with("kiwi", ANY, False)
+
+    @patch("search.services.limiters")
+    @patch.object(SearchService, "record")
+    @patch.object(SeeyaClient, "send_async")
+    def test_call_async_when_cancelled(self, client_send, record, limiters):
+        async def send(*args):
+            raise asyncio.CancelledError()
+
+        limiter = limiters.get.return_value
+        limiter.acquire_async.side_effect = asyncio.coroutine(lambda: None)
+        client_send.side_effect = send
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+        with self.assertRaises(asyncio.CancelledError):
+            run(SearchService.call_async(request))
+
+        record.assert_called_once_with("kiwi", ANY, True)
+
+    @patch("search.services.limiters")
+    @patch("search.services.hedges")
+    @patch.object(SeeyaClient, "send", return_value="communication")
+    def test_call_with_hedging(self, client_send, hedges, limiters):
+        hedges.send.side_effect = lambda provider, func: func()
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+
+        with override_settings(SEARCH_HEDGING=True):
+            self.assertEqual("communication", SearchService.call(request))
+
+        hedges.send.assert_called_once_with("kiwi", ANY)
+        client_send.assert_called_once_with(request, ANY, JobPriority.HIGH)
+
+    @patch("search.services.limiters")
+    @patch("search.services.hedges")
+    @patch.object(SeeyaClient, "send_async")
+    def test_call_async_with_hedging(self, client_send, hedges, limiters):
+        async def send(provider, factory):
+            return await factory()
+
+        limiter = limiters.get.return_value
+        limiter.acquire_async.side_effect = asyncio.coroutine(lambda: None)
+        client_send.side_effect = asyncio.coroutine(lambda *x: "communication")
+        hedges.send_async.side_effect = send
+        request = Mock(SeeyaSearchRequest, provider="kiwi")
+
+        with override_settings(SEARCH_HEDGING=True):
+            actual = run(SearchService.call_async(request))
+
+        self.assertEqual("communication", actual)
+        hedges.send_async.assert_called_once_with("kiwi", ANY)
+
+    @patch("search.services.hedges")
+    @patch("search.services.breakers")
+    @patch("search.services.limiters")
+    def test_record(self, limiters, breakers, hedges):
+        SearchService.record("kiwi", 1.5, True)
+        limiters.get.assert_called_once_with("kiwi")
+        limiters.get.return_value.release.assert_called_once_with(1.5, True)
+        breakers.record.assert_called_once_with("kiwi", 1.5, True)
+        hedges.record.assert_not_called()
+
+        SearchService.record("kiwi", 0.5, False)
+        hedges.record.assert_called_once_with("kiwi", 0.5)
+
+    @patch("search.services.logger.exception")
+    @patch("search.services.responses")
+    @patch.object(SearchService, "fetch", side_effect=ValueError("oops"))
+    def test_refresh(self, fetch, responses, logger):
+        SearchService.refresh("key", "request")
+        fetch.assert_called_once_with("key", "request", JobPriority.LOW)
+        responses.finish_refresh.assert_called_once_with("key")
+        logger.assert_called_once_with("ValueError('oops',)")
+
+    @patch("search.services.responses")
+    @patch.object(SearchService, "fetch_async")
+    def test_refresh_async(self, fetch_async, responses):
+        fetch_async.side_effect = asyncio.coroutine(lambda *x: None)
+        run(SearchService.refresh_async("key", "request"))
+        fetch_async.assert_called_once_with("key", "request", JobPriority.LOW)
+        responses.finish_refresh.assert_called_once_with("key")
+
+    @patch("search.services.responses")
+    def test_encode(self, responses):
+        message = Mock(SearchResponse)
+        message.to_json.return_value = "json"
+        responses.payload.return_value = None
+        self.assertEqual("json", SearchService.encode(message))
+        message.to_json.assert_called_once_with(indent=None)
+
+        responses.payload.return_value = "cached"
+        self.assertEqual("cached", SearchService.encode(message))
+
+    def test_stats(self):
+        actual = SearchService.stats()
+        expected = {
+            "cache",
+            "flights",
+            "gearman",
+            "hedges",
+            "health",
+            "limits",
+            "resources",
+        }
+        self.assertEqual(expected, set(actual.keys()))
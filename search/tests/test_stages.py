@@ -0,0 +1,182 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from search.models import (
+    Provider,
+    SearchOffer,
+    SearchRanking,
+    SearchResponse,
+    SearchResponseData,
+    SearchSummary,
+    SearchUpdate,
+)
+from search.stages import MergeStage, RankStage, get_stages
+
+
+def data(id, group, total, provider="kiwi", duration=0, stops=0):
+    result = Mock(SearchResponseData, id=id, groupId=group)
+    result.provider = Provider(name=provider, uri="")
+    result.get_total.return_value = total
+    result.get_duration.return_value = duration
+    result.get_stops.return_value = stops
+    return result
+
+
+def response(provider, *data):
+    return SearchResponse(
+        data=list(data), locale="en", error=None, provider=provider
+    )
+
+
+class MergeStageTestCase(TestCase):
+    def test_init(self):
+        self.assertEqual("cheapest", MergeStage().mode)
+        self.assertEqual("collapse", MergeStage("collapse").mode)
+        with self.assertRaises(ValueError):
+            MergeStage("median")
+
+    def test_process(self):
+        a = data("a", "1", 100)
+        b = data("b", "2", 50)
+        c = data("c", "1", 80, "petas")
+        d = data("d", "2", 60, "petas")
+        e = data("e", "3", 40, "petas")
+        first = response("kiwi", a, b)
+        second = response("petas", c, d, e)
+        summary = SearchSummary()
+
+        actual = list(MergeStage().process([first, second, summary]))
+
+        self.assertEqual(4, len(actual))
+        self.assertIs(first, actual[0])
+        self.assertEqual(response("petas", e), actual[1])
+        self.assertEqual(SearchUpdate(data=[c], provider="petas"), actual[2])
+        self.assertIs(summary, actual[3])
+        self.assertEqual([a, b], first.data)
+        self.assertEqual([c, d, e], second.data)
+
+    def test_process_with_duplicates_in_response(self):
+        a = data("a", "1", 100)
+        b = data("b", "1", 90)
+        c = data("c", "1", 95)
+
+        actual = list(MergeStage().process([response("kiwi", a, b, c)]))
+
+        self.assertEqual([response("kiwi", b)], actual)
+
+    def test_process_with_collapse(self):
+        a = data("a", "1", 100)
+        b = data("b", "1", 120, "petas")
+        c = data("c", "1", 80, "figame")
+
+        stage = MergeStage(MergeStage.COLLAPSE)
+        first = response("kiwi", a)
+        actual = list(stage.process([first, response("petas", b)]))
+        actual.extend(stage.process([response("figame", c)]))
+
+        expected = [
+            first,
+            response("petas"),
+            SearchUpdate(offers=[SearchOffer.create(b)], provider="petas"),
+            response("figame"),
+            SearchUpdate(
+                data=[c], offers=[SearchOffer.create(c)], provider="figame"
+            ),
+        ]
+        self.assertEqual(expected, actual)
+        self.assertEqual(
+            SearchOffer(
+                id="c",
+                groupId="1",
+                provider=Provider(name="figame", uri=""),
+                total=80,
+            ),
+            SearchOffer.create(c),
+        )
+
+
+class RankStageTestCase(TestCase):
+    def test_init(self):
+        stage = RankStage()
+        self.assertEqual("total", stage.key)
+        self.assertEqual(20, stage.size)
+        with self.assertRaises(ValueError):
+            RankStage("price")
+        with self.assertRaises(ValueError):
+            RankStage("total", 0)
+        with self.assertRaises(ValueError):
+            get_stages(rank="total", size=-1)
+
+    def test_process(self):
+        a = data("a", "1", 100)
+        b = data("b", "2", 50)
+        c = data("c", "3", 120, "petas")
+        d = data("d", "4", 60, "petas")
+        e = data("e", "5", 70, "figame")
+        summary = SearchSummary()
+        messages = [
+            response("kiwi", a, b),
+            response("petas", c),
+            response("petas", d),
+            response("figame", e),
+            summary,
+        ]
+
+        stage = RankStage(size=2)
+        actual = list(stage.process(messages))
+
+        expected = [
+            SearchRanking(key="total", data=[b, a]),
+            SearchRanking(key="total", data=[b, d]),
+            summary,
+        ]
+        self.assertEqual(expected, actual)
+        self.assertEqual(2, len(stage.heap))
+        self.assertEqual({"2", "4"}, set(stage.groups))
+
+    def test_process_with_same_group(self):
+        a = data("a", "1", 100)
+        b = data("b", "1", 90, "petas")
+        c = data("c", "1", 95, "figame")
+        d = data("d", "2", 99, "figame")
+        messages = [
+            response("kiwi", a),
+            SearchUpdate(data=[b], provider="petas"),
+            response("figame", c, d),
+        ]
+
+        actual = list(RankStage().process(messages))
+
+        expected = [
+            SearchRanking(key="total", data=[a]),
+            SearchRanking(key="total", data=[b]),
+            SearchRanking(key="total", data=[b, d]),
+        ]
+        self.assertEqual(expected, actual)
+
+    def test_process_with_other_keys(self):
+        a = data("a", "1", 100, duration=300, stops=1)
+        b = data("b", "2", 50, duration=400, stops=0)
+        messages = [response("kiwi", a, b)]
+
+        actual = list(RankStage("duration").process(messages))
+        self.assertEqual([SearchRanking("duration", [a, b])], actual)
+
+        actual = list(RankStage("stops").process(messages))
+        self.assertEqual([SearchRanking("stops", [b, a])], actual)
+
+
+class GetStagesTestCase(TestCase):
+    def test_get_stages(self):
+        self.assertEqual([], get_stages())
+
+        stages = get_stages(merge="collapse")
+        self.assertEqual(1, len(stages))
+        self.assertIsInstance(stages[0], MergeStage)
+        self.assertEqual("collapse", stages[0].mode)
+
+        stages = get_stages(merge="cheapest", rank="stops", size=5)
+        self.assertEqual(2, len(stages))
+        self.assertIsInstance(stages[1], RankStage)
+        self.assertEqual("stops", stages[1].key)
+        self.assertEqual(5, stages[1].size)
@@ -21,4 +21,5 @@ urlpatterns = [
     url("index", views.index, name="index"),
     url("async", views.async, name="async"),
     url("sync", views.async, name="sync"),
+    url("stats", views.stats, name="stats"),
 ]
@@ -1,6 +1,7 @@
 import pickle
 from base64 import b64decode, b64encode
 
+from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
 from django import http
 from django.shortcuts import render
@@ -8,20 +9,26 @@ from django.views.decorators.csrf import csrf_exempt
 
 from search.models import SearchRequest
 from search.services import SearchService
+from search.stages import get_stages
 
 
 def async(request: WSGIRequest):
     try:
         search_request = pickle.loads(b64decode(request.GET.get("id")))
         assert isinstance(search_request, SearchRequest) == True
+        stages = get_stages(
+            merge=request.GET.get("merge", settings.SEARCH_MERGE),
+            rank=request.GET.get("rank", settings.SEARCH_RANK),
+            size=int(request.GET.get("size", settings.SEARCH_RANK_SIZE)),
+        )
     except Exception as e:
         return http.HttpResponseBadRequest(str(e))
 
     def response():
         search = SearchService()
-        for message in search.perform(search_request):
-            yield "event: message\ndata: {}\n\n".format(
-                message.to_json(indent=None)
+        for message in search.perform(search_request, stages):
+            yield "event: {}\ndata: {}\n\n".format(
+                message.EVENT, search.encode(message)
             )
 
     response = http.StreamingHttpResponse(
@@ -31,6 +38,10 @@ def async(request: WSGIRequest):
     return response
 
 
+def stats(request: WSGIRequest):
+    return http.JsonResponse(SearchService.stats())
+
+
 @csrf_exempt
 def index(request: WSGIRequest):
     if request.method == "POST":
@@ -0,0 +1,226 @@
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from seeya.models import SeeyaConversation
+
+Location = Tuple[int, int, int]
+
+HEADER = struct.Struct(">I")
+
+
+class ConversationArchive:
+    """Append-only store of the provider conversations.
+
+    Request and response bodies are compressed one by one and appended to
+    segment files, a new segment is started once the current one reaches
+    `segment_size` bytes. Every segment has its own index with a line per
+    conversation, with its transaction id, timestamp and the segment,
+    offset and length of both bodies. Requests are stored without their
+    transaction id and method, so the same search sent to every provider
+    is stored only once per segment.
+
+    Several processes can share an archive, every append holds an exclusive
+    lock on the `.lock` file of the directory and picks up the current
+    segment and its size from disk first. Only the requests of the current
+    segment are kept in memory for the dedupe, transaction id lookups in
+    the closed segments read their index once and keep the last `lookups`
+    of them.
+    """
+
+    INDEX = "index-{:06d}.jsonl"
+    SEGMENT = "segment-{:06d}.dat"
+    LOCK = ".lock"
+
+    def __init__(
+        self,
+        path: str,
+        segment_size: int = 64 * 1024 * 1024,
+        level: int = 6,
+        lookups: int = 8,
+    ):
+        self.path = path
+        self.segment_size = segment_size
+        self.level = level
+        self.segment = None
+        self.size = 0
+        self.hashes: Dict[str, Location] = dict()
+        self.lookups: Dict[int, Dict[str, List[Dict]]] = LRUCache(lookups)
+        self.lock = threading.Lock()
+        self.lookups_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self, operation: int = fcntl.LOCK_EX):
+        """Hold the lock of the archive directory across processes."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.LOCK), mode="a") as f:
+            fcntl.flock(f, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self):
+        """Catch up with the segment on disk, other processes may have
+        rotated or appended to it, call it under `locked`."""
+        os.makedirs(self.path, exist_ok=True)
+        segment = max(self.get_segments() or [1])
+        if segment != self.segment:
+            self.segment = segment
+            self.hashes = {
+                entry["hash"]: tuple(entry["request"])
+                for entry in self.entries(segment)
+            }
+
+        path = self.get_segment(self.segment)
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def rotate(self):
+        if self.size >= self.segment_size:
+            self.segment += 1
+            self.size = 0
+            self.hashes = dict()
+
+    def append(self, conversations: List[SeeyaConversation]):
+        with self.lock, self.locked():
+            self.load()
+            lines = defaultdict(list)
+            for conversation in conversations:
+                self.rotate()
+                body, digest = self.strip(conversation.request)
+                if digest not in self.hashes:
+                    self.hashes[digest] = self.write(body)
+
+                entry = dict(
+                    transactionId=conversation.transactionId,
+                    timestamp=conversation.timestamp,
+                    provider=conversation.provider,
+                    method=conversation.method,
+                    hash=digest,
+                    request=self.hashes[digest],
+                    response=self.write(conversation.response),
+                )
+                lines[self.segment].append(json.dumps(entry))
+
+            for segment, items in lines.items():
+                path = self.get_index(segment)
+                with open(path, mode="a", encoding="utf-8") as f:
+                    f.write("".join("{}\n".format(line) for line in items))
+
+    @staticmethod
+    def strip(request: str) -> Tuple[str, str]:
+        data = json.loads(request)
+        data["transactionId"] = None
+        data["method"] = None
+        body = json.dumps(data, indent=4)
+        return body, hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+    def write(self, body: str) -> Location:
+        data = zlib.compress(body.encode("utf-8"), self.level)
+        with open(self.get_segment(self.segment), mode="ab") as f:
+            offset = f.tell()
+            f.write(HEADER.pack(len(data)) + data)
+        self.size = offset + HEADER.size + len(data)
+        return self.segment, offset, HEADER.size + len(data)
+
+    def read(self, location: Location) -> str:
+        segment, offset, length = location
+        with open(self.get_segment(segment), mode="rb") as f:
+            f.seek(offset)
+            record = f.read(length)
+
+        size, = HEADER.unpack_from(record)
+        return zlib.decompress(record[HEADER.size :][:size]).decode("utf-8")
+
+    def entries(self, segment: Optional[int] = None) -> Iterator[Dict]:
+        """Yield the index entries of a segment, or of all of them in the
+        order they were written."""
+        if segment is None:
+            for segment in self.get_segments():
+                yield from self.entries(segment)
+            return
+
+        path = self.get_index(segment)
+        if not os.path.exists(path):
+            return
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def restore(self, entry: Dict) -> SeeyaConversation:
+        request = json.loads(self.read(entry["request"]))
+        request["transactionId"] = entry["transactionId"]
+        request["method"] = entry["method"]
+        return SeeyaConversation(
+            transactionId=entry["transactionId"],
+            timestamp=entry["timestamp"],
+            provider=entry["provider"],
+            method=entry["method"],
+            request=json.dumps(request, indent=4),
+            response=self.read(entry["response"]),
+        )
+
+    def find(self, transactionId: str) -> List[SeeyaConversation]:
+        segments = self.get_segments()
+        entries = []
+        for segment in segments[:-1]:
+            entries.extend(self.get_lookup(segment).get(transactionId, []))
+
+        if segments:
+            with self.locked(fcntl.LOCK_SH):
+                entries.extend(
+                    entry
+                    for entry in self.entries(segments[-1])
+                    if entry["transactionId"] == transactionId
+                )
+        return [self.restore(entry) for entry in entries]
+
+    def get_lookup(self, segment: int) -> Dict[str, List[Dict]]:
+        """Index entries of a closed segment by transaction id."""
+        with self.lookups_lock:
+            lookup = self.lookups.get(segment)
+            if lookup is None:
+                lookup = defaultdict(list)
+                for entry in self.entries(segment):
+                    lookup[entry["transactionId"]].append(entry)
+                self.lookups[segment] = lookup
+            return lookup
+
+    def replay(
+        self,
+        provider: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Iterator[SeeyaConversation]:
+        """Yield the archived conversations in the order they were written,
+        optionally only the ones of a provider within a timestamp range."""
+        for entry in self.entries():
+            if provider is not None and entry["provider"] != provider:
+                continue
+            if since is not None and entry["timestamp"] < since:
+                continue
+            if until is not None and entry["timestamp"] >= until:
+                continue
+            yield self.restore(entry)
+
+    def get_segments(self) -> List[int]:
+        paths = glob.glob(os.path.join(self.path, "segment-*.dat"))
+        return sorted(int(os.path.basename(x)[8:14]) for x in paths)
+
+    def get_index(self, segment: int) -> str:
+        return os.path.join(self.path, self.INDEX.format(segment))
+
+    def get_segment(self, segment: int) -> str:
+        return os.path.join(self.path, self.SEGMENT.format(segment))
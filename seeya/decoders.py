@@ -0,0 +1,122 @@
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from cattr import structure
+
+from seeya.models import SeeyaRecommendation, SeeyaSegment
+
+WHITESPACE = " \t\n\r"
+
+
+class JsonScanner:
+    """Walks a JSON document one object member or array item at a time and
+    only decodes the values it is asked for."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.index = 0
+        self.decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        while (
+            self.index < len(self.text) and self.text[self.index] in WHITESPACE
+        ):
+            self.index += 1
+        return self.text[self.index : self.index + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(
+                "Expecting '{}' at char {}".format(char, self.index)
+            )
+        self.index += 1
+
+    def value(self) -> Any:
+        self.peek()
+        value, self.index = self.decoder.raw_decode(self.text, self.index)
+        return value
+
+    def members(self) -> Iterator[str]:
+        """Yield the keys of the object at the cursor, every value has to be
+        read with `value`, `members` or `items` before the next key."""
+        yield from self.walk("{", "}", self.read_key)
+
+    def items(self) -> Iterator[None]:
+        """Yield once per item of the array at the cursor, every item has to
+        be read before the next one."""
+        yield from self.walk("[", "]", lambda: None)
+
+    def walk(self, start: str, end: str, read):
+        self.expect(start)
+        if self.peek() == end:
+            self.index += 1
+            return
+
+        while True:
+            yield read()
+            if self.peek() != ",":
+                break
+            self.index += 1
+        self.expect(end)
+
+    def read_key(self) -> str:
+        key = self.value()
+        self.expect(":")
+        return key
+
+
+class SeeyaSearchResponseReader:
+    """Decodes a seeya search response piece by piece.
+
+    `read` structures the group of segments first and then yields the
+    recommendations one at a time, so each one can be mapped and dropped
+    before the next is decoded, instead of holding the decoded tree of the
+    whole response. The transaction id, group of segments and error are set
+    as soon as they are read.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.transactionId: Optional[str] = None
+        self.groupOfSegments: Optional[Dict[str, SeeyaSegment]] = None
+        self.error: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, stream) -> "SeeyaSearchResponseReader":
+        return cls(stream.read() if hasattr(stream, "read") else stream)
+
+    def read(self) -> Iterator[SeeyaRecommendation]:
+        scanner = JsonScanner(self.text)
+        if scanner.peek() == "[":
+            scanner.expect("[")
+
+        for key in scanner.members():
+            if key == "result" and scanner.peek() == "{":
+                yield from self.read_result(scanner)
+            elif key in ("transactionId", "error"):
+                setattr(self, key, scanner.value())
+            else:
+                scanner.value()
+
+    def read_result(self, scanner: JsonScanner):
+        pending = []
+        for key in scanner.members():
+            if key == "groupOfSegments":
+                self.groupOfSegments = structure(
+                    scanner.value(), Dict[str, SeeyaSegment]
+                )
+                yield from pending
+                pending.clear()
+            elif key == "recommendations":
+                for _ in scanner.items():
+                    item = structure(scanner.value(), SeeyaRecommendation)
+                    if self.groupOfSegments is None:
+                        pending.append(item)
+                    else:
+                        yield item
+            else:
+                scanner.value()
+
+        if self.groupOfSegments is None:
+            self.groupOfSegments = dict()
+        yield from pending
@@ -0,0 +1,153 @@
+import socketserver
+import threading
+import time
+from concurrent import futures
+
+from django.core.management import BaseCommand
+from python3_gearman import GearmanClient
+from python3_gearman.protocol import (
+    GEARMAN_COMMAND_JOB_CREATED,
+    GEARMAN_COMMAND_SUBMIT_JOB,
+    GEARMAN_COMMAND_SUBMIT_JOB_HIGH,
+    GEARMAN_COMMAND_SUBMIT_JOB_LOW,
+    GEARMAN_COMMAND_WORK_COMPLETE,
+    pack_binary_command,
+    parse_binary_command,
+)
+
+from seeya.pools import GearmanPool
+from seeya.reactors import GearmanReactor
+
+SUBMIT_COMMANDS = (
+    GEARMAN_COMMAND_SUBMIT_JOB,
+    GEARMAN_COMMAND_SUBMIT_JOB_HIGH,
+    GEARMAN_COMMAND_SUBMIT_JOB_LOW,
+)
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    """Completes every submitted job right away with its own workload."""
+
+    def handle(self):
+        self.server.connections += 1
+        buffer = b""
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                return
+
+            buffer += data
+            while True:
+                cmd_type, cmd_args, size = parse_binary_command(buffer, False)
+                if cmd_type is None:
+                    break
+
+                buffer = buffer[size:]
+                if cmd_type in SUBMIT_COMMANDS:
+                    self.complete(cmd_args["data"])
+
+    def complete(self, data: str):
+        self.server.jobs += 1
+        handle = "H:echo:{}".format(self.server.jobs)
+        self.request.sendall(
+            pack_binary_command(
+                GEARMAN_COMMAND_JOB_CREATED, dict(job_handle=handle), True
+            )
+            + pack_binary_command(
+                GEARMAN_COMMAND_WORK_COMPLETE,
+                dict(job_handle=handle, data=data),
+                True,
+            )
+        )
+
+
+class EchoServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, EchoHandler)
+        self.connections = 0
+        self.jobs = 0
+
+    @property
+    def host(self) -> str:
+        return "{}:{}".format(*self.server_address)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare gearman job submission with fresh or pooled connections "
+        "and through the reactor"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--host", help="Job server with an echo worker, default built-in"
+        )
+
+    def handle(self, *args, **options):
+        server = None
+        host = options["host"]
+        if host is None:
+            server = EchoServer()
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host = server.host
+
+        self.stdout.write(
+            "{:<8} {:>10} {:>10} {:>12}".format(
+                "mode", "jobs/s", "connects", "connects/s"
+            )
+        )
+        try:
+            for mode in ("fresh", "pooled", "reactor"):
+                stats = self.run(mode, host, options)
+                self.stdout.write(
+                    "{:<8} {jobs:>10.1f} {connects:>10} "
+                    "{rate:>12.1f}".format(mode, **stats)
+                )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    def run(self, mode: str, host: str, options: dict) -> dict:
+        jobs = options["jobs"]
+        pool = GearmanPool([host], size=options["concurrency"])
+
+        def fresh():
+            client = GearmanClient([host])
+            try:
+                return client.submit_job("echo", "ping").result
+            finally:
+                client.shutdown()
+
+        def pooled():
+            with pool.connection() as client:
+                return client.submit_job("echo", "ping").result
+
+        started = time.perf_counter()
+        if mode == "reactor":
+            reactor = GearmanReactor([host])
+            for future in [
+                reactor.submit("echo", "ping") for _ in range(jobs)
+            ]:
+                assert future.result() == "ping"
+            connects = len(reactor.client.connection_list)
+            reactor.stop()
+        else:
+            call = pooled if mode == "pooled" else fresh
+            with futures.ThreadPoolExecutor(
+                options["concurrency"]
+            ) as executor:
+                for result in executor.map(lambda x: call(), range(jobs)):
+                    assert result == "ping"
+            connects = pool.connects if mode == "pooled" else jobs
+        total = time.perf_counter() - started
+        pool.clear()
+
+        return dict(
+            jobs=jobs / total, connects=connects, rate=connects / total
+        )
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from python3_gearman import GearmanWorker
+
+from seeya.services import SeeyaClient
+from seeya.workers import ProviderProfile, Recordings, StandIn
+
+
+class Command(BaseCommand):
+    help = (
+        "Answer seeya jobs from recorded responses with simulated provider "
+        "latency and errors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            action="append",
+            default=[],
+            help="Recorded seeya response, can be repeated",
+        )
+        parser.add_argument("--archive", help="Conversation archive path")
+        parser.add_argument(
+            "--profiles",
+            help="JSON object of provider to median, sigma and errors",
+        )
+        parser.add_argument("--median", type=float, default=0.5)
+        parser.add_argument("--sigma", type=float, default=0.5)
+        parser.add_argument("--errors", type=float, default=0.0)
+        parser.add_argument("--workers", type=int, default=10)
+        parser.add_argument("--host", action="append")
+
+    def handle(self, *args, **options):
+        stand_in = self.create(options)
+        hosts = options["host"] or settings.SEEYA_SERVERS
+        for index in range(options["workers"]):
+            thread = threading.Thread(
+                target=self.work,
+                args=(stand_in, hosts, index),
+                name="standin-{}".format(index),
+                daemon=True,
+            )
+            thread.start()
+
+        self.stdout.write(
+            "Serving {} with {} workers on {}".format(
+                SeeyaClient.QUEUE, options["workers"], ", ".join(hosts)
+            )
+        )
+        try:
+            while True:
+                time.sleep(10)
+                self.stdout.write(
+                    "{jobs} jobs, {errors} errors".format(**stand_in.stats())
+                )
+        except KeyboardInterrupt:
+            pass
+
+    @staticmethod
+    def create(options: dict) -> StandIn:
+        recordings = Recordings()
+        for path in options["fixture"]:
+            recordings.load_fixture(path)
+        if options["archive"]:
+            recordings.load_archive(options["archive"])
+        if not len(recordings):
+            raise CommandError("No recordings, use --fixture or --archive")
+
+        profiles = {
+            provider: ProviderProfile(**profile)
+            for provider, profile in json.loads(
+                options["profiles"] or "{}"
+            ).items()
+        }
+        default = ProviderProfile(
+            median=options["median"],
+            sigma=options["sigma"],
+            errors=options["errors"],
+        )
+        return StandIn(recordings, profiles, default)
+
+    @staticmethod
+    def work(stand_in: StandIn, hosts: list, index: int):
+        worker = GearmanWorker(hosts)
+        worker.set_client_id("standin-{}".format(index))
+        worker.register_task(
+            SeeyaClient.QUEUE, lambda worker, job: stand_in.handle(job.data)
+        )
+        worker.work()
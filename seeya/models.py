@@ -3,6 +3,11 @@ from enum import unique, Enum
 from typing import List, Dict, Optional
 
 from attr import attrib, attrs
+from python3_gearman.constants import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NONE,
+)
 
 from mule.converters import xstr
 from mule.models import Serializable, CustomSerialization
@@ -132,6 +137,13 @@ class SeeyaPricePerPaxType(Serializable):
     fareData: Dict[str, SeeyaPaxFareData]
 
 
+@unique
+class JobPriority(Enum):
+    HIGH = PRIORITY_HIGH
+    NORMAL = PRIORITY_NONE
+    LOW = PRIORITY_LOW
+
+
 @unique
 class SeeyaPassengerType(Enum):
     adults = "ADT"
@@ -173,3 +185,13 @@ class SeeyaSearchResponse(Serializable):
     transactionId: str
     result: Optional[SeeyaSearchResult]
     error: Optional[str]
+
+
+@attrs(auto_attribs=True)
+class SeeyaConversation(Serializable):
+    transactionId: str
+    timestamp: int
+    provider: str
+    method: str
+    request: str
+    response: str
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+from python3_gearman import GearmanAdminClient
+
+logger = logging.getLogger(__name__)
+
+
+class QueueMonitor:
+    """Throttles background producers while the job queue is deep.
+
+    The queue depth is the number of `queue` jobs waiting or running on all
+    the job servers, read with the admin protocol at most every `interval`
+    seconds. Producers wait while it is at or above `threshold`, for at most
+    `timeout` seconds, and go ahead anyway after that. The depth counts as
+    zero when a server can not be reached.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        queue: str,
+        threshold: int = 100,
+        interval: float = 1,
+        timeout: float = 5,
+        factory: Callable = GearmanAdminClient,
+    ):
+        self.hosts = hosts
+        self.queue = queue
+        self.threshold = threshold
+        self.interval = interval
+        self.timeout = timeout
+        self.factory = factory
+        self.depth = 0
+        self.checked = 0.0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def get_depth(self) -> int:
+        with self.lock:
+            if time.time() - self.checked >= self.interval:
+                self.depth = sum(self.read(host) for host in self.hosts)
+                self.checked = time.time()
+            return self.depth
+
+    def read(self, host: str) -> int:
+        client = self.factory([host])
+        try:
+            return sum(
+                status["queued"]
+                for status in client.get_status()
+                if status["task"] == self.queue
+            )
+        except Exception as e:
+            logger.exception(repr(e))
+            return 0
+        finally:
+            client.shutdown()
+
+    def is_busy(self) -> bool:
+        return self.get_depth() >= self.threshold
+
+    def wait(self) -> float:
+        started = time.time()
+        if self.is_busy():
+            self.throttled += 1
+            while time.time() - started < self.timeout and self.is_busy():
+                time.sleep(self.interval)
+        return time.time() - started
+
+    async def wait_async(self) -> float:
+        loop = asyncio.get_event_loop()
+        started = time.time()
+        if await loop.run_in_executor(None, self.is_busy):
+            self.throttled += 1
+            while time.time() - started < self.timeout:
+                await asyncio.sleep(self.interval)
+                if not await loop.run_in_executor(None, self.is_busy):
+                    break
+        return time.time() - started
+
+    def stats(self) -> Dict:
+        return dict(depth=self.depth, throttled=self.throttled)
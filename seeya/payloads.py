@@ -0,0 +1,65 @@
+import base64
+import zlib
+from typing import Dict, Optional
+
+HEADER = "~{}:"
+
+
+class PayloadCodec:
+    """Compresses job payloads with a header that names the compression.
+
+    JSON never starts with `~`, so a payload without the header is plain
+    JSON and decodes as is, which keeps workers and clients that don't
+    compress working side by side. Payloads shorter than `threshold`
+    characters are not worth compressing and are sent plain. The gearman
+    protocol only carries text, so compressed bytes are base64 encoded.
+    """
+
+    COMPRESSIONS = ("zlib",)
+
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        threshold: int = 1024,
+        level: int = 6,
+    ):
+        if compression not in self.COMPRESSIONS + (None,):
+            raise ValueError("Unknown compression `{}`".format(compression))
+
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self.raw = 0
+        self.sent = 0
+
+    def encode(self, text: str) -> str:
+        payload = text
+        if self.compression is not None and len(text) >= self.threshold:
+            data = zlib.compress(text.encode("utf-8"), self.level)
+            payload = HEADER.format(self.compression) + base64.b64encode(
+                data
+            ).decode("ascii")
+
+        self.raw += len(text)
+        self.sent += len(payload)
+        return payload
+
+    @classmethod
+    def decode(cls, payload: str) -> str:
+        compression = cls.get_compression(payload)
+        if compression is None:
+            return payload
+
+        data = payload[len(HEADER.format(compression)) :]
+        return zlib.decompress(base64.b64decode(data)).decode("utf-8")
+
+    @classmethod
+    def get_compression(cls, payload: str) -> Optional[str]:
+        if payload.startswith("~"):
+            for compression in cls.COMPRESSIONS:
+                if payload.startswith(HEADER.format(compression)):
+                    return compression
+        return None
+
+    def stats(self) -> Dict:
+        return dict(raw=self.raw, sent=self.sent)
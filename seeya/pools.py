@@ -0,0 +1,169 @@
+import select
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from python3_gearman import GearmanClient
+from python3_gearman.errors import ConnectionError, ServerUnavailable
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class GearmanPool:
+    """Thread safe pool of connected gearman clients.
+
+    Clients are connected when they are created and handed out again after
+    every job, up to `size` clients in total. A client that sat idle for
+    `idle` seconds is closed, a client whose socket has become readable while
+    idle has been closed by the server or is out of sync and is dropped.
+    When connecting fails, new connections are refused for `backoff` seconds,
+    doubling up to `max_backoff` while the server stays down.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        size: int = 20,
+        idle: float = 60,
+        timeout: float = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        factory: Callable = GearmanClient,
+    ):
+        self.hosts = hosts
+        self.size = size
+        self.idle = idle
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.factory = factory
+        self.clients = deque()
+        self.created = 0
+        self.connects = 0
+        self.failures = 0
+        self.delay = 0.0
+        self.retry = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> GearmanClient:
+        deadline = time.time() + self.timeout
+        with self.condition:
+            while True:
+                self.evict(time.time())
+                while self.clients:
+                    client, _ = self.clients.pop()
+                    if self.is_healthy(client):
+                        return client
+                    self.discard(client)
+
+                if self.created < self.size:
+                    self.created += 1
+                    break
+
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    raise PoolExhausted()
+
+        try:
+            return self.connect()
+        except Exception:
+            with self.condition:
+                self.created -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, client: GearmanClient, healthy: bool = True):
+        client.request_to_rotating_connection_queue.clear()
+        with self.condition:
+            if healthy:
+                self.clients.append((client, time.time()))
+            else:
+                self.discard(client)
+            self.condition.notify()
+
+    @contextmanager
+    def connection(self):
+        client = self.acquire()
+        try:
+            yield client
+        except Exception:
+            self.release(client, healthy=False)
+            raise
+        else:
+            self.release(client)
+
+    def connect(self) -> GearmanClient:
+        now = time.time()
+        if now < self.retry:
+            raise ServerUnavailable(
+                "Reconnecting in {:.1f} seconds".format(self.retry - now)
+            )
+
+        client = self.factory(self.hosts)
+        connected = 0
+        for connection in client.connection_list:
+            try:
+                client.establish_connection(connection)
+                connected += 1
+            except ConnectionError:
+                pass
+
+        with self.condition:
+            if connected == 0:
+                self.failures += 1
+                self.delay = min(
+                    self.max_backoff, (self.delay * 2) or self.backoff
+                )
+                self.retry = time.time() + self.delay
+            else:
+                self.connects += connected
+                self.delay = 0.0
+
+        if connected == 0:
+            client.shutdown()
+            raise ServerUnavailable(
+                "Found no valid connections: {}".format(self.hosts)
+            )
+        return client
+
+    @staticmethod
+    def is_healthy(client: GearmanClient) -> bool:
+        sockets = [
+            c.gearman_socket for c in client.connection_list if c.connected
+        ]
+        if not sockets:
+            return False
+
+        try:
+            readable, _, _ = select.select(sockets, [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def evict(self, now: float):
+        while self.clients and now - self.clients[0][1] > self.idle:
+            client, _ = self.clients.popleft()
+            self.discard(client)
+
+    def discard(self, client: GearmanClient):
+        self.created -= 1
+        client.shutdown()
+
+    def clear(self):
+        with self.condition:
+            while self.clients:
+                client, _ = self.clients.pop()
+                self.discard(client)
+
+    def stats(self) -> Dict:
+        return dict(
+            size=self.size,
+            open=self.created,
+            idle=len(self.clients),
+            connects=self.connects,
+            failures=self.failures,
+        )
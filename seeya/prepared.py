@@ -0,0 +1,91 @@
+from json import dumps
+from typing import Any, Dict
+
+from cattr import unstructure
+
+from mule.converters import xstr
+from seeya.models import SeeyaRequest
+
+
+class SeeyaRequestTemplate:
+    """Serializes the fields a request shares across providers once.
+
+    Every provider call of a search sends the same request with its own
+    transaction id and method, `render` splices those two into the JSON of
+    the shared fields, which gives the same text as `to_json(indent=None)`
+    of the full request without unstructuring it again.
+    """
+
+    FIELDS = ("transactionId", "method")
+
+    def __init__(self, request: SeeyaRequest):
+        self.request = request
+        data = unstructure(request)
+        self.names = list(data)
+        self.parts = {
+            False: {k: dumps(v) for k, v in data.items()},
+            True: {k: dumps(v, sort_keys=True) for k, v in data.items()},
+        }
+
+    def prepare(self, provider: str, transactionId) -> "SeeyaPreparedRequest":
+        method = ".".join([self.request.MODAL, provider, self.request.ACTION])
+        return SeeyaPreparedRequest(self, transactionId, method)
+
+    def render(self, values: Dict[str, Any], sort_keys: bool = False) -> str:
+        parts = self.parts[sort_keys]
+        names = sorted(self.names) if sort_keys else self.names
+        return "{{{}}}".format(
+            ", ".join(
+                "{}: {}".format(
+                    dumps(name),
+                    dumps(values[name]) if name in values else parts[name],
+                )
+                for name in names
+            )
+        )
+
+
+class SeeyaPreparedRequest:
+    """One provider call of a templated request, it reads like the full
+    request and serializes through the template."""
+
+    def __init__(self, template: SeeyaRequestTemplate, transactionId, method):
+        self.template = template
+        self.transactionId = xstr(transactionId)
+        self.method = method
+
+    def __getattr__(self, name: str):
+        if name == "template":
+            raise AttributeError(name)
+        return getattr(self.template.request, name)
+
+    def __eq__(self, other):
+        if isinstance(other, SeeyaPreparedRequest):
+            other = other.to_request()
+        return self.to_request() == other
+
+    def __repr__(self):
+        return "Prepared{!r}".format(self.to_request())
+
+    @property
+    def provider(self):
+        return None if self.method is None else self.method.split(".")[1]
+
+    def copy(self, **kwargs):
+        if set(kwargs).issubset(SeeyaRequestTemplate.FIELDS):
+            values = dict(transactionId=self.transactionId, method=self.method)
+            values.update(kwargs)
+            return SeeyaPreparedRequest(self.template, **values)
+        return self.to_request().copy(**kwargs)
+
+    def to_request(self) -> SeeyaRequest:
+        return self.template.request.copy(
+            transactionId=self.transactionId, method=self.method
+        )
+
+    def to_json(self, indent=4, **kwargs) -> str:
+        if indent is not None or set(kwargs) - {"sort_keys"}:
+            return self.to_request().to_json(indent=indent, **kwargs)
+
+        values = dict(transactionId=self.transactionId, method=self.method)
+        return self.template.render(values, kwargs.get("sort_keys", False))
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+from binascii import hexlify
+from collections import deque
+from typing import Optional
+
+from python3_gearman.constants import PRIORITY_NONE
+from python3_gearman.errors import ServerUnavailable
+from python3_gearman.protocol import (
+    GEARMAN_COMMAND_ERROR,
+    GEARMAN_COMMAND_JOB_CREATED,
+    GEARMAN_COMMAND_WORK_COMPLETE,
+    GEARMAN_COMMAND_WORK_EXCEPTION,
+    GEARMAN_COMMAND_WORK_FAIL,
+    pack_binary_command,
+    parse_binary_command,
+    submit_cmd_for_background_priority,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JobFailed(Exception):
+    pass
+
+
+class GearmanProtocol(asyncio.Protocol):
+    """Multiplexes any number of foreground jobs over a single connection.
+
+    The server acknowledges submissions with JOB_CREATED in the order they
+    were sent, so pending submissions are kept in a fifo queue and moved to
+    the handle map once the server assigns them a job handle.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.buffer = b""
+        self.transport = None
+        self.submitted = deque()
+        self.jobs = dict()
+
+    @property
+    def pending(self) -> int:
+        return len(self.submitted) + len(self.jobs)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+        error = ServerUnavailable(repr(exc) if exc else "Connection closed")
+        for future in list(self.submitted) + list(self.jobs.values()):
+            if not future.done():
+                future.set_exception(error)
+
+        self.submitted.clear()
+        self.jobs.clear()
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        while True:
+            cmd_type, cmd_args, size = parse_binary_command(self.buffer)
+            if cmd_type is None:
+                break
+
+            self.buffer = self.buffer[size:]
+            self.command_received(cmd_type, cmd_args)
+
+    def command_received(self, cmd_type: int, cmd_args: dict):
+        if cmd_type == GEARMAN_COMMAND_JOB_CREATED:
+            future = self.submitted.popleft()
+            if not future.done():
+                self.jobs[cmd_args["job_handle"]] = future
+        elif cmd_type == GEARMAN_COMMAND_WORK_COMPLETE:
+            self.resolve(cmd_args["job_handle"], result=cmd_args["data"])
+        elif cmd_type == GEARMAN_COMMAND_WORK_FAIL:
+            self.resolve(cmd_args["job_handle"], error=JobFailed())
+        elif cmd_type == GEARMAN_COMMAND_WORK_EXCEPTION:
+            error = JobFailed(cmd_args["data"])
+            self.resolve(cmd_args["job_handle"], error=error)
+        elif cmd_type == GEARMAN_COMMAND_ERROR:
+            logger.error("Gearman error: {error_text}".format(**cmd_args))
+            if self.submitted:
+                future = self.submitted.popleft()
+                if not future.done():
+                    future.set_exception(JobFailed(cmd_args["error_text"]))
+
+    def resolve(self, handle: str, result=None, error=None):
+        future = self.jobs.pop(handle, None)
+        if future is None or future.done():
+            return
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def submit(self, task: str, data: str, priority=PRIORITY_NONE):
+        if self.transport is None:
+            raise ServerUnavailable("Connection closed")
+
+        unique = hexlify(os.urandom(16)).decode("ascii")
+        cmd_type = submit_cmd_for_background_priority(False, priority)
+        cmd_args = dict(task=task, unique=unique, data=data)
+
+        future = self.loop.create_future()
+        self.submitted.append(future)
+        self.transport.write(pack_binary_command(cmd_type, cmd_args))
+        return future
+
+
+class AsyncGearmanClient:
+    """Coroutine based gearman client, waiting on a job costs no thread."""
+
+    def __init__(self, host: str, loop: asyncio.AbstractEventLoop = None):
+        self.host = host
+        self.loop = loop or asyncio.get_event_loop()
+        self.protocol: Optional[GearmanProtocol] = None
+        self.lock = asyncio.Lock(loop=self.loop)
+
+    async def connect(self) -> GearmanProtocol:
+        async with self.lock:
+            if self.protocol is None or self.protocol.transport is None:
+                host, port = self.host.split(":")
+                _, self.protocol = await self.loop.create_connection(
+                    lambda: GearmanProtocol(self.loop), host, int(port)
+                )
+        return self.protocol
+
+    async def submit_job(self, task: str, data: str, priority=PRIORITY_NONE):
+        protocol = await self.connect()
+        return await protocol.submit(task, data, priority)
+
+    def shutdown(self):
+        if self.protocol is not None and self.protocol.transport is not None:
+            self.protocol.transport.close()
@@ -0,0 +1,170 @@
+import logging
+import threading
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Optional, Tuple
+
+from python3_gearman import GearmanClient
+from python3_gearman.constants import (
+    JOB_COMPLETE,
+    JOB_FAILED,
+    JOB_UNKNOWN,
+    PRIORITY_NONE,
+)
+from python3_gearman.errors import ServerUnavailable
+from python3_gearman.job import GearmanJobRequest
+
+from seeya.protocol import JobFailed
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[dict, Future]
+
+
+class GearmanReactor:
+    """Runs the foreground jobs of any number of threads over one client.
+
+    Callers get a future right away, a single reactor thread submits the
+    queued jobs in batches and polls the connection until any of them
+    finishes, so the jobs in flight share one connection instead of holding
+    a pooled connection each. Whoever waits on the future still blocks its
+    own thread. New jobs are picked up at least every `interval` seconds
+    while others are in flight.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        interval: float = 0.005,
+        factory: Callable = GearmanClient,
+    ):
+        self.hosts = hosts
+        self.interval = interval
+        self.factory = factory
+        self.client = None
+        self.thread = None
+        self.inbox = Queue()
+        self.pending: Dict[GearmanJobRequest, Future] = dict()
+        self.lock = threading.Lock()
+
+    def submit(self, task: str, data: str, priority=PRIORITY_NONE) -> Future:
+        future = Future()
+        self.inbox.put((dict(task=task, data=data, priority=priority), future))
+        self.start()
+        return future
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="gearman-reactor", daemon=True
+                )
+                self.thread.start()
+
+    def stop(self):
+        """Stop the reactor thread once the jobs in flight are finished."""
+        self.inbox.put(None)
+
+    def run(self):
+        while self.tick():
+            pass
+
+        self.reset()
+        with self.lock:
+            self.thread = None
+        if not self.inbox.empty():
+            self.start()
+
+    def tick(self) -> bool:
+        jobs = self.collect()
+        running = None not in jobs
+        jobs = [job for job in jobs if job is not None]
+        if jobs:
+            self.dispatch(jobs)
+        if self.pending:
+            self.poll()
+        return running or bool(self.pending) or not self.inbox.empty()
+
+    def collect(self) -> List[Optional[Job]]:
+        jobs = [] if self.pending else [self.inbox.get()]
+        while True:
+            try:
+                jobs.append(self.inbox.get_nowait())
+            except Empty:
+                return jobs
+
+    def dispatch(self, jobs: List[Job]):
+        try:
+            client = self.get_client()
+            requests = client.submit_multiple_jobs(
+                [job for job, _ in jobs],
+                background=False,
+                wait_until_complete=False,
+            )
+        except Exception as e:
+            logger.exception(repr(e))
+            for _, future in jobs:
+                self.settle(future, error=e)
+            self.reset()
+            return
+
+        for request, (_, future) in zip(requests, jobs):
+            self.pending[request] = future
+        self.resolve()
+
+    def poll(self):
+        def waiting(any_activity):
+            return not any(self.is_finished(r) for r in self.pending)
+
+        try:
+            self.client.poll_connections_until_stopped(
+                self.client.connection_list, waiting, timeout=self.interval
+            )
+        except Exception as e:
+            logger.exception(repr(e))
+            self.fail(e)
+        else:
+            self.resolve()
+
+    @staticmethod
+    def is_finished(request: GearmanJobRequest) -> bool:
+        return request.complete or request.state == JOB_UNKNOWN
+
+    def resolve(self):
+        for request, future in list(self.pending.items()):
+            if request.state == JOB_COMPLETE:
+                self.settle(future, result=request.result)
+            elif request.state == JOB_FAILED:
+                self.settle(future, error=JobFailed(request.exception))
+            elif request.state == JOB_UNKNOWN or request.timed_out:
+                self.settle(future, error=ServerUnavailable("Job was lost"))
+            else:
+                continue
+
+            del self.pending[request]
+
+    def fail(self, error: Exception):
+        for future in self.pending.values():
+            self.settle(future, error=error)
+        self.pending.clear()
+        self.reset()
+
+    @staticmethod
+    def settle(future: Future, result=None, error: Exception = None):
+        if future.done():
+            return
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def get_client(self) -> GearmanClient:
+        if self.client is None:
+            self.client = self.factory(self.hosts)
+        return self.client
+
+    def reset(self):
+        if self.client is not None:
+            self.client.shutdown()
+            self.client = None
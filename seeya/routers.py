@@ -0,0 +1,120 @@
+import bisect
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from python3_gearman.errors import ConnectionError, ServerUnavailable
+
+FAILOVER_ERRORS = (ConnectionError, ServerUnavailable, OSError)
+
+
+class ServerState:
+    def __init__(self, host: str):
+        self.host = host
+        self.inflight = 0
+        self.jobs = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def is_up(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def stats(self, now: float) -> Dict:
+        return dict(
+            state="up" if self.is_up(now) else "down",
+            inflight=self.inflight,
+            jobs=self.jobs,
+            failures=self.failures,
+        )
+
+
+class ServerRouter:
+    """Picks the gearman servers to try for a job, in order.
+
+    With `hash` routing every key, the provider, sticks to one server on a
+    consistent hash ring with `replicas` points per server, so adding or
+    removing a server only moves the keys of its neighbours. With
+    `least_loaded` routing servers are ordered by jobs in flight. A server
+    that fails is skipped for `cooldown` seconds and is only tried when all
+    the others are down too.
+    """
+
+    HASH = "hash"
+    LEAST_LOADED = "least_loaded"
+    STRATEGIES = (HASH, LEAST_LOADED)
+
+    def __init__(
+        self,
+        hosts: List[str],
+        strategy: str = HASH,
+        replicas: int = 100,
+        cooldown: float = 10,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError("Unknown routing strategy `{}`".format(strategy))
+
+        self.hosts = hosts
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.servers = {host: ServerState(host) for host in hosts}
+        self.ring = sorted(
+            (self.hash("{}-{}".format(host, index)), host)
+            for host in hosts
+            for index in range(replicas)
+        )
+        self.keys = [point for point, _ in self.ring]
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def hash(value: str) -> int:
+        return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+    def route(self, key: str = None) -> List[str]:
+        if self.strategy == self.HASH:
+            hosts = self.walk(key or "")
+        else:
+            with self.lock:
+                hosts = sorted(
+                    self.hosts, key=lambda x: self.servers[x].inflight
+                )
+
+        now = time.time()
+        up = [host for host in hosts if self.servers[host].is_up(now)]
+        return up + [host for host in hosts if host not in up]
+
+    def walk(self, key: str) -> List[str]:
+        start = bisect.bisect(self.keys, self.hash(key))
+        hosts = []
+        for index in range(len(self.ring)):
+            _, host = self.ring[(start + index) % len(self.ring)]
+            if host not in hosts:
+                hosts.append(host)
+                if len(hosts) == len(self.hosts):
+                    break
+        return hosts
+
+    @contextmanager
+    def track(self, host: str):
+        server = self.servers[host]
+        with self.lock:
+            server.inflight += 1
+            server.jobs += 1
+        try:
+            yield server
+        except FAILOVER_ERRORS:
+            with self.lock:
+                server.failures += 1
+                server.down_until = time.time() + self.cooldown
+            raise
+        else:
+            with self.lock:
+                server.down_until = 0.0
+        finally:
+            with self.lock:
+                server.inflight -= 1
+
+    def stats(self) -> Dict[str, Dict]:
+        now = time.time()
+        return {host: self.servers[host].stats(now) for host in self.hosts}
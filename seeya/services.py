@@ -1,52 +1,217 @@
+import asyncio
 import logging
+import threading
 import time
-from codecs import open
-from os import makedirs
-from os.path import isdir
+from typing import Dict
 
-from pkg_resources import resource_filename
-from python3_gearman import GearmanClient
+from django.conf import settings
 
 from mule.models import Serializable
-from seeya.models import SeeyaRequest
+from seeya.archives import ConversationArchive
+from seeya.models import JobPriority, SeeyaConversation, SeeyaRequest
+from seeya.monitors import QueueMonitor
+from seeya.payloads import PayloadCodec
+from seeya.pools import GearmanPool
+from seeya.protocol import AsyncGearmanClient
+from seeya.reactors import GearmanReactor
+from seeya.routers import FAILOVER_ERRORS, ServerRouter
+from seeya.writers import ConversationWriter
 
 logger = logging.getLogger(__name__)
 
 
 class SeeyaClient:
     QUEUE = "seeya_webservice"
+    async_clients = dict()
+    pools = dict()
+    reactors = dict()
+    router = None
+    monitor = None
+    writer = None
+    codec = None
+    lock = threading.Lock()
 
     @classmethod
-    def send(cls, request: SeeyaRequest, clazz: Serializable.__class__):
-        try:
-            client = GearmanClient(["localhost:4730"])
-            workload = request.to_json()
-            response = client.submit_job(cls.QUEUE, workload, background=False)
-            cls.log_conversation(request, response.result)
-            return clazz.from_json(response.result)
-        finally:
-            client.shutdown()
+    def send(
+        cls,
+        request: SeeyaRequest,
+        clazz: Serializable.__class__,
+        priority: JobPriority = JobPriority.NORMAL,
+    ):
+        workload = request.to_json(indent=None)
+        payload = cls.get_codec().encode(workload)
+        router = cls.get_router()
+        error = None
+        for host in router.route(request.provider):
+            try:
+                with router.track(host):
+                    result = cls.call(host, payload, priority)
+                break
+            except FAILOVER_ERRORS as e:
+                logger.warning(
+                    "Gearman server {} failed: {!r}".format(host, e)
+                )
+                error = e
+        else:
+            raise error
+        return cls.receive(request, result, clazz, workload)
 
     @classmethod
-    def log_conversation(cls, request: SeeyaRequest, response: str):
-        try:
-            now = int(time.time() * 1000)
-            provider = request.provider
-            transaction = request.transactionId
-            method = request.method
-            dir = resource_filename(__name__, "data/logs/{}".format(provider))
+    def call(cls, host: str, workload: str, priority: JobPriority) -> str:
+        """Run the job and wait for its result on the calling thread, the
+        reactor saves connections, not threads."""
+        if settings.SEEYA_REACTOR:
+            reactor = cls.get_reactor(host)
+            return reactor.submit(cls.QUEUE, workload, priority.value).result()
+
+        with cls.get_pool(host).connection() as client:
+            job = client.submit_job(
+                cls.QUEUE, workload, priority=priority.value, background=False
+            )
+        return job.result
+
+    @classmethod
+    def get_router(cls) -> ServerRouter:
+        with cls.lock:
+            if cls.router is None:
+                cls.router = ServerRouter(
+                    settings.SEEYA_SERVERS, **settings.SEEYA_ROUTING
+                )
+            return cls.router
+
+    @classmethod
+    def get_reactor(cls, host: str) -> GearmanReactor:
+        with cls.lock:
+            if host not in cls.reactors:
+                cls.reactors[host] = GearmanReactor(
+                    [host], interval=settings.SEEYA_REACTOR_INTERVAL
+                )
+            return cls.reactors[host]
+
+    @classmethod
+    def get_pool(cls, host: str) -> GearmanPool:
+        with cls.lock:
+            if host not in cls.pools:
+                cls.pools[host] = GearmanPool([host], **settings.SEEYA_POOL)
+            return cls.pools[host]
+
+    @classmethod
+    async def send_async(
+        cls,
+        request: SeeyaRequest,
+        clazz: Serializable.__class__,
+        priority: JobPriority = JobPriority.NORMAL,
+    ):
+        loop = asyncio.get_event_loop()
+        workload = request.to_json(indent=None)
+        payload = cls.get_codec().encode(workload)
+        router = cls.get_router()
+        error = None
+        for host in router.route(request.provider):
+            try:
+                with router.track(host):
+                    client = cls.get_async_client(loop, host)
+                    result = await client.submit_job(
+                        cls.QUEUE, payload, priority.value
+                    )
+                break
+            except FAILOVER_ERRORS as e:
+                logger.warning(
+                    "Gearman server {} failed: {!r}".format(host, e)
+                )
+                error = e
+        else:
+            raise error
+        return await loop.run_in_executor(
+            None, cls.receive, request, result, clazz, workload
+        )
+
+    @classmethod
+    def get_async_client(cls, loop, host: str) -> AsyncGearmanClient:
+        key = (loop, host)
+        if key not in cls.async_clients:
+            cls.async_clients[key] = AsyncGearmanClient(host, loop=loop)
+        return cls.async_clients[key]
 
-            if not isdir(dir):
-                makedirs(dir)
+    @classmethod
+    def get_monitor(cls) -> QueueMonitor:
+        with cls.lock:
+            if cls.monitor is None:
+                cls.monitor = QueueMonitor(
+                    settings.SEEYA_SERVERS,
+                    cls.QUEUE,
+                    **settings.SEEYA_THROTTLE
+                )
+            return cls.monitor
+
+    @classmethod
+    def get_codec(cls) -> PayloadCodec:
+        with cls.lock:
+            if cls.codec is None:
+                cls.codec = PayloadCodec(**settings.SEEYA_PAYLOAD)
+            return cls.codec
+
+    @classmethod
+    def get_writer(cls) -> ConversationWriter:
+        with cls.lock:
+            if cls.writer is None:
+                cls.writer = ConversationWriter(
+                    ConversationArchive(**settings.SEEYA_ARCHIVE),
+                    **settings.SEEYA_LOG
+                )
+            return cls.writer
+
+    @classmethod
+    def throttle(cls, priority: JobPriority) -> float:
+        """Hold back low priority producers while the queue is deep."""
+        if priority != JobPriority.LOW:
+            return 0.0
+        return cls.get_monitor().wait()
 
-            path = "{}/{}_{}_{}".format(dir, now, method, transaction)
-            req_path = "{}_{}.json".format(path, "request")
-            res_path = "{}_{}.json".format(path, "response")
+    @classmethod
+    async def throttle_async(cls, priority: JobPriority) -> float:
+        if priority != JobPriority.LOW:
+            return 0.0
+        return await cls.get_monitor().wait_async()
+
+    @classmethod
+    def stats(cls) -> Dict:
+        return dict(
+            servers=cls.get_router().stats(),
+            pools={k: v.stats() for k, v in sorted(cls.pools.items())},
+            queue=cls.get_monitor().stats(),
+            log=cls.get_writer().stats(),
+            payloads=cls.get_codec().stats(),
+        )
 
-            with open(req_path, encoding="utf-8", mode="w") as f:
-                f.write(request.to_json())
+    @classmethod
+    def receive(
+        cls,
+        request: SeeyaRequest,
+        result: str,
+        clazz: Serializable.__class__,
+        workload: str = None,
+    ):
+        result = PayloadCodec.decode(result)
+        cls.log_conversation(request, result, workload)
+        return clazz.from_json(result)
 
-            with open(res_path, encoding="utf-8", mode="w") as f:
-                f.write(response)
+    @classmethod
+    def log_conversation(
+        cls, request: SeeyaRequest, response: str, workload: str = None
+    ):
+        """Queue the conversation for the background archive writer, the
+        already serialized `workload` is reused when given."""
+        try:
+            now = int(time.time() * 1000)
+            conversation = SeeyaConversation(
+                transactionId=request.transactionId,
+                timestamp=now,
+                provider=request.provider,
+                method=request.method,
+                request=workload or request.to_json(),
+                response=response,
+            )
+            cls.get_writer().submit(conversation)
         except Exception as e:
             logger.exception(repr(e))
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from seeya.archives import ConversationArchive
+from seeya.models import SeeyaConversation
+
+
+def conversation(provider: str, timestamp: int) -> SeeyaConversation:
+    request = dict(
+        metadata=dict(market="GB", locale="en-GB"),
+        transactionId="tx-{}".format(provider),
+        pcc=None,
+        method="flights.{}.search".format(provider),
+        searchQuery=dict(direct=False, currency="GBP"),
+    )
+    return SeeyaConversation(
+        transactionId="tx-{}".format(provider),
+        timestamp=timestamp,
+        provider=provider,
+        method="flights.{}.search".format(provider),
+        request=json.dumps(request, indent=4),
+        response=json.dumps(dict(provider=provider, result=None)),
+    )
+
+
+class ConversationArchiveTestCase(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.archive = ConversationArchive(self.path)
+        self.conversations = [
+            conversation(provider, index)
+            for index, provider in enumerate(["kiwi", "petas", "figame"])
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_append_and_replay(self):
+        self.archive.append(self.conversations[:2])
+        self.archive.append(self.conversations[2:])
+
+        self.assertEqual(self.conversations, list(self.archive.replay()))
+        self.assertEqual(
+            self.conversations[1:2], self.archive.find("tx-petas")
+        )
+        self.assertEqual([], self.archive.find("tx-travel2be"))
+
+    def test_replay_with_filters(self):
+        self.archive.append(self.conversations)
+
+        actual = list(self.archive.replay(provider="figame"))
+        self.assertEqual(self.conversations[2:], actual)
+
+        actual = list(self.archive.replay(since=1, until=2))
+        self.assertEqual(self.conversations[1:2], actual)
+
+    def test_append_deduplicates_requests(self):
+        self.archive.append(self.conversations)
+        entries = list(self.archive.entries())
+
+        self.assertEqual(1, len(self.archive.hashes))
+        self.assertEqual(1, len({tuple(x["request"]) for x in entries}))
+        self.assertEqual(3, len({tuple(x["response"]) for x in entries}))
+
+        archive = ConversationArchive(self.path)
+        archive.append([conversation("travel2be", 3)])
+        self.assertEqual(1, len(archive.hashes))
+
+    def test_append_rotates_segments(self):
+        self.archive.segment_size = 1
+        self.archive.append(self.conversations)
+
+        files = sorted(os.listdir(self.path))
+        self.assertEqual(
+            [
+                ".lock",
+                "index-000001.jsonl",
+                "index-000002.jsonl",
+                "index-000003.jsonl",
+                "segment-000001.dat",
+                "segment-000002.dat",
+                "segment-000003.dat",
+            ],
+            files,
+        )
+        self.assertEqual(self.conversations, list(self.archive.replay()))
+        self.assertEqual(1, len(self.archive.hashes))
+
+        archive = ConversationArchive(self.path, segment_size=1)
+        archive.append([conversation("travel2be", 3)])
+        self.assertEqual(4, archive.segment)
+        self.assertEqual(1, len(archive.hashes))
+
+    def test_find_in_closed_segments(self):
+        self.archive.segment_size = 1
+        self.archive.append(self.conversations + [conversation("kiwi", 3)])
+
+        actual = self.archive.find("tx-kiwi")
+        self.assertEqual([0, 3], [x.timestamp for x in actual])
+        self.assertEqual(
+            self.conversations[1:2], self.archive.find("tx-petas")
+        )
+        self.assertEqual([1, 2, 3], sorted(self.archive.lookups))
+        self.assertEqual(4, self.archive.segment)
+
+        archive = ConversationArchive(self.path, lookups=1)
+        self.assertEqual(2, len(archive.find("tx-kiwi")))
+        self.assertEqual([3], list(archive.lookups))
+
+    def test_append_from_many_processes(self):
+        def run(index):
+            archive = ConversationArchive(self.path, segment_size=2048)
+            for timestamp in range(200):
+                archive.append([conversation("p{}".format(index), timestamp)])
+            os._exit(0)
+
+        pids = []
+        for index in range(4):
+            pid = os.fork()
+            if pid == 0:
+                run(index)
+            pids.append(pid)
+        for pid in pids:
+            self.assertEqual(0, os.waitpid(pid, 0)[1])
+
+        actual = list(self.archive.replay())
+        self.assertEqual(800, len(actual))
+        for index in range(4):
+            provider = "p{}".format(index)
+            expected = [conversation(provider, x) for x in range(200)]
+            self.assertEqual(
+                expected, [x for x in actual if x.provider == provider]
+            )
+        self.assertGreater(len(self.archive.get_segments()), 1)
+
+    def test_read(self):
+        self.archive.load()
+        location = self.archive.write("foo")
+        self.assertEqual((1, 0, 15), location)
+        self.assertEqual("foo", self.archive.read(location))
+        self.assertEqual("bar", self.archive.read(self.archive.write("bar")))
+
+    def test_entries_without_index(self):
+        self.assertEqual([], list(self.archive.entries()))
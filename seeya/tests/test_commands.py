@@ -0,0 +1,69 @@
+import threading
+from io import StringIO
+from unittest import TestCase
+
+from django.core.management import CommandError, call_command
+from pkg_resources import resource_filename
+
+from seeya.management.commands.benchmark_gearman import EchoServer
+from seeya.management.commands.standin_worker import Command
+from seeya.pools import GearmanPool
+
+
+class EchoServerTestCase(TestCase):
+    def test_submit_job(self):
+        server = EchoServer()
+        with server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            pool = GearmanPool([server.host])
+            try:
+                for _ in range(3):
+                    with pool.connection() as client:
+                        job = client.submit_job("echo", "ping")
+                        self.assertEqual("ping", job.result)
+            finally:
+                pool.clear()
+                server.shutdown()
+                thread.join()
+
+        self.assertEqual(1, server.connections)
+        self.assertEqual(3, server.jobs)
+
+
+class BenchmarkGearmanTestCase(TestCase):
+    def test_handle(self):
+        out = StringIO()
+        call_command("benchmark_gearman", jobs=20, concurrency=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[0].startswith("mode"))
+        self.assertEqual("20", lines[1].split()[2])
+        self.assertLessEqual(int(lines[2].split()[2]), 2)
+        self.assertEqual("1", lines[3].split()[2])
+
+
+class StandInWorkerTestCase(TestCase):
+    def test_create(self):
+        fixture = resource_filename("seeya", "tests/fixtures/seeya_rs.json")
+        options = dict(
+            fixture=[fixture],
+            archive=None,
+            profiles='{"kiwi": {"median": 2, "errors": 0.1}}',
+            median=0.3,
+            sigma=0.4,
+            errors=0.0,
+        )
+        stand_in = Command.create(options)
+
+        self.assertEqual(1, len(stand_in.recordings))
+        self.assertEqual(2, stand_in.get_profile("kiwi").median)
+        self.assertEqual(0.1, stand_in.get_profile("kiwi").errors)
+        self.assertEqual(0.3, stand_in.get_profile("petas").median)
+        self.assertEqual(0.4, stand_in.get_profile("petas").sigma)
+
+    def test_create_without_recordings(self):
+        options = dict(fixture=[], archive=None, profiles=None)
+        with self.assertRaises(CommandError):
+            Command.create(options)
@@ -0,0 +1,69 @@
+import json
+
+from mule.testcases import TestCase
+from seeya.decoders import JsonScanner, SeeyaSearchResponseReader
+from seeya.models import SeeyaSearchResponse
+
+
+class JsonScannerTestCase(TestCase):
+    def test_members_and_items(self):
+        scanner = JsonScanner(' { "a" : [1, {"b": 2} ], "c": {}, "d": []} ')
+        actual = []
+        for key in scanner.members():
+            if key == "a":
+                actual.append([scanner.value() for _ in scanner.items()])
+            elif key == "c":
+                actual.append(list(scanner.members()))
+            else:
+                actual.append(list(scanner.items()))
+
+        self.assertEqual([[1, dict(b=2)], [], []], actual)
+
+    def test_expect(self):
+        scanner = JsonScanner('{"a" 1}')
+        with self.assertRaisesRegex(ValueError, "Expecting ':' at char 5"):
+            list(scanner.members())
+
+
+class SeeyaSearchResponseReaderTestCase(TestCase):
+    def setUp(self):
+        self.text = self.resource("seeya", "tests/fixtures/seeya_rs.json")
+        self.text = self.text.decode("utf-8")
+        self.expected = SeeyaSearchResponse.from_json(self.text)
+
+    def test_read(self):
+        reader = SeeyaSearchResponseReader.from_json(self.text)
+        self.assertIsNone(reader.groupOfSegments)
+
+        recommendations = reader.read()
+        first = next(recommendations)
+        result = self.expected.result
+        self.assertEqual(result.groupOfSegments, reader.groupOfSegments)
+        self.assertEqual(result.recommendations[0], first)
+        self.assertEqual(result.recommendations[1:], list(recommendations))
+        self.assertEqual(self.expected.transactionId, reader.transactionId)
+        self.assertIsNone(reader.error)
+
+    def test_read_with_recommendations_first(self):
+        data = json.loads(self.text)
+        result = data["result"]
+        data["result"] = dict(
+            recommendations=result["recommendations"],
+            groupOfSegments=result["groupOfSegments"],
+        )
+        reader = SeeyaSearchResponseReader(json.dumps([data]))
+
+        actual = list(reader.read())
+        self.assertEqual(self.expected.result.recommendations, actual)
+        self.assertEqual(
+            self.expected.result.groupOfSegments, reader.groupOfSegments
+        )
+
+    def test_read_with_error(self):
+        text = '{"transactionId": "1", "result": null, "error": "damn"}'
+        reader = SeeyaSearchResponseReader(text)
+
+        self.assertEqual([], list(reader.read()))
+        self.assertEqual("1", reader.transactionId)
+        self.assertEqual("damn", reader.error)
+        self.assertIsNone(reader.groupOfSegments)
@@ -0,0 +1,68 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from seeya.monitors import QueueMonitor
+
+
+def admin(*args):
+    result = Mock()
+    result.get_status.return_value = [
+        dict(task="seeya_webservice", queued=7, running=2, workers=2),
+        dict(task="other", queued=50, running=0, workers=1),
+    ]
+    return result
+
+
+class QueueMonitorTestCase(TestCase):
+    def setUp(self):
+        self.factory = Mock(side_effect=admin)
+        self.monitor = QueueMonitor(
+            ["a:1", "b:2"],
+            "seeya_webservice",
+            threshold=10,
+            interval=0.01,
+            timeout=0.05,
+            factory=self.factory,
+        )
+
+    def test_get_depth(self):
+        self.monitor.interval = 60
+        self.assertEqual(14, self.monitor.get_depth())
+        self.assertEqual(14, self.monitor.get_depth())
+        self.assertEqual(2, self.factory.call_count)
+        self.factory.assert_called_with(["b:2"])
+
+    @patch("seeya.monitors.logger.exception")
+    def test_read_with_errors(self, logger):
+        client = Mock()
+        client.get_status.side_effect = OSError("down")
+        self.factory.side_effect = lambda *args: client
+
+        self.assertEqual(0, self.monitor.read("a:1"))
+        logger.assert_called_once_with("OSError('down',)")
+        client.shutdown.assert_called_once_with()
+
+    def test_wait(self):
+        self.monitor.threshold = 100
+        self.assertLess(self.monitor.wait(), 0.05)
+        self.assertEqual(0, self.monitor.throttled)
+
+        self.monitor.threshold = 10
+        self.assertGreaterEqual(self.monitor.wait(), 0.05)
+        self.assertEqual(1, self.monitor.throttled)
+        self.assertEqual(dict(depth=14, throttled=1), self.monitor.stats())
+
+    def test_wait_async(self):
+        loop = asyncio.new_event_loop()
+        try:
+            waited = loop.run_until_complete(self.monitor.wait_async())
+            self.assertGreaterEqual(waited, 0.05)
+
+            self.monitor.threshold = 100
+            waited = loop.run_until_complete(self.monitor.wait_async())
+            self.assertLess(waited, 0.05)
+        finally:
+            loop.close()
+
+        self.assertEqual(1, self.monitor.throttled)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from seeya.payloads import PayloadCodec
+
+
+class PayloadCodecTestCase(TestCase):
+    def setUp(self):
+        self.text = '{"result": [%s]}' % ", ".join(["1"] * 500)
+
+    def test_encode(self):
+        codec = PayloadCodec("zlib", threshold=100)
+        payload = codec.encode(self.text)
+
+        self.assertTrue(payload.startswith("~zlib:"))
+        self.assertLess(len(payload), len(self.text) / 10)
+        self.assertEqual(self.text, PayloadCodec.decode(payload))
+        self.assertEqual("{}", codec.encode("{}"))
+
+        expected = dict(raw=len(self.text) + 2, sent=len(payload) + 2)
+        self.assertEqual(expected, codec.stats())
+
+    def test_encode_without_compression(self):
+        codec = PayloadCodec()
+        self.assertEqual(self.text, codec.encode(self.text))
+
+    def test_decode_plain(self):
+        self.assertEqual(self.text, PayloadCodec.decode(self.text))
+        self.assertEqual("~foo:bar", PayloadCodec.decode("~foo:bar"))
+        self.assertEqual("", PayloadCodec.decode(""))
+
+    def test_get_compression(self):
+        self.assertEqual("zlib", PayloadCodec.get_compression("~zlib:eJw="))
+        self.assertIsNone(PayloadCodec.get_compression("~lz4:foo"))
+        self.assertIsNone(PayloadCodec.get_compression(self.text))
+
+    def test_unknown_compression(self):
+        with self.assertRaisesRegex(ValueError, "Unknown compression `lz4`"):
+            PayloadCodec("lz4")
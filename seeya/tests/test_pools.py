@@ -0,0 +1,133 @@
+import socket
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from python3_gearman.errors import ConnectionError, ServerUnavailable
+
+from seeya.pools import GearmanPool, PoolExhausted
+
+
+def client(*args):
+    result = Mock()
+    result.connection_list = [Mock(connected=True)]
+    result.request_to_rotating_connection_queue = dict(foo="bar")
+    return result
+
+
+class GearmanPoolTestCase(TestCase):
+    def setUp(self):
+        self.factory = Mock(side_effect=client)
+        self.pool = GearmanPool(["localhost:4730"], factory=self.factory)
+
+    @patch.object(GearmanPool, "is_healthy", return_value=True)
+    def test_acquire_and_release(self, *args):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.assertIsNot(first, second)
+        self.factory.assert_called_with(["localhost:4730"])
+        first.establish_connection.assert_called_once_with(
+            first.connection_list[0]
+        )
+
+        self.pool.release(first)
+        self.assertEqual({}, first.request_to_rotating_connection_queue)
+        self.assertIs(first, self.pool.acquire())
+        self.assertEqual(2, self.factory.call_count)
+
+        expected = dict(size=20, open=2, idle=0, connects=2, failures=0)
+        self.assertEqual(expected, self.pool.stats())
+
+    @patch.object(GearmanPool, "is_healthy", return_value=False)
+    def test_acquire_drops_unhealthy_clients(self, *args):
+        first = self.pool.acquire()
+        self.pool.release(first)
+
+        self.assertIsNot(first, self.pool.acquire())
+        first.shutdown.assert_called_once_with()
+        self.assertEqual(1, self.pool.created)
+
+    def test_acquire_when_exhausted(self):
+        self.pool.size = 1
+        self.pool.timeout = 0.01
+        self.pool.acquire()
+        with self.assertRaises(PoolExhausted):
+            self.pool.acquire()
+
+    def test_connect_with_backoff(self):
+        def broken(*args):
+            result = client()
+            result.establish_connection.side_effect = ConnectionError
+            return result
+
+        self.factory.side_effect = broken
+        with self.assertRaises(ServerUnavailable):
+            self.pool.acquire()
+
+        self.assertEqual(0, self.pool.created)
+        self.assertEqual(1, self.pool.failures)
+        self.assertEqual(0.5, self.pool.delay)
+
+        with self.assertRaisesRegex(ServerUnavailable, "Reconnecting"):
+            self.pool.acquire()
+        self.assertEqual(1, self.factory.call_count)
+
+        self.pool.retry = 0
+        with self.assertRaises(ServerUnavailable):
+            self.pool.acquire()
+        self.assertEqual(1.0, self.pool.delay)
+
+        self.pool.retry = 0
+        self.factory.side_effect = client
+        self.pool.acquire()
+        self.assertEqual(0, self.pool.delay)
+
+    @patch.object(GearmanPool, "is_healthy", return_value=True)
+    def test_connection(self, *args):
+        with self.pool.connection() as first:
+            pass
+        self.assertEqual(1, len(self.pool.clients))
+
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as second:
+                raise ValueError()
+
+        self.assertIs(first, second)
+        second.shutdown.assert_called_once_with()
+        self.assertEqual(0, len(self.pool.clients))
+        self.assertEqual(0, self.pool.created)
+
+    @patch.object(GearmanPool, "is_healthy", return_value=True)
+    def test_evict(self, *args):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.pool.evict(self.pool.clients[0][1] + 60)
+        self.assertEqual(1, len(self.pool.clients))
+
+        self.pool.evict(self.pool.clients[0][1] + 61)
+        self.assertEqual(0, len(self.pool.clients))
+        first.shutdown.assert_called_once_with()
+
+    def test_is_healthy(self):
+        left, right = socket.socketpair()
+        try:
+            connection = Mock(connected=True, gearman_socket=left)
+            client = Mock(connection_list=[connection])
+            self.assertTrue(GearmanPool.is_healthy(client))
+
+            right.send(b"\0")
+            self.assertFalse(GearmanPool.is_healthy(client))
+
+            connection.connected = False
+            self.assertFalse(GearmanPool.is_healthy(client))
+        finally:
+            left.close()
+            right.close()
+
+    def test_clear(self):
+        with patch.object(GearmanPool, "is_healthy", return_value=True):
+            first = self.pool.acquire()
+        self.pool.release(first)
+        self.pool.clear()
+
+        first.shutdown.assert_called_once_with()
+        self.assertEqual(0, self.pool.created)
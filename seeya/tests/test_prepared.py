@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from seeya.models import (
+    SeeyaExcludedCarriers,
+    SeeyaLeg,
+    SeeyaMetadata,
+    SeeyaPassenger,
+    SeeyaSearchQuery,
+    SeeyaSearchRequest,
+)
+from seeya.prepared import SeeyaPreparedRequest, SeeyaRequestTemplate
+
+
+class SeeyaRequestTemplateTestCase(TestCase):
+    def setUp(self):
+        self.request = SeeyaSearchRequest(
+            metadata=SeeyaMetadata(market="GB", locale="en-GB"),
+            searchQuery=SeeyaSearchQuery(
+                direct=False,
+                preferredCarrier="",
+                currency="GBP",
+                recommendedCabinClass="M",
+                legs=[
+                    SeeyaLeg(
+                        dep="LON",
+                        arr="MEL",
+                        date="2018-09-09 00:00:00",
+                        excludedCarriers=SeeyaExcludedCarriers(),
+                    )
+                ],
+                passengers=[SeeyaPassenger(count=1, type="adults")],
+            ),
+        )
+        self.template = SeeyaRequestTemplate(self.request)
+
+    def expected(self, transaction="1234", provider="kiwi"):
+        request = self.request.copy(transactionId=transaction)
+        request.provider = provider
+        return request
+
+    def test_prepare(self):
+        actual = self.template.prepare("kiwi", 1234)
+
+        self.assertIsInstance(actual, SeeyaPreparedRequest)
+        self.assertEqual("1234", actual.transactionId)
+        self.assertEqual("flights.kiwi.search", actual.method)
+        self.assertEqual("kiwi", actual.provider)
+        self.assertIs(self.request.searchQuery, actual.searchQuery)
+        self.assertEqual(self.expected(), actual)
+        self.assertEqual(actual, self.expected())
+        self.assertNotEqual(self.expected(provider="petas"), actual)
+
+    def test_to_json(self):
+        for provider in ("kiwi", "petas"):
+            actual = self.template.prepare(provider, "12-34")
+            expected = self.expected("12-34", provider)
+
+            self.assertEqual(
+                expected.to_json(indent=None), actual.to_json(None)
+            )
+            self.assertEqual(
+                expected.to_json(indent=None, sort_keys=True),
+                actual.to_json(indent=None, sort_keys=True),
+            )
+            self.assertEqual(expected.to_json(), actual.to_json())
+
+    def test_copy(self):
+        prepared = self.template.prepare("kiwi", "1234")
+
+        actual = prepared.copy(transactionId=None)
+        self.assertIsInstance(actual, SeeyaPreparedRequest)
+        self.assertEqual("", actual.transactionId)
+        self.assertEqual("1234", prepared.transactionId)
+
+        actual = prepared.copy(pcc="foo")
+        self.assertIsInstance(actual, SeeyaSearchRequest)
+        self.assertEqual(self.expected().copy(pcc="foo"), actual)
@@ -0,0 +1,174 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from python3_gearman.constants import PRIORITY_HIGH
+from python3_gearman.errors import ServerUnavailable
+from python3_gearman.protocol import (
+    GEARMAN_COMMAND_ERROR,
+    GEARMAN_COMMAND_JOB_CREATED,
+    GEARMAN_COMMAND_SUBMIT_JOB,
+    GEARMAN_COMMAND_SUBMIT_JOB_HIGH,
+    GEARMAN_COMMAND_WORK_COMPLETE,
+    GEARMAN_COMMAND_WORK_EXCEPTION,
+    GEARMAN_COMMAND_WORK_FAIL,
+    pack_binary_command,
+    parse_binary_command,
+)
+
+from seeya.protocol import AsyncGearmanClient, GearmanProtocol, JobFailed
+
+
+def response(cmd_type, **kwargs):
+    return pack_binary_command(cmd_type, kwargs, is_response=True)
+
+
+class GearmanProtocolTestCase(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.transport = Mock()
+        self.protocol = GearmanProtocol(self.loop)
+        self.protocol.connection_made(self.transport)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_submit(self):
+        future = self.protocol.submit("queue", "data")
+        self.assertFalse(future.done())
+        self.assertEqual(1, self.protocol.pending)
+
+        packet = self.transport.write.call_args[0][0]
+        cmd_type, cmd_args, _ = parse_binary_command(packet, False)
+        self.assertEqual(GEARMAN_COMMAND_SUBMIT_JOB, cmd_type)
+        self.assertEqual("queue", cmd_args["task"])
+        self.assertEqual("data", cmd_args["data"])
+        self.assertRegex(cmd_args["unique"], "^[a-f\d]{32}$")
+
+        self.protocol.submit("queue", "data", priority=PRIORITY_HIGH)
+        packet = self.transport.write.call_args[0][0]
+        cmd_type, _, _ = parse_binary_command(packet, False)
+        self.assertEqual(GEARMAN_COMMAND_SUBMIT_JOB_HIGH, cmd_type)
+
+    def test_submit_when_closed(self):
+        self.protocol.connection_lost(None)
+        with self.assertRaises(ServerUnavailable):
+            self.protocol.submit("queue", "data")
+
+    def test_data_received(self):
+        first = self.protocol.submit("queue", "a")
+        second = self.protocol.submit("queue", "b")
+        third = self.protocol.submit("queue", "c")
+
+        data = b"".join(
+            [
+                response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:1"),
+                response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:2"),
+                response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:3"),
+                response(GEARMAN_COMMAND_WORK_FAIL, job_handle="H:2"),
+                response(
+                    GEARMAN_COMMAND_WORK_EXCEPTION, job_handle="H:3", data="!"
+                ),
+                response(
+                    GEARMAN_COMMAND_WORK_COMPLETE, job_handle="H:1", data="{}"
+                ),
+            ]
+        )
+
+        self.protocol.data_received(data[:10])
+        self.assertEqual(3, len(self.protocol.submitted))
+
+        self.protocol.data_received(data[10:])
+        self.assertEqual(0, self.protocol.pending)
+        self.assertEqual(b"", self.protocol.buffer)
+        self.assertEqual("{}", first.result())
+        self.assertIsInstance(second.exception(), JobFailed)
+        self.assertEqual("!", str(third.exception()))
+
+    def test_data_received_for_cancelled_jobs(self):
+        future = self.protocol.submit("queue", "a")
+        future.cancel()
+
+        self.protocol.data_received(
+            response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:1")
+            + response(
+                GEARMAN_COMMAND_WORK_COMPLETE, job_handle="H:1", data="{}"
+            )
+        )
+        self.assertEqual(0, self.protocol.pending)
+
+    @patch("seeya.protocol.logger.error")
+    def test_data_received_with_error(self, logger):
+        future = self.protocol.submit("queue", "a")
+        self.protocol.data_received(
+            response(GEARMAN_COMMAND_ERROR, error_code="1", error_text="no")
+        )
+
+        self.assertEqual("no", str(future.exception()))
+        logger.assert_called_once_with("Gearman error: no")
+
+    def test_connection_lost(self):
+        first = self.protocol.submit("queue", "a")
+        second = self.protocol.submit("queue", "b")
+        self.protocol.data_received(
+            response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:1")
+        )
+
+        self.protocol.connection_lost(ConnectionResetError())
+        self.assertEqual(0, self.protocol.pending)
+        self.assertIsNone(self.protocol.transport)
+        self.assertIsInstance(first.exception(), ServerUnavailable)
+        self.assertIsInstance(second.exception(), ServerUnavailable)
+
+
+class AsyncGearmanClientTestCase(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncGearmanClient("localhost:4730", loop=self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_connect(self):
+        async def create_connection(factory, host, port):
+            protocol = factory()
+            protocol.connection_made(Mock())
+            return protocol.transport, protocol
+
+        with patch.object(self.loop, "create_connection") as connect:
+            connect.side_effect = create_connection
+            first = self.loop.run_until_complete(self.client.connect())
+            second = self.loop.run_until_complete(self.client.connect())
+
+            self.assertIsInstance(first, GearmanProtocol)
+            self.assertIs(first, second)
+            self.assertEqual(1, connect.call_count)
+            self.assertEqual(("localhost", 4730), connect.call_args[0][1:])
+
+            first.connection_lost(None)
+            third = self.loop.run_until_complete(self.client.connect())
+            self.assertIsNot(first, third)
+
+            self.client.shutdown()
+            third.transport.close.assert_called_once_with()
+
+    def test_submit_job(self):
+        protocol = GearmanProtocol(self.loop)
+        protocol.connection_made(Mock())
+
+        async def connect():
+            return protocol
+
+        async def submit():
+            task = self.loop.create_task(self.client.submit_job("q", "d"))
+            await asyncio.sleep(0)
+            protocol.data_received(
+                response(GEARMAN_COMMAND_JOB_CREATED, job_handle="H:1")
+                + response(
+                    GEARMAN_COMMAND_WORK_COMPLETE, job_handle="H:1", data="ok"
+                )
+            )
+            return await task
+
+        with patch.object(self.client, "connect", side_effect=connect):
+            self.assertEqual("ok", self.loop.run_until_complete(submit()))
@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import Future
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from python3_gearman.constants import (
+    JOB_COMPLETE,
+    JOB_CREATED,
+    JOB_FAILED,
+    JOB_UNKNOWN,
+    PRIORITY_HIGH,
+    PRIORITY_NONE,
+)
+from python3_gearman.errors import ServerUnavailable
+from rx.core import Observable
+
+from seeya.management.commands.benchmark_gearman import EchoServer
+from seeya.protocol import JobFailed
+from seeya.reactors import GearmanReactor
+
+
+class GearmanReactorTestCase(TestCase):
+    def setUp(self):
+        self.client = Mock()
+        self.reactor = GearmanReactor(["localhost:4730"], factory=self.client)
+
+    def test_submit(self):
+        server = EchoServer()
+        with server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            reactor = GearmanReactor([server.host])
+            try:
+                futures = [reactor.submit("echo", str(i)) for i in range(20)]
+                actual = [f.result(timeout=5) for f in futures]
+                observable = Observable.from_future(
+                    reactor.submit("echo", "rx")
+                )
+                self.assertEqual(
+                    ["rx"], list(observable.to_blocking().to_iterable())
+                )
+            finally:
+                reactor.stop()
+                reactor.thread.join(5)
+                server.shutdown()
+                thread.join()
+
+        self.assertEqual([str(i) for i in range(20)], actual)
+        self.assertEqual(1, server.connections)
+        self.assertIsNone(reactor.thread)
+        self.assertIsNone(reactor.client)
+
+    @patch.object(GearmanReactor, "start")
+    def test_dispatch(self, *args):
+        first = self.reactor.submit("echo", "a", PRIORITY_HIGH)
+        second = self.reactor.submit("echo", "b")
+        requests = [
+            Mock(state=JOB_CREATED, timed_out=False),
+            Mock(state=JOB_COMPLETE),
+        ]
+        submit = self.client.return_value.submit_multiple_jobs
+        submit.return_value = requests
+
+        self.reactor.dispatch(self.reactor.collect())
+
+        submit.assert_called_once_with(
+            [
+                dict(task="echo", data="a", priority=PRIORITY_HIGH),
+                dict(task="echo", data="b", priority=PRIORITY_NONE),
+            ],
+            background=False,
+            wait_until_complete=False,
+        )
+        self.assertFalse(first.done())
+        self.assertEqual(requests[1].result, second.result())
+        self.assertEqual({requests[0]: first}, self.reactor.pending)
+
+    @patch("seeya.reactors.logger.exception")
+    @patch.object(GearmanReactor, "start")
+    def test_dispatch_with_errors(self, start, logger):
+        future = self.reactor.submit("echo", "a")
+        submit = self.client.return_value.submit_multiple_jobs
+        submit.side_effect = ServerUnavailable("oops")
+
+        self.reactor.dispatch(self.reactor.collect())
+
+        self.assertIsInstance(future.exception(), ServerUnavailable)
+        self.assertIsNone(self.reactor.client)
+        self.client.return_value.shutdown.assert_called_once_with()
+
+    def test_resolve(self):
+        futures = [Future() for _ in range(4)]
+        requests = [
+            Mock(state=JOB_FAILED, exception="bad"),
+            Mock(state=JOB_UNKNOWN),
+            Mock(state=JOB_CREATED, timed_out=True),
+            Mock(state=JOB_CREATED, timed_out=False),
+        ]
+        self.reactor.pending = dict(zip(requests, futures))
+        self.reactor.resolve()
+
+        self.assertIsInstance(futures[0].exception(), JobFailed)
+        self.assertIsInstance(futures[1].exception(), ServerUnavailable)
+        self.assertIsInstance(futures[2].exception(), ServerUnavailable)
+        self.assertFalse(futures[3].done())
+        self.assertEqual([requests[3]], list(self.reactor.pending))
+
+    @patch("seeya.reactors.logger.exception")
+    def test_poll_with_errors(self, logger):
+        future = Future()
+        self.reactor.get_client()
+        self.reactor.pending = {Mock(): future}
+        poll = self.client.return_value.poll_connections_until_stopped
+        poll.side_effect = ServerUnavailable("gone")
+
+        self.reactor.poll()
+
+        self.assertIsInstance(future.exception(), ServerUnavailable)
+        self.assertEqual({}, self.reactor.pending)
+        self.assertIsNone(self.reactor.client)
+
+    def test_settle(self):
+        future = Future()
+        future.cancel()
+        GearmanReactor.settle(future, result="foo")
+        self.assertTrue(future.cancelled())
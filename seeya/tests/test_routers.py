@@ -0,0 +1,88 @@
+import time
+from collections import Counter
+from unittest import TestCase
+
+from python3_gearman.errors import ServerUnavailable
+
+from seeya.routers import ServerRouter
+
+hosts = ["a:4730", "b:4730", "c:4730"]
+
+
+class ServerRouterTestCase(TestCase):
+    def test_init(self):
+        router = ServerRouter(hosts, replicas=10)
+        self.assertEqual(30, len(router.ring))
+        self.assertEqual(sorted(router.keys), router.keys)
+
+        with self.assertRaises(ValueError):
+            ServerRouter(hosts, strategy="random")
+
+    def test_route_with_hash(self):
+        router = ServerRouter(hosts)
+        actual = router.route("kiwi")
+
+        self.assertEqual(sorted(hosts), sorted(actual))
+        self.assertEqual(actual, router.route("kiwi"))
+
+        keys = ["provider-{}".format(i) for i in range(300)]
+        counts = Counter(router.route(key)[0] for key in keys)
+        self.assertEqual(set(hosts), set(counts))
+        self.assertTrue(all(x > 50 for x in counts.values()))
+
+    def test_route_with_hash_is_consistent(self):
+        keys = ["provider-{}".format(i) for i in range(300)]
+        before = ServerRouter(hosts)
+        after = ServerRouter(hosts + ["d:4730"])
+
+        moved = [k for k in keys if before.route(k)[0] != after.route(k)[0]]
+        self.assertTrue(all(after.route(k)[0] == "d:4730" for k in moved))
+        self.assertLess(len(moved), 150)
+
+    def test_route_with_least_loaded(self):
+        router = ServerRouter(hosts, strategy="least_loaded")
+        router.servers["a:4730"].inflight = 3
+        router.servers["b:4730"].inflight = 1
+        self.assertEqual(["c:4730", "b:4730", "a:4730"], router.route("kiwi"))
+
+    def test_route_skips_servers_down(self):
+        router = ServerRouter(hosts)
+        first = router.route("kiwi")[0]
+        router.servers[first].down_until = time.time() + 10
+        self.assertEqual(first, router.route("kiwi")[-1])
+
+        router.servers[first].down_until = time.time() - 1
+        self.assertEqual(first, router.route("kiwi")[0])
+
+    def test_track(self):
+        router = ServerRouter(hosts, cooldown=10)
+        server = router.servers["a:4730"]
+        with router.track("a:4730"):
+            self.assertEqual(1, server.inflight)
+
+        self.assertEqual(0, server.inflight)
+        self.assertEqual(1, server.jobs)
+
+        with self.assertRaises(ServerUnavailable):
+            with router.track("a:4730"):
+                raise ServerUnavailable()
+
+        self.assertEqual(1, server.failures)
+        self.assertFalse(server.is_up(time.time()))
+
+        with self.assertRaises(ValueError):
+            with router.track("a:4730"):
+                raise ValueError()
+        self.assertEqual(1, server.failures)
+
+        with router.track("a:4730"):
+            pass
+        self.assertTrue(server.is_up(time.time()))
+
+    def test_stats(self):
+        router = ServerRouter(hosts[:1])
+        router.servers["a:4730"].down_until = time.time() + 10
+        expected = {
+            "a:4730": dict(state="down", inflight=0, jobs=0, failures=0)
+        }
+        self.assertEqual(expected, router.stats())
@@ -1,15 +1,24 @@
-import os
+import asyncio
+import shutil
+import tempfile
+from concurrent.futures import Future
 from unittest import TestCase
 from unittest.mock import patch, MagicMock, Mock
 
 from attr import attrs
-from pkg_resources import resource_filename
-from python3_gearman import GearmanClient
+from django.test import override_settings
 from python3_gearman.errors import ServerUnavailable
 
 from mule.models import Serializable
-from seeya.models import SeeyaRequest
+from seeya.models import JobPriority, SeeyaConversation, SeeyaRequest
+from seeya.monitors import QueueMonitor
+from seeya.payloads import PayloadCodec
+from seeya.pools import GearmanPool
+from seeya.reactors import GearmanReactor
+from seeya.routers import ServerRouter
+from seeya.protocol import AsyncGearmanClient
 from seeya.services import SeeyaClient
+from seeya.writers import ConversationWriter
 
 
 @attrs(auto_attribs=True)
@@ -27,12 +36,11 @@ class SeeyaClientTestCase(TestCase):
         self.client = SeeyaClient()
 
     @patch.object(SeeyaClient, "log_conversation")
-    @patch.object(GearmanClient, "shutdown")
-    @patch.object(GearmanClient, "submit_job")
-    @patch.object(GearmanClient, "__init__", return_value=None)
-    def test_send(self, client_init, submit, shutdown, log_conversation):
+    @patch.object(SeeyaClient, "get_pool")
+    def test_send(self, get_pool, log_conversation):
         job = GearmanJobRequest(result='{"foo": "bar"}')
-        submit.return_value = job
+        client = get_pool.return_value.connection.return_value.__enter__()
+        client.submit_job.return_value = job
         request = SeeyaRequest(transactionId="1234")
 
         expected = SeeyaTestResponse("bar")
@@ -40,25 +48,251 @@ class SeeyaClientTestCase(TestCase):
             expected, self.client.send(request, SeeyaTestResponse)
         )
 
-        client_init.assert_called_once_with(["localhost:4730"])
-        submit.assert_called_once_with(
-            "seeya_webservice", request.to_json(), background=False
+        get_pool.assert_called_once_with("localhost:4730")
+        client.submit_job.assert_called_once_with(
+            "seeya_webservice",
+            request.to_json(indent=None),
+            priority=None,
+            background=False,
+        )
+        log_conversation.assert_called_once_with(
+            request, job.result, request.to_json(indent=None)
+        )
+
+    @patch.object(SeeyaClient, "log_conversation")
+    @patch.object(SeeyaClient, "call")
+    @patch.object(SeeyaClient, "codec", PayloadCodec("zlib", threshold=0))
+    def test_send_with_compression(self, call, log_conversation):
+        codec = PayloadCodec("zlib", threshold=0)
+        call.return_value = codec.encode('{"foo": "bar"}')
+        request = SeeyaRequest(transactionId="1234")
+
+        actual = self.client.send(request, SeeyaTestResponse)
+
+        self.assertEqual(SeeyaTestResponse("bar"), actual)
+        payload = call.call_args[0][1]
+        self.assertEqual("zlib", PayloadCodec.get_compression(payload))
+        self.assertEqual(
+            request.to_json(indent=None), PayloadCodec.decode(payload)
+        )
+        log_conversation.assert_called_once_with(
+            request, '{"foo": "bar"}', request.to_json(indent=None)
         )
-        log_conversation.assert_called_once_with(request, job.result)
-        shutdown.assert_called_once()
 
-    @patch.object(GearmanClient, "shutdown")
-    @patch.object(GearmanClient, "submit_job", side_effect=ServerUnavailable)
-    @patch.object(GearmanClient, "__init__", return_value=None)
-    def test_send_with_side_effect(self, client_init, submit, shutdown):
+    @patch("seeya.services.logger.warning")
+    @patch.object(GearmanPool, "release")
+    @patch.object(GearmanPool, "acquire")
+    @patch.object(SeeyaClient, "router", ServerRouter(["localhost:4730"]))
+    @patch.object(SeeyaClient, "pools", dict())
+    def test_send_with_side_effect(self, acquire, release, logger):
+        acquire.return_value.submit_job.side_effect = ServerUnavailable
         request = SeeyaRequest(transactionId="1234")
         with self.assertRaises(ServerUnavailable):
             self.client.send(request, SeeyaTestResponse)
 
-        client_init.assert_called_once_with(["localhost:4730"])
-        shutdown.assert_called_once()
+        release.assert_called_once_with(acquire.return_value, healthy=False)
+        self.assertEqual(
+            1, SeeyaClient.router.servers["localhost:4730"].failures
+        )
+
+    @patch("seeya.services.logger.warning")
+    @patch.object(SeeyaClient, "log_conversation")
+    @patch.object(SeeyaClient, "call")
+    @patch.object(SeeyaClient, "router", ServerRouter(["a:1", "b:2"]))
+    def test_send_with_failover(self, call, log_conversation, logger):
+        call.side_effect = [ServerUnavailable("down"), '{"foo": "bar"}']
+        request = SeeyaRequest(transactionId="1234")
+        hosts = SeeyaClient.router.route(request.provider)
+
+        actual = self.client.send(request, SeeyaTestResponse)
+
+        self.assertEqual(SeeyaTestResponse("bar"), actual)
+        call.assert_any_call(
+            hosts[0], request.to_json(indent=None), JobPriority.NORMAL
+        )
+        call.assert_called_with(
+            hosts[1], request.to_json(indent=None), JobPriority.NORMAL
+        )
+        self.assertEqual(hosts[::-1], SeeyaClient.router.route(None))
+        logger.assert_called_once_with(
+            "Gearman server {} failed: ServerUnavailable('down',)".format(
+                hosts[0]
+            )
+        )
+
+    @override_settings(SEEYA_REACTOR=True)
+    @patch.object(SeeyaClient, "get_reactor")
+    def test_call_with_reactor(self, get_reactor):
+        future = Future()
+        future.set_result('{"foo": "bar"}')
+        get_reactor.return_value.submit.return_value = future
+
+        actual = self.client.call(
+            "localhost:4730", "workload", JobPriority.HIGH
+        )
+        self.assertEqual('{"foo": "bar"}', actual)
+        get_reactor.assert_called_once_with("localhost:4730")
+        get_reactor.return_value.submit.assert_called_once_with(
+            "seeya_webservice", "workload", "HIGH"
+        )
+
+    @override_settings(
+        SEEYA_SERVERS=["a:1", "b:2"],
+        SEEYA_ROUTING=dict(strategy="least_loaded"),
+    )
+    @patch.object(SeeyaClient, "router", None)
+    def test_get_router(self):
+        router = self.client.get_router()
+        self.assertIsInstance(router, ServerRouter)
+        self.assertIs(router, self.client.get_router())
+        self.assertEqual(["a:1", "b:2"], router.hosts)
+        self.assertEqual("least_loaded", router.strategy)
+
+    @override_settings(SEEYA_REACTOR_INTERVAL=0.1)
+    @patch.object(SeeyaClient, "reactors", dict())
+    def test_get_reactor(self):
+        reactor = self.client.get_reactor("a:1")
+        self.assertIsInstance(reactor, GearmanReactor)
+        self.assertIs(reactor, self.client.get_reactor("a:1"))
+        self.assertIsNot(reactor, self.client.get_reactor("b:2"))
+        self.assertEqual(["a:1"], reactor.hosts)
+        self.assertEqual(0.1, reactor.interval)
+
+    @override_settings(SEEYA_POOL=dict(size=3))
+    @patch.object(SeeyaClient, "pools", dict())
+    def test_get_pool(self):
+        pool = self.client.get_pool("a:1")
+        self.assertIsInstance(pool, GearmanPool)
+        self.assertIs(pool, self.client.get_pool("a:1"))
+        self.assertIsNot(pool, self.client.get_pool("b:2"))
+        self.assertEqual(["a:1"], pool.hosts)
+        self.assertEqual(3, pool.size)
+
+    @patch.object(SeeyaClient, "monitor", Mock(QueueMonitor))
+    def test_throttle(self):
+        self.assertEqual(0, self.client.throttle(JobPriority.HIGH))
+        self.assertEqual(0, self.client.throttle(JobPriority.NORMAL))
+        self.assertFalse(SeeyaClient.monitor.wait.called)
+
+        SeeyaClient.monitor.wait.return_value = 1.5
+        self.assertEqual(1.5, self.client.throttle(JobPriority.LOW))
+
+    @patch.object(SeeyaClient, "monitor", Mock(QueueMonitor))
+    def test_throttle_async(self):
+        SeeyaClient.monitor.wait_async.side_effect = asyncio.coroutine(
+            lambda: 1.5
+        )
+        loop = asyncio.new_event_loop()
+        try:
+            high = loop.run_until_complete(
+                self.client.throttle_async(JobPriority.HIGH)
+            )
+            low = loop.run_until_complete(
+                self.client.throttle_async(JobPriority.LOW)
+            )
+        finally:
+            loop.close()
+
+        self.assertEqual(0, high)
+        self.assertEqual(1.5, low)
+        SeeyaClient.monitor.wait_async.assert_called_once_with()
+
+    @override_settings(
+        SEEYA_SERVERS=["a:1", "b:2"], SEEYA_THROTTLE=dict(threshold=5)
+    )
+    @patch.object(SeeyaClient, "monitor", None)
+    def test_get_monitor(self):
+        monitor = self.client.get_monitor()
+        self.assertIsInstance(monitor, QueueMonitor)
+        self.assertIs(monitor, self.client.get_monitor())
+        self.assertEqual(["a:1", "b:2"], monitor.hosts)
+        self.assertEqual("seeya_webservice", monitor.queue)
+        self.assertEqual(5, monitor.threshold)
+
+    @patch.object(SeeyaClient, "log_conversation")
+    @patch.object(SeeyaClient, "get_async_client")
+    def test_send_async(self, get_async_client, log_conversation):
+        loop = asyncio.new_event_loop()
+        client = get_async_client.return_value
+        client.submit_job.side_effect = asyncio.coroutine(
+            lambda *args: '{"foo": "bar"}'
+        )
+        request = SeeyaRequest(transactionId="1234")
+
+        try:
+            actual = loop.run_until_complete(
+                self.client.send_async(request, SeeyaTestResponse)
+            )
+        finally:
+            loop.close()
+
+        self.assertEqual(SeeyaTestResponse("bar"), actual)
+        get_async_client.assert_called_once_with(loop, "localhost:4730")
+        client.submit_job.assert_called_once_with(
+            "seeya_webservice", request.to_json(indent=None), None
+        )
+        log_conversation.assert_called_once_with(
+            request, '{"foo": "bar"}', request.to_json(indent=None)
+        )
+
+    @patch("seeya.services.logger.warning")
+    @patch.object(SeeyaClient, "log_conversation")
+    @patch.object(SeeyaClient, "get_async_client")
+    @patch.object(SeeyaClient, "router", ServerRouter(["a:1", "b:2"]))
+    def test_send_async_with_failover(self, get_async_client, *args):
+        async def submit_job(*args):
+            raise ConnectionRefusedError()
+
+        loop = asyncio.new_event_loop()
+        get_async_client.return_value.submit_job.side_effect = submit_job
+        request = SeeyaRequest(transactionId="1234")
+
+        try:
+            with self.assertRaises(ConnectionRefusedError):
+                loop.run_until_complete(
+                    self.client.send_async(request, SeeyaTestResponse)
+                )
+        finally:
+            loop.close()
+
+        self.assertEqual(2, get_async_client.call_count)
+        stats = SeeyaClient.router.stats()
+        self.assertEqual(
+            ["down", "down"], [x["state"] for x in stats.values()]
+        )
+
+    def test_get_async_client(self):
+        loop = asyncio.new_event_loop()
+        try:
+            client = self.client.get_async_client(loop, "localhost:4730")
+            self.assertIsInstance(client, AsyncGearmanClient)
+            self.assertIs(
+                client, self.client.get_async_client(loop, "localhost:4730")
+            )
+            self.assertEqual("localhost:4730", client.host)
+            self.assertIs(loop, client.loop)
+        finally:
+            SeeyaClient.async_clients.pop((loop, "localhost:4730"))
+            loop.close()
+
+    @patch.object(SeeyaClient, "pools", dict(b=Mock(), a=Mock()))
+    @patch.object(SeeyaClient, "router", ServerRouter(["a:1"]))
+    @patch.object(SeeyaClient, "monitor", Mock(QueueMonitor))
+    @patch.object(SeeyaClient, "writer", Mock(ConversationWriter))
+    def test_stats(self):
+        SeeyaClient.pools["a"].stats.return_value = "a"
+        SeeyaClient.pools["b"].stats.return_value = "b"
+        SeeyaClient.monitor.stats.return_value = "queue"
+        SeeyaClient.writer.stats.return_value = "log"
+        actual = self.client.stats()
+
+        self.assertEqual(dict(a="a", b="b"), actual["pools"])
+        self.assertEqual(["a:1"], list(actual["servers"]))
+        self.assertEqual("queue", actual["queue"])
+        self.assertEqual("log", actual["log"])
 
     @patch("time.time", MagicMock(return_value=12345))
+    @patch.object(SeeyaClient, "writer", None)
     def test_log_conversation(self):
         request = SeeyaRequest(transactionId="1234")
         request.MODAL = "train"
@@ -66,22 +300,61 @@ class SeeyaClientTestCase(TestCase):
         request.provider = "python"
         response = '{"foo": "bar"}'
 
-        path = resource_filename("seeya", "data/logs/python/")
-        filepath = "{}{}".format(path, "12345000_train.python.fly_1234")
-        req_path = "{}_{}.json".format(filepath, "request")
-        res_path = "{}_{}.json".format(filepath, "response")
-
+        path = tempfile.mkdtemp()
         try:
-            self.client.log_conversation(request, response)
-            with open(req_path, mode="r") as f:
-                self.assertEqual(request.to_json(), f.read())
+            with override_settings(SEEYA_ARCHIVE=dict(path=path)):
+                self.client.log_conversation(request, response)
+                self.client.get_writer().flush()
 
-            with open(res_path, mode="r") as f:
-                self.assertEqual(response, f.read())
+            expected = SeeyaConversation(
+                transactionId="1234",
+                timestamp=12345000,
+                provider="python",
+                method="train.python.fly",
+                request=request.to_json(),
+                response=response,
+            )
+            actual = self.client.writer.archive.find("1234")
+            self.assertEqual([expected], actual)
         finally:
-            os.remove(req_path)
-            os.remove(res_path)
-            os.rmdir(path)
+            shutil.rmtree(path)
+
+    @patch("time.time", MagicMock(return_value=12345))
+    @patch.object(SeeyaClient, "writer", Mock(ConversationWriter))
+    def test_log_conversation_with_workload(self):
+        request = SeeyaRequest(transactionId="1234")
+        request.MODAL = "train"
+        request.ACTION = "fly"
+        request.provider = "python"
+        self.client.log_conversation(request, "response", "workload")
+
+        conversation = SeeyaClient.writer.submit.call_args[0][0]
+        self.assertEqual("workload", conversation.request)
+        self.assertEqual("response", conversation.response)
+        self.assertEqual(12345000, conversation.timestamp)
+
+    @override_settings(SEEYA_PAYLOAD=dict(compression="zlib", threshold=10))
+    @patch.object(SeeyaClient, "codec", None)
+    def test_get_codec(self):
+        codec = self.client.get_codec()
+        self.assertIsInstance(codec, PayloadCodec)
+        self.assertIs(codec, self.client.get_codec())
+        self.assertEqual("zlib", codec.compression)
+        self.assertEqual(10, codec.threshold)
+
+    @override_settings(
+        SEEYA_LOG=dict(rate=0.5, size=10),
+        SEEYA_ARCHIVE=dict(path="/tmp/archive", segment_size=100),
+    )
+    @patch.object(SeeyaClient, "writer", None)
+    def test_get_writer(self):
+        writer = self.client.get_writer()
+        self.assertIsInstance(writer, ConversationWriter)
+        self.assertIs(writer, self.client.get_writer())
+        self.assertEqual(0.5, writer.rate)
+        self.assertEqual(10, writer.queue.maxsize)
+        self.assertEqual("/tmp/archive", writer.archive.path)
+        self.assertEqual(100, writer.archive.segment_size)
 
     @patch("time.time", Mock(side_effect=Exception("time went wrong")))
     @patch("seeya.services.logger.exception")
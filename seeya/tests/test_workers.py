@@ -0,0 +1,122 @@
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+
+from seeya.archives import ConversationArchive
+from seeya.models import SeeyaConversation, SeeyaSearchResponse
+from seeya.payloads import PayloadCodec
+from seeya.workers import ProviderProfile, Recordings, StandIn
+
+
+def request(provider: str, transaction: str, currency="EUR") -> str:
+    return json.dumps(
+        dict(
+            metadata=None,
+            transactionId=transaction,
+            pcc=None,
+            method="flights.{}.search".format(provider),
+            searchQuery=dict(currency=currency),
+        ),
+        indent=4,
+    )
+
+
+def response(name: str) -> str:
+    return json.dumps(dict(transactionId="old", result=None, error=name))
+
+
+class ProviderProfileTestCase(TestCase):
+    def test_get_latency(self):
+        self.assertEqual(0, ProviderProfile(median=0).get_latency())
+
+        profile = ProviderProfile(median=0.2, sigma=0)
+        self.assertAlmostEqual(0.2, profile.get_latency())
+
+    @patch("seeya.workers.random.random", side_effect=[0.05, 0.2])
+    def test_is_error(self, *args):
+        profile = ProviderProfile(errors=0.1)
+        self.assertTrue(profile.is_error())
+        self.assertFalse(profile.is_error())
+
+
+class RecordingsTestCase(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.recordings = Recordings()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_find_from_fixtures(self):
+        self.assertIsNone(self.recordings.find("kiwi", request("kiwi", "1")))
+
+        fixture = resource_filename("seeya", "tests/fixtures/seeya_rs.json")
+        self.recordings.load_fixture(fixture)
+        with open(fixture) as f:
+            expected = f.read()
+
+        self.assertEqual(1, len(self.recordings))
+        self.assertEqual(expected, self.recordings.find("kiwi", "{}"))
+
+    def test_find_from_archive(self):
+        ConversationArchive(self.path).append(
+            [
+                SeeyaConversation(
+                    transactionId=str(index),
+                    timestamp=index,
+                    provider="kiwi",
+                    method="flights.kiwi.search",
+                    request=request("kiwi", str(index), currency),
+                    response=response(currency),
+                )
+                for index, currency in enumerate(["EUR", "GBP"])
+            ]
+        )
+        self.recordings.load_archive(self.path)
+        self.assertEqual(2, len(self.recordings))
+
+        actual = self.recordings.find("kiwi", request("kiwi", "9", "GBP"))
+        self.assertEqual(response("GBP"), actual)
+
+        actual = self.recordings.find("kiwi", request("kiwi", "9", "USD"))
+        self.assertIn(actual, [response("EUR"), response("GBP")])
+        self.assertIsNone(self.recordings.find("petas", "{}"))
+
+
+class StandInTestCase(TestCase):
+    def setUp(self):
+        fixture = resource_filename("seeya", "tests/fixtures/seeya_rs.json")
+        recordings = Recordings()
+        recordings.load_fixture(fixture)
+        self.stand_in = StandIn(
+            recordings,
+            dict(kiwi=ProviderProfile(median=0, errors=1)),
+            ProviderProfile(median=0),
+        )
+
+    def test_handle(self):
+        actual = self.stand_in.handle(request("petas", "1234"))
+        response = SeeyaSearchResponse.from_json(actual)
+
+        self.assertEqual("1234", response.transactionId)
+        self.assertEqual("1234", response.result.transactionId)
+        self.assertEqual(dict(jobs=1, errors=0), self.stand_in.stats())
+
+    def test_handle_with_error(self):
+        actual = json.loads(self.stand_in.handle(request("kiwi", "1234")))
+
+        expected = dict(transactionId="1234", result=None, error=StandIn.ERROR)
+        self.assertEqual(expected, actual)
+        self.assertEqual(dict(jobs=1, errors=1), self.stand_in.stats())
+
+    def test_handle_with_compression(self):
+        codec = PayloadCodec("zlib", threshold=0)
+        actual = self.stand_in.handle(codec.encode(request("petas", "1234")))
+
+        self.assertEqual("zlib", PayloadCodec.get_compression(actual))
+        response = SeeyaSearchResponse.from_json(PayloadCodec.decode(actual))
+        self.assertEqual("1234", response.transactionId)
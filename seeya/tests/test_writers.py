@@ -0,0 +1,70 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from seeya.archives import ConversationArchive
+from seeya.models import SeeyaConversation
+from seeya.writers import ConversationWriter
+
+
+def conversation(transaction: str) -> SeeyaConversation:
+    return SeeyaConversation(
+        transactionId=transaction,
+        timestamp=1,
+        provider="kiwi",
+        method="flights.kiwi.search",
+        request="{}",
+        response="{}",
+    )
+
+
+class ConversationWriterTestCase(TestCase):
+    def setUp(self):
+        self.archive = Mock(ConversationArchive)
+        self.writer = ConversationWriter(self.archive, size=2, batch=10)
+
+    def test_submit(self):
+        first = conversation("1")
+        second = conversation("2")
+        with patch.object(ConversationWriter, "start"):
+            self.assertTrue(self.writer.submit(first))
+            self.assertTrue(self.writer.submit(second))
+
+        self.writer.start()
+        self.writer.flush()
+
+        self.archive.append.assert_called_once_with([first, second])
+        self.assertEqual("conversation-writer", self.writer.thread.name)
+
+        expected = dict(queued=0, written=2, skipped=0, dropped=0)
+        self.assertEqual(expected, self.writer.stats())
+
+    @patch.object(ConversationWriter, "start")
+    def test_submit_when_full(self, *args):
+        self.assertTrue(self.writer.submit(conversation("1")))
+        self.assertTrue(self.writer.submit(conversation("2")))
+        self.assertFalse(self.writer.submit(conversation("3")))
+
+        expected = dict(queued=2, written=0, skipped=0, dropped=1)
+        self.assertEqual(expected, self.writer.stats())
+
+    @patch("seeya.writers.random.random", side_effect=[0.1, 0.5, 0.9])
+    @patch.object(ConversationWriter, "start")
+    def test_submit_with_sampling(self, *args):
+        self.writer.rate = 0.5
+        self.assertTrue(self.writer.submit(conversation("1")))
+        self.assertFalse(self.writer.submit(conversation("2")))
+        self.assertFalse(self.writer.submit(conversation("3")))
+        self.assertEqual(2, self.writer.skipped)
+        self.assertEqual(1, self.writer.queue.qsize())
+
+    @patch("seeya.writers.logger.exception")
+    def test_run_logs_errors(self, logger):
+        self.archive.append.side_effect = [OSError("disk full"), None]
+        self.writer.submit(conversation("1"))
+        self.writer.flush()
+        self.writer.submit(conversation("2"))
+        self.writer.flush()
+
+        logger.assert_called_once_with("OSError('disk full',)")
+        self.assertEqual(1, self.writer.written)
+        self.assertEqual(0, self.writer.queue.unfinished_tasks)
@@ -0,0 +1,127 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from attr import attrib, attrs
+
+from seeya.archives import ConversationArchive
+from seeya.payloads import PayloadCodec
+
+
+@attrs(auto_attribs=True)
+class ProviderProfile:
+    """Latency is log-normal around `median` seconds, `sigma` sets how long
+    the tail is, and `errors` is the share of calls that fail."""
+
+    median: float = attrib(default=0.5)
+    sigma: float = attrib(default=0.5)
+    errors: float = attrib(default=0.0)
+
+    def get_latency(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median), self.sigma)
+
+    def is_error(self) -> bool:
+        return random.random() < self.errors
+
+
+class Recordings:
+    """Recorded provider responses, looked up by request and provider."""
+
+    def __init__(self):
+        self.requests: Dict[str, str] = dict()
+        self.providers: Dict[str, List[str]] = defaultdict(list)
+        self.fixtures: List[str] = []
+
+    def load_fixture(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            self.fixtures.append(f.read())
+
+    def load_archive(self, path: str):
+        archive = ConversationArchive(path)
+        for conversation in archive.replay():
+            _, digest = archive.strip(conversation.request)
+            key = self.key(conversation.provider, digest)
+            self.requests[key] = conversation.response
+            self.providers[conversation.provider].append(conversation.response)
+
+    @staticmethod
+    def key(provider: str, digest: str) -> str:
+        return "{}:{}".format(provider, digest)
+
+    def find(self, provider: str, request: str) -> Optional[str]:
+        """The response recorded for the same request, else any response of
+        the provider, else any of the fixtures."""
+        _, digest = ConversationArchive.strip(request)
+        response = self.requests.get(self.key(provider, digest))
+        if response is not None:
+            return response
+
+        choices = self.providers.get(provider) or self.fixtures
+        return random.choice(choices) if choices else None
+
+    def __len__(self):
+        return len(self.fixtures) + sum(map(len, self.providers.values()))
+
+
+class StandIn:
+    """Answers seeya jobs from recordings instead of the real providers,
+    with the latency and error rate of each provider's profile."""
+
+    ERROR = "Simulated provider error"
+
+    def __init__(
+        self,
+        recordings: Recordings,
+        profiles: Dict[str, ProviderProfile] = None,
+        default: ProviderProfile = None,
+    ):
+        self.recordings = recordings
+        self.profiles = profiles or dict()
+        self.default = default or ProviderProfile()
+        self.jobs = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def get_profile(self, provider: str) -> ProviderProfile:
+        return self.profiles.get(provider, self.default)
+
+    def handle(self, payload: str) -> str:
+        """Answer compressed requests with responses compressed the same
+        way and plain requests with plain responses."""
+        codec = PayloadCodec(PayloadCodec.get_compression(payload))
+        return codec.encode(self.answer(PayloadCodec.decode(payload)))
+
+    def answer(self, workload: str) -> str:
+        request = json.loads(workload)
+        transaction = request.get("transactionId")
+        provider = (request.get("method") or "..").split(".")[1]
+        profile = self.get_profile(provider)
+
+        time.sleep(profile.get_latency())
+        response = None
+        if not profile.is_error():
+            response = self.recordings.find(provider, workload)
+
+        with self.lock:
+            self.jobs += 1
+            self.errors += response is None
+
+        if response is None:
+            return json.dumps(
+                dict(transactionId=transaction, result=None, error=self.ERROR)
+            )
+
+        data = json.loads(response)
+        data["transactionId"] = transaction
+        if data.get("result"):
+            data["result"]["transactionId"] = transaction
+        return json.dumps(data)
+
+    def stats(self) -> Dict:
+        return dict(jobs=self.jobs, errors=self.errors)
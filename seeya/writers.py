@@ -0,0 +1,90 @@
+import logging
+import random
+import threading
+from queue import Empty, Full, Queue
+from typing import Dict
+
+from seeya.archives import ConversationArchive
+from seeya.models import SeeyaConversation
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriter:
+    """Appends conversations to the archive from a background thread, off
+    the request path.
+
+    Only a `rate` share of the submitted conversations is kept, the rest is
+    skipped right away. Kept ones wait in a queue of at most `size` entries
+    and are written in batches of up to `batch` entries, a conversation that
+    finds the queue full is dropped instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        archive: ConversationArchive,
+        rate: float = 1.0,
+        size: int = 1000,
+        batch: int = 100,
+    ):
+        self.archive = archive
+        self.rate = rate
+        self.batch = batch
+        self.queue = Queue(maxsize=size)
+        self.thread = None
+        self.written = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def submit(self, conversation: SeeyaConversation) -> bool:
+        if self.rate < 1 and random.random() >= self.rate:
+            self.skipped += 1
+            return False
+
+        try:
+            self.queue.put_nowait(conversation)
+        except Full:
+            self.dropped += 1
+            return False
+
+        self.start()
+        return True
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="conversation-writer", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            entries = [self.queue.get()]
+            while len(entries) < self.batch:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            try:
+                self.archive.append(entries)
+                self.written += len(entries)
+            except Exception as e:
+                logger.exception(repr(e))
+            finally:
+                for _ in entries:
+                    self.queue.task_done()
+
+    def flush(self):
+        """Block until every queued conversation has been written."""
+        self.queue.join()
+
+    def stats(self) -> Dict:
+        return dict(
+            queued=self.queue.qsize(),
+            written=self.written,
+            skipped=self.skipped,
+            dropped=self.dropped,
+        )